@@ -0,0 +1,94 @@
+"""Per-endpoint size and processing-time budgets."""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.config import REQUEST_BUDGETS
+
+OVERSIZE_POLICIES = ("reject", "truncate", "chunk")
+
+
+class BudgetExceeded(Exception):
+    """Raised between pipeline stages once the processing-time budget is spent."""
+
+    def __init__(self, stage: str, elapsed_ms: float, budget_ms: float):
+        super().__init__(
+            f"Processing time budget of {budget_ms:.0f} ms exceeded after stage '{stage}' "
+            f"({elapsed_ms:.0f} ms)"
+        )
+        self.stage = stage
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Limits for one endpoint; ``0`` disables a limit."""
+
+    max_chars: int = 0
+    max_entities: int = 0
+    max_ms: float = 0
+    oversize_policy: str = "reject"
+
+    def __post_init__(self):
+        if self.oversize_policy not in OVERSIZE_POLICIES:
+            raise ValueError(
+                f"Unsupported oversize policy '{self.oversize_policy}'. Use one of {OVERSIZE_POLICIES}"
+            )
+
+    def deadline(self) -> Optional["Deadline"]:
+        return Deadline(self.max_ms) if self.max_ms > 0 else None
+
+
+class Deadline:
+    """Cooperative time budget checked between stages (spaCy itself is not interrupted)."""
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.started = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def check(self, stage: str) -> None:
+        elapsed = self.elapsed_ms()
+        if elapsed > self.budget_ms:
+            raise BudgetExceeded(stage, elapsed, self.budget_ms)
+
+
+def check_deadline(deadline: Optional[Deadline], stage: str) -> None:
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def get_budget(endpoint: str) -> Budget:
+    return Budget(**REQUEST_BUDGETS.get(endpoint, {}))
+
+
+def split_chunks(text: str, max_chars: int) -> List[Tuple[int, str]]:
+    """Split text into ``(offset, chunk)`` pieces of at most ``max_chars``.
+
+    Cuts prefer a newline, then whitespace, in the second half of the window so
+    entities are rarely split across chunks.
+    """
+
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [(0, text)]
+
+    chunks: List[Tuple[int, str]] = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + max_chars)
+        if end < len(text):
+            floor = start + max_chars // 2
+            cut = text.rfind("\n", floor, end)
+            if cut < 0:
+                cut = max(text.rfind(" ", floor, end), text.rfind("\t", floor, end))
+            if cut >= 0:
+                end = cut + 1
+        chunks.append((start, text[start:end]))
+        start = end
+    return chunks
+
+
+def budget_status() -> Dict[str, Dict[str, object]]:
+    return {name: dict(cfg) for name, cfg in REQUEST_BUDGETS.items()}
@@ -0,0 +1,261 @@
+"""Cascade scheduling of spaCy NER.
+
+With ``NER_CASCADE`` set, each text first goes through the spaCy pipeline with
+the NER component disabled (tokens and lemmas for the pattern recognizers'
+context stay intact). Cheap lexical signals then decide where NER can matter:
+
+- a title-case Cyrillic/Latin word that does not start a sentence;
+- a capitalized Cyrillic word ending in a surname suffix (``_SURNAME_SUFFIXES``);
+- a context word such as ``ООО``, ``ул``, ``mr`` or ``inc``.
+
+In ``document`` mode one signal anywhere runs NER on the whole text, exactly as
+without the cascade. In ``sentence`` mode NER runs only on the flagged
+sentences and their entities are placed back into the document.
+
+``python -m app.application.cascade corpus.txt`` compares a corpus (one text
+per line) against the full pipeline and reports the entities the cascade
+would miss.
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import re
+import sys
+import threading
+from importlib.metadata import version
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.infrastructure.recognizers import _SURNAME_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "document", "sentence")
+
+# Presidio has no public way to turn a spaCy Doc into NlpArtifacts, so the
+# cascade calls SpacyNlpEngine._doc_to_nlp_artifact(doc, language); it is
+# checked at startup and known to work with these presidio-analyzer releases
+_TESTED_PRESIDIO = ("2.2.",)
+
+# Components that only produce entities; the rest of the pipeline always runs
+_NER_PIPES = ("ner",)
+
+_WORD = re.compile(r"[A-Za-zА-Яа-яЁё][A-Za-zА-Яа-яЁё'’-]*")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+|\n+")
+_CYRILLIC_TITLE = re.compile(r"[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)*")
+
+_CONTEXT_WORDS = frozenset({
+    # organizations
+    "ооо", "оао", "зао", "пао", "ао", "ип", "нко", "фгуп", "компания", "организация",
+    "inc", "ltd", "llc", "corp", "company", "gmbh",
+    # people
+    "фио", "гражданин", "гражданка", "господин", "госпожа", "уважаемый", "уважаемая",
+    "mr", "mrs", "ms", "dr", "dear", "name",
+    # places
+    "ул", "улица", "проспект", "город", "область", "обл", "район", "село",
+    "street", "avenue", "ave", "city",
+})
+
+SIGNALS = ("capitalized", "surname_suffix", "context")
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "documents": 0,
+    "ner_documents": 0,
+    "skipped_documents": 0,
+    "partial_documents": 0,
+    "sentences": 0,
+    "ner_sentences": 0,
+}
+_signal_hits: Dict[str, int] = {name: 0 for name in SIGNALS}
+
+
+def check_mode(mode: str) -> None:
+    """Raise ``ValueError`` unless ``mode`` is a valid ``NER_CASCADE`` value."""
+
+    if mode not in MODES:
+        raise ValueError(f"Unsupported NER_CASCADE '{mode}'. Use one of {MODES}")
+
+
+def check_engine(engine) -> None:
+    """Raise ``RuntimeError`` if ``engine`` lacks the Doc -> NlpArtifacts conversion the cascade uses."""
+
+    presidio = version("presidio-analyzer")
+    convert = getattr(engine, "_doc_to_nlp_artifact", None)
+    if not callable(convert) or list(inspect.signature(convert).parameters)[:2] != ["doc", "language"]:
+        raise RuntimeError(
+            f"NER_CASCADE needs {type(engine).__name__}._doc_to_nlp_artifact(doc, language), "
+            f"which presidio-analyzer {presidio} does not provide; set NER_CASCADE=off"
+        )
+    if not presidio.startswith(_TESTED_PRESIDIO):
+        logger.warning("NER_CASCADE is untested with presidio-analyzer %s (tested: %s)", presidio, _TESTED_PRESIDIO)
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Character spans of sentences, split on ``.!?…`` + whitespace and newlines."""
+
+    spans, pos = [], 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        if match.start() > pos:
+            spans.append((pos, match.start()))
+        pos = match.end()
+    if pos < len(text):
+        spans.append((pos, len(text)))
+    return spans
+
+
+def _has_surname_suffix(word: str) -> bool:
+    if not _CYRILLIC_TITLE.fullmatch(word):
+        return False
+    lowered = word.lower()
+    return any(lowered.endswith(s) and len(lowered) > len(s) + 1 for s in _SURNAME_SUFFIXES)
+
+
+def sentence_signal(sentence: str) -> Optional[str]:
+    """Name of the first signal found in one sentence, or ``None``."""
+
+    for idx, match in enumerate(_WORD.finditer(sentence)):
+        word = match.group()
+        if word.lower() in _CONTEXT_WORDS:
+            return "context"
+        if _has_surname_suffix(word):
+            return "surname_suffix"
+        if idx > 0 and len(word) > 1 and word[0].isupper() and word[1:].islower():
+            return "capitalized"
+    return None
+
+
+def plan_ner(text: str, mode: str, record: bool = True) -> Optional[List[Tuple[int, int]]]:
+    """Return ``None`` to run NER on the whole text, else the sentence spans that need it.
+
+    ``mode`` is ``document`` or ``sentence``; raises ``ValueError`` otherwise.
+    """
+
+    if mode not in ("document", "sentence"):
+        raise ValueError(f"Unsupported NER_CASCADE '{mode}'. Use one of {MODES}")
+
+    sentences = split_sentences(text)
+    flagged: List[Tuple[int, int]] = []
+    hits: Dict[str, int] = {}
+    for start, end in sentences:
+        signal = sentence_signal(text[start:end])
+        if signal is None:
+            continue
+        hits[signal] = hits.get(signal, 0) + 1
+        flagged.append((start, end))
+        if mode == "document":
+            break
+
+    full = bool(flagged) and (mode == "document" or len(flagged) == len(sentences))
+    if record:
+        with _stats_lock:
+            _stats["documents"] += 1
+            _stats["sentences"] += len(sentences)
+            if full:
+                _stats["ner_documents"] += 1
+                _stats["ner_sentences"] += len(sentences)
+            elif flagged:
+                _stats["partial_documents"] += 1
+                _stats["ner_sentences"] += len(flagged)
+            else:
+                _stats["skipped_documents"] += 1
+            for name, count in hits.items():
+                _signal_hits[name] += count
+    return None if full else flagged
+
+
+def process_texts(engine, texts: Sequence[str], language: str, mode: str, record: bool = True) -> List[Any]:
+    """NLP artifacts for ``texts`` with NER only where ``plan_ner`` asks for it."""
+
+    nlp = engine.get_nlp(language)
+    ner_pipes = [name for name in _NER_PIPES if name in nlp.pipe_names]
+    plans = [plan_ner(text, mode, record) for text in texts]
+    docs: List[Any] = [None] * len(texts)
+
+    full = [i for i, plan in enumerate(plans) if plan is None]
+    for i, doc in zip(full, nlp.pipe([texts[i] for i in full])):
+        docs[i] = doc
+    cheap = [i for i, plan in enumerate(plans) if plan is not None]
+    for i, doc in zip(cheap, nlp.pipe([texts[i] for i in cheap], disable=ner_pipes)):
+        docs[i] = doc
+
+    jobs = [(i, start, end) for i in cheap for start, end in plans[i]]
+    found: Dict[int, List[Any]] = {}
+    for (i, offset, _), sentence_doc in zip(jobs, nlp.pipe([texts[i][s:e] for i, s, e in jobs])):
+        for ent in sentence_doc.ents:
+            span = docs[i].char_span(
+                offset + ent.start_char, offset + ent.end_char, label=ent.label_, alignment_mode="expand"
+            )
+            if span is not None:
+                found.setdefault(i, []).append(span)
+    for i, spans in found.items():
+        kept, last_end = [], -1
+        for span in sorted(spans, key=lambda s: s.start):
+            if span.start >= last_end:  # expanded spans may touch a neighbour
+                kept.append(span)
+                last_end = span.end
+        docs[i].set_ents(kept, default="unmodified")
+
+    # Private Presidio API, pinned by check_engine() when the analyzer is built
+    return [engine._doc_to_nlp_artifact(doc, language) for doc in docs]
+
+
+def cascade_stats(mode: str) -> Dict[str, Any]:
+    with _stats_lock:
+        return {"mode": mode, **_stats, "signals": dict(_signal_hits)}
+
+
+def recall_report(texts: Sequence[str], language: str, mode: str) -> Dict[str, Any]:
+    """Compare cascade results with the full pipeline on ``texts``.
+
+    Recall is computed over post-validated results; ``missed`` counts the
+    entities the full pipeline finds and the cascade does not, per type.
+    """
+
+    from app.application.service import get_analyzer, post_validate
+
+    analyzer = get_analyzer()
+    engine = analyzer.nlp_engine
+    full_artifacts = [artifacts for _, artifacts in engine.process_batch(list(texts), language=language)]
+    cascade_artifacts = process_texts(engine, texts, language, mode, record=False)
+
+    expected = found = 0
+    missed: Dict[str, int] = {}
+    documents_with_ner = 0
+    for text, full_nlp, cascade_nlp in zip(texts, full_artifacts, cascade_artifacts):
+        documents_with_ner += plan_ner(text, mode, record=False) != []
+        keys = []
+        for nlp_artifacts in (full_nlp, cascade_nlp):
+            results = post_validate(text, analyzer.analyze(text=text, language=language, nlp_artifacts=nlp_artifacts))
+            keys.append({(r.start, r.end, r.entity_type) for r in results})
+        expected += len(keys[0])
+        found += len(keys[0] & keys[1])
+        for _, _, entity_type in keys[0] - keys[1]:
+            missed[entity_type] = missed.get(entity_type, 0) + 1
+
+    return {
+        "mode": mode,
+        "documents": len(texts),
+        "documents_with_ner": documents_with_ner,
+        "entities": expected,
+        "recall": round(found / expected, 4) if expected else 1.0,
+        "missed": missed,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare NER cascade results with the full pipeline")
+    parser.add_argument("corpus", help="Text file, one document per line; '-' for stdin")
+    parser.add_argument("--language", default="ru", choices=["ru", "en"])
+    parser.add_argument("--mode", default="sentence", choices=["document", "sentence"])
+    args = parser.parse_args(argv)
+
+    fh = sys.stdin if args.corpus == "-" else open(args.corpus, "r", encoding="utf-8")
+    with fh:
+        texts = [line.rstrip("\n") for line in fh if line.strip()]
+    print(json.dumps(recall_report(texts, args.language, args.mode), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
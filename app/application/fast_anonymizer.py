@@ -0,0 +1,162 @@
+"""Single-pass anonymizer for ``replace``, ``mask``, ``redact`` and ``keep``.
+
+Reproduces ``AnonymizerEngine.anonymize`` (MERGE_SIMILAR_OR_CONTAINED) exactly
+for the operators above: results strictly contained in another are dropped,
+equal spans keep the best score, same-type neighbours separated by spaces are
+merged, and the output is joined once from left to right. Whenever Presidio's
+behaviour depends on something this module does not model -- other operators,
+invalid operator params, same-type overlaps (which Presidio merges in place),
+empty or out-of-range spans -- ``fast_anonymize`` returns ``None`` without
+touching the results, and the caller falls back to Presidio.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.infrastructure.policies import split_policy_entry
+
+# (original span text, entity type) -> replacement
+Operator = Callable[[str, str], str]
+
+# Same pattern Presidio uses to merge same-type neighbours
+_SPACES_ONLY = re.compile(r"^( )+$")
+
+
+def _replace(params: Dict[str, Any]) -> Optional[Operator]:
+    new_value = params.get("new_value")
+    if new_value and not isinstance(new_value, str):
+        return None
+    if new_value:
+        return lambda _text, _entity: new_value
+    return lambda _text, entity: f"<{entity}>"
+
+
+def _mask(params: Dict[str, Any]) -> Optional[Operator]:
+    char = params.get("masking_char")
+    count = params.get("chars_to_mask")
+    from_end = params.get("from_end")
+    if not isinstance(char, str) or len(char) > 1 or not isinstance(count, int) or not isinstance(from_end, bool):
+        return None
+
+    def mask(text: str, _entity: str) -> str:
+        n = min(len(text), count) if count > 0 else 0
+        if from_end:
+            return text[:len(text) - n] + char * n
+        return char * n + text[n:]
+
+    return mask
+
+
+_BUILDERS: Dict[str, Callable[[Dict[str, Any]], Optional[Operator]]] = {
+    "replace": _replace,
+    "mask": _mask,
+    "redact": lambda _params: (lambda _text, _entity: ""),
+    "keep": lambda _params: (lambda text, _entity: text),
+}
+
+
+def compile_policy(policy: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[str, Optional[Operator]]]:
+    """Map each policy key to ``(operator name, function)``; the function is
+    ``None`` for operators handled only by Presidio.
+
+    Raises the same ``TypeError``/``ValueError`` as ``to_operator_config`` for
+    malformed entries.
+    """
+
+    compiled: Dict[str, Tuple[str, Optional[Operator]]] = {}
+    for name, cfg in policy.items():
+        operator_type, params = split_policy_entry(name, cfg)
+        builder = _BUILDERS.get(operator_type) if isinstance(operator_type, str) else None
+        compiled[name] = (operator_type, builder(params) if builder else None)
+    # Presidio's fallback for entities without an entry (the key is upper-case)
+    compiled.setdefault("DEFAULT", ("replace", _replace({})))
+    return compiled
+
+
+def _resolve(results: Sequence[Any]) -> List[int]:
+    """Indexes (in input order) of the results Presidio keeps after conflict removal."""
+
+    order = sorted(range(len(results)), key=lambda i: (results[i].start, -results[i].end))
+    dropped = [False] * len(results)
+    max_end = -1
+    idx = 0
+    while idx < len(order):
+        first = results[order[idx]]
+        group_end = idx
+        while group_end < len(order) and (
+            results[order[group_end]].start == first.start and results[order[group_end]].end == first.end
+        ):
+            group_end += 1
+        group = sorted(order[idx:group_end])  # equal spans, in input order
+        if max_end >= first.end:
+            # strictly inside an earlier-starting or longer span
+            for i in group:
+                dropped[i] = True
+        elif len(group) > 1:
+            # Presidio drops a span when a still-present equal span scores at least as high
+            for i in group:
+                if any(j != i and not dropped[j] and results[j].score >= results[i].score for j in group):
+                    dropped[i] = True
+        max_end = max(max_end, first.end)
+        idx = group_end
+    return [i for i in range(len(results)) if not dropped[i]]
+
+
+def _has_same_type_overlap(results: Sequence[Any]) -> bool:
+    ends: Dict[str, int] = {}
+    for r in sorted(results, key=lambda r: r.start):
+        if r.start < ends.get(r.entity_type, -1):
+            return True
+        ends[r.entity_type] = max(ends.get(r.entity_type, -1), r.end)
+    return False
+
+
+def fast_anonymize(
+    text: str,
+    results: Sequence[Any],
+    operators: Dict[str, Tuple[str, Optional[Operator]]],
+) -> Optional[Tuple[str, List[str]]]:
+    """Return ``(anonymized text, operator names)`` or ``None`` to use Presidio.
+
+    ``operators`` comes from :func:`compile_policy`. Like Presidio, the start of
+    a result merged with its space-separated predecessor is moved back in place.
+    """
+
+    length = len(text)
+    if any(not 0 <= r.start < r.end <= length for r in results) or _has_same_type_overlap(results):
+        return None
+
+    kept = _resolve(results)
+    starts = {i: results[i].start for i in kept}
+    merged: List[int] = []
+    prev: Optional[int] = None
+    for i in kept:
+        if prev is not None and results[prev].entity_type == results[i].entity_type:
+            if _SPACES_ONLY.search(text[results[prev].end:results[i].start]):
+                merged.remove(prev)
+                starts[i] = starts[prev]
+        merged.append(i)
+        prev = i
+
+    spans = sorted(merged, key=lambda i: starts[i])
+    plan = []
+    for i in spans:
+        entity = results[i].entity_type
+        name, op = operators.get(entity) or operators["DEFAULT"]
+        if op is None:
+            return None
+        plan.append((starts[i], results[i].end, entity, name, op))
+    if len({start for start, *_ in plan}) != len(plan):
+        return None  # Presidio's replacement order is ambiguous here
+
+    for i in merged:
+        results[i].start = starts[i]
+
+    parts: List[str] = []
+    pos = 0
+    for n, (start, end, entity, _, op) in enumerate(plan):
+        parts.append(text[pos:start])
+        parts.append(op(text[start:end], entity))
+        pos = min(end, plan[n + 1][0]) if n + 1 < len(plan) else end
+    parts.append(text[pos:])
+    return "".join(parts), [name for *_, name, _ in plan]
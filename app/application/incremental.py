@@ -0,0 +1,277 @@
+"""Incremental re-analysis of edited documents.
+
+The last analysis of each document (raw recognizer spans plus per-paragraph
+hashes) is kept in an LRU bounded by document count and total text size. On update only the paragraphs that changed,
+widened by a context margin, go through the analyzer; spans outside that window
+are reused with shifted offsets. ``post_validate`` still runs over the whole
+text because checksum/BIK linkage rules look at the full document.
+"""
+
+import bisect
+import logging
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+from app.application.lang_detect import LanguageDetection, detect_language
+from app.application.service import recognize, registry_version, validate_results
+from app.config import INCREMENTAL_CONTEXT_CHARS, INCREMENTAL_MAX_CHARS, INCREMENTAL_MAX_DOCUMENTS
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_RE = re.compile(r"[^\n]+\n*|\n+")
+
+# Above this share of changed characters a full analysis is cheaper
+_FULL_REANALYSIS_RATIO = 0.5
+
+_incremental = None
+_incremental_lock = threading.Lock()
+
+Paragraph = Tuple[int, int, int]  # (start, end, hash)
+
+
+@dataclass
+class DocumentState:
+    text: str
+    detection: LanguageDetection
+    registry_version: str
+    paragraphs: List[Paragraph]
+    raw: List[RecognizerResult] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class IncrementalResult:
+    detection: LanguageDetection
+    results: List[RecognizerResult]
+    window: Optional[Tuple[int, int]]  # re-analyzed [start, end); None if nothing changed
+    full: bool
+
+
+def split_paragraphs(text: str) -> List[Paragraph]:
+    """Split text into newline-terminated paragraphs with content hashes."""
+
+    return [(m.start(), m.end(), hash(m.group(0))) for m in _PARAGRAPH_RE.finditer(text)]
+
+
+def _changed_region(
+    old_text: str, old: List[Paragraph], new_text: str, new: List[Paragraph]
+) -> Tuple[int, int, int, int]:
+    """Return ``(old_start, old_end, new_start, new_end)`` of the differing paragraphs."""
+
+    def same(a: Paragraph, b: Paragraph) -> bool:
+        # The hash only rules out most mismatches; a collision must not reuse stale spans
+        return a[2] == b[2] and a[1] - a[0] == b[1] - b[0] and old_text[a[0]:a[1]] == new_text[b[0]:b[1]]
+
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and same(old[prefix], new[prefix]):
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and same(old[-1 - suffix], new[-1 - suffix]):
+        suffix += 1
+
+    start = old[prefix - 1][1] if prefix else 0
+    old_end = old[len(old) - suffix][0] if suffix else (old[-1][1] if old else 0)
+    new_end = new[len(new) - suffix][0] if suffix else (new[-1][1] if new else 0)
+    return start, old_end, start, new_end
+
+
+def _shift(result: RecognizerResult, delta: int) -> RecognizerResult:
+    if delta == 0:
+        return result
+    return RecognizerResult(
+        entity_type=result.entity_type,
+        start=result.start + delta,
+        end=result.end + delta,
+        score=result.score,
+        analysis_explanation=result.analysis_explanation,
+        recognition_metadata=result.recognition_metadata,
+    )
+
+
+def _widen_window(state: DocumentState, start: int, end: int) -> Tuple[int, int]:
+    """Snap ``[start, end)`` (old-text offsets) to paragraph bounds and cover crossing spans.
+
+    Cutting mid-line could make patterns match fragments of longer tokens.
+    """
+
+    starts = [p[0] for p in state.paragraphs]
+    while True:
+        idx = bisect.bisect_right(starts, start) - 1
+        new_start = state.paragraphs[idx][0] if idx >= 0 else 0
+        idx = bisect.bisect_left(starts, end) - 1
+        new_end = state.paragraphs[idx][1] if idx >= 0 and end > 0 else end
+        for r in state.raw:
+            if r.start < new_start < r.end:
+                new_start = r.start
+            if r.start < new_end < r.end:
+                new_end = r.end
+        if (new_start, new_end) == (start, end):
+            return start, end
+        start, end = new_start, new_end
+
+
+class IncrementalAnalyzer:
+    """Per-document analysis sessions held in a bounded LRU."""
+
+    def __init__(self, max_documents: int = 1000, context_chars: int = 200, max_chars: int = 50_000_000):
+        self.max_documents = max(1, max_documents)
+        self.max_chars = max(0, max_chars)
+        self.context_chars = max(0, context_chars)
+        self._documents: "OrderedDict[str, DocumentState]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self._document_locks: Dict[str, List[Any]] = {}  # id -> [lock, users]
+        self._full = 0
+        self._partial = 0
+        self._unchanged = 0
+
+    @contextmanager
+    def _serialized(self, document_id: str) -> Iterator[None]:
+        """Run updates of one document one at a time; each diffs against the previous one."""
+
+        with self._lock:
+            entry = self._document_locks.setdefault(document_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._document_locks[document_id]
+
+    def _get(self, document_id: str) -> Optional[DocumentState]:
+        with self._lock:
+            state = self._documents.get(document_id)
+            if state is not None:
+                self._documents.move_to_end(document_id)
+            return state
+
+    def _put(self, document_id: str, state: DocumentState) -> None:
+        with self._lock:
+            old = self._documents.pop(document_id, None)
+            if old is not None:
+                self._chars -= len(old.text)
+            if len(state.text) > self.max_chars:
+                return  # would evict every other session and still not fit
+            self._documents[document_id] = state
+            self._chars += len(state.text)
+            while len(self._documents) > self.max_documents or self._chars > self.max_chars:
+                _, evicted = self._documents.popitem(last=False)
+                self._chars -= len(evicted.text)
+
+    def forget(self, document_id: str) -> bool:
+        with self._lock:
+            state = self._documents.pop(document_id, None)
+            if state is not None:
+                self._chars -= len(state.text)
+            return state is not None
+
+    def _full_analysis(
+        self, document_id: str, text: str, detection: LanguageDetection
+    ) -> IncrementalResult:
+        raw = recognize(text, detection.language)
+        self._put(document_id, DocumentState(
+            text=text,
+            detection=detection,
+            registry_version=registry_version(),
+            paragraphs=split_paragraphs(text),
+            raw=raw,
+        ))
+        with self._lock:
+            self._full += 1
+        return IncrementalResult(detection, validate_results(text, raw), (0, len(text)), True)
+
+    def analyze(
+        self, document_id: str, text: str, language: Optional[str] = None
+    ) -> IncrementalResult:
+        """Analyze ``text`` as the latest version of ``document_id``.
+
+        Concurrent calls for the same document are serialized. Raises
+        ``ValueError`` for an unsupported explicit language.
+        """
+
+        with self._serialized(document_id):
+            return self._analyze(document_id, text, language)
+
+    def _analyze(self, document_id: str, text: str, language: Optional[str]) -> IncrementalResult:
+        state = self._get(document_id)
+        if (
+            state is None
+            or (language and language.lower() != state.detection.language)
+            or state.registry_version != registry_version()
+        ):
+            detection = detect_language(text, explicit_language=language)
+            return self._full_analysis(document_id, text, detection)
+
+        if text == state.text:
+            with self._lock:
+                self._unchanged += 1
+            return IncrementalResult(state.detection, validate_results(text, state.raw), None, False)
+
+        paragraphs = split_paragraphs(text)
+        old_start, old_end, new_start, new_end = _changed_region(
+            state.text, state.paragraphs, text, paragraphs
+        )
+        if (new_end - new_start) > _FULL_REANALYSIS_RATIO * max(len(text), 1):
+            return self._full_analysis(document_id, text, state.detection)
+
+        delta = new_end - old_end
+        win_start, old_win_end = _widen_window(
+            state,
+            max(0, old_start - self.context_chars),
+            min(len(state.text), old_end + self.context_chars),
+        )
+        win_end = old_win_end + delta
+        logger.debug("Re-analyzing [%d, %d) of %d chars for %s", win_start, win_end, len(text), document_id)
+
+        kept = [r for r in state.raw if r.end <= win_start]
+        kept += [_shift(r, delta) for r in state.raw if r.start >= old_win_end]
+        fresh = recognize(text[win_start:win_end], state.detection.language)
+        raw = kept + [_shift(r, win_start) for r in fresh]
+        raw.sort(key=lambda r: (r.start, r.end))
+
+        self._put(document_id, DocumentState(
+            text=text,
+            detection=state.detection,
+            registry_version=state.registry_version,
+            paragraphs=paragraphs,
+            raw=raw,
+        ))
+        with self._lock:
+            self._partial += 1
+        return IncrementalResult(state.detection, validate_results(text, raw), (win_start, win_end), False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "max_documents": self.max_documents,
+                "chars": self._chars,
+                "max_chars": self.max_chars,
+                "full": self._full,
+                "partial": self._partial,
+                "unchanged": self._unchanged,
+            }
+
+
+def get_incremental_analyzer() -> IncrementalAnalyzer:
+    global _incremental
+    if _incremental is None:
+        with _incremental_lock:
+            if _incremental is None:
+                _incremental = IncrementalAnalyzer(
+                    INCREMENTAL_MAX_DOCUMENTS, INCREMENTAL_CONTEXT_CHARS, INCREMENTAL_MAX_CHARS
+                )
+    return _incremental
+
+
+def incremental_status() -> Optional[Dict[str, Any]]:
+    return _incremental.stats() if _incremental is not None else None
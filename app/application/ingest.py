@@ -0,0 +1,497 @@
+"""Streaming anonymization of uploaded files, written back in the same format.
+
+Each format handler walks its input as a sequence of text units (a line, a CSV
+field, a JSON string leaf, an email part, a DOCX paragraph) and hands them to
+``UnitAnonymizer``, which analyzes them in bounded batches via ``analyze_texts``.
+Only one batch of units is held at a time for the line-based formats.
+"""
+
+import csv
+import email.message
+import email.parser
+import email.policy
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import Counter
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.application.lang_detect import LanguageDetection, detect_language
+from app.application.service import analyze_texts, anonymize_results
+from app.config import (
+    INGEST_BATCH_CHARS,
+    INGEST_BATCH_UNITS,
+    INGEST_DOCX_MAX_BYTES,
+    INGEST_EML_MAX_BYTES,
+)
+
+INGEST_FORMATS = ("txt", "csv", "jsonl", "docx", "eml")
+
+# Structural email headers; every other header (addresses, Subject, Received,
+# X-*) may carry personal data and is anonymized like body text
+_EML_KEEP_HEADERS = frozenset({
+    "mime-version", "content-type", "content-transfer-encoding", "content-disposition",
+    "content-id", "date", "message-id", "in-reply-to", "references",
+})
+
+# DOCX parts holding user text, and the package metadata parts
+_DOCX_PARTS = re.compile(r"word/(document|header\d*|footer\d*|footnotes|endnotes|comments|people)\.xml")
+_DOCX_PROPS = ("docProps/core.xml", "docProps/app.xml", "docProps/custom.xml")
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Deleted text of tracked changes and field codes, anonymized per paragraph apart from w:t
+_DOCX_HIDDEN_TEXT = (f"{_W}delText", f"{_W}instrText")
+# Attributes naming reviewers (comments, w:ins/w:del, people.xml), by local name
+_DOCX_AUTHOR_ATTRS = ("author", "initials", "userId")
+# docProps elements (by local name) cleared outright, and those anonymized as text
+_DOCX_PROPS_CLEARED = frozenset({"creator", "lastModifiedBy", "Manager", "Company"})
+_DOCX_PROPS_TEXT = frozenset({"title", "subject", "description", "keywords", "category", "lpwstr", "lpstr"})
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+# Run elements that stand for whitespace inside a paragraph
+_DOCX_BREAKS = {f"{_W}tab": "\t", f"{_W}br": "\n", f"{_W}cr": "\n"}
+_DOCX_ROOT_TAG = re.compile(rb"<(?![?!])[^>]*>")
+
+
+class UnitAnonymizer:
+    """Anonymize text units in batches, preserving their order.
+
+    The language is fixed by the first batch unless given explicitly, so short
+    units (CSV cells) do not each get their own, unreliable, detection.
+    """
+
+    def __init__(
+        self,
+        language: Optional[str] = None,
+        policy: Optional[Dict[str, Dict[str, Any]]] = None,
+        batch_units: int = INGEST_BATCH_UNITS,
+        batch_chars: int = INGEST_BATCH_CHARS,
+    ):
+        self.language = language
+        self.policy = policy
+        self.batch_units = max(1, batch_units)
+        self.batch_chars = max(1, batch_chars)
+        self.detection: Optional[LanguageDetection] = None
+        self.units = 0
+        self.entities = 0
+        self.entity_types: Counter = Counter()
+        self.chars = 0
+
+    def _flush(self, batch: List[str]) -> List[str]:
+        todo = [i for i, unit in enumerate(batch) if unit.strip()]
+        if not todo:
+            return batch
+        if self.language is None:
+            sample = "\n".join(batch[i] for i in todo)[: self.batch_chars]
+            self.detection = detect_language(sample)
+            self.language = self.detection.language
+        out = list(batch)
+        analyzed = analyze_texts([batch[i] for i in todo], self.language)
+        if self.detection is None:
+            self.detection = analyzed[0][0]  # the explicit language
+        for i, (_, results) in zip(todo, analyzed):
+            self.entities += len(results)
+            self.entity_types.update(r.entity_type for r in results)
+            self.chars += len(batch[i])
+            if results:
+                out[i] = anonymize_results(batch[i], results, self.policy)
+        return out
+
+    def map(self, units: Iterable[str]) -> Iterator[str]:
+        """Yield the anonymized counterpart of every unit, in input order."""
+
+        batch: List[str] = []
+        size = 0
+        for unit in units:
+            batch.append(unit)
+            size += len(unit)
+            self.units += 1
+            if len(batch) >= self.batch_units or size >= self.batch_chars:
+                yield from self._flush(batch)
+                batch, size = [], 0
+        if batch:
+            yield from self._flush(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "units": self.units,
+            "entities": self.entities,
+            "entity_types": dict(self.entity_types),
+            "chars": self.chars,
+            "language": self.language,
+            "detection": self.detection,
+        }
+
+
+def _text_reader(src: IO[bytes]) -> IO[str]:
+    return io.TextIOWrapper(src, encoding="utf-8-sig", newline="")
+
+
+def _text_writer(dst: IO[bytes]) -> IO[str]:
+    return io.TextIOWrapper(dst, encoding="utf-8", newline="", write_through=True)
+
+
+def _process_txt(src: IO[bytes], dst: IO[bytes], units: UnitAnonymizer) -> None:
+    reader, out = _text_reader(src), _text_writer(dst)
+    for line in units.map(reader):
+        out.write(line)
+    reader.detach()
+    out.detach()
+
+
+def _process_csv(src: IO[bytes], dst: IO[bytes], units: UnitAnonymizer) -> None:
+    reader, out = _text_reader(src), _text_writer(dst)
+    rows = csv.reader(reader)
+    writer = csv.writer(out, lineterminator="\n")
+    shapes: List[int] = []
+
+    def fields() -> Iterator[str]:
+        for row in rows:
+            shapes.append(len(row))
+            yield from row
+
+    pending: List[str] = []
+    for value in units.map(fields()):
+        pending.append(value)
+        # Rows are emitted as soon as all their fields are back
+        while shapes and len(pending) >= shapes[0]:
+            width = shapes.pop(0)
+            writer.writerow(pending[:width])
+            del pending[:width]
+    while shapes:  # empty trailing rows
+        writer.writerow(pending[:shapes.pop(0)])
+    reader.detach()
+    out.detach()
+
+
+def _string_leaves(value: Any, sink: List[str]) -> None:
+    if isinstance(value, str):
+        sink.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _string_leaves(item, sink)
+    elif isinstance(value, list):
+        for item in value:
+            _string_leaves(item, sink)
+
+
+def _replace_leaves(value: Any, replacements: Iterator[str]) -> Any:
+    if isinstance(value, str):
+        return next(replacements)
+    if isinstance(value, dict):
+        return {key: _replace_leaves(item, replacements) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_leaves(item, replacements) for item in value]
+    return value
+
+
+def _process_jsonl(src: IO[bytes], dst: IO[bytes], units: UnitAnonymizer) -> None:
+    reader, out = _text_reader(src), _text_writer(dst)
+    records: List[Tuple[Any, int]] = []
+
+    def leaves() -> Iterator[str]:
+        for lineno, line in enumerate(reader, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"Invalid JSON on line {lineno}: {exc}") from exc
+            found: List[str] = []
+            _string_leaves(record, found)
+            records.append((record, len(found)))
+            yield from found
+
+    pending: List[str] = []
+    for value in units.map(leaves()):
+        pending.append(value)
+        while records and len(pending) >= records[0][1]:
+            record, count = records.pop(0)
+            out.write(json.dumps(_replace_leaves(record, iter(pending[:count])), ensure_ascii=False) + "\n")
+            del pending[:count]
+    for record, _ in records:  # records without string leaves
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    reader.detach()
+    out.detach()
+
+
+def _part_text(part: email.message.EmailMessage) -> str:
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeDecodeError):
+        # Unknown or wrong charset: decode leniently rather than fail the whole message
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode("utf-8", errors="replace")
+
+
+def _process_eml(src: IO[bytes], dst: IO[bytes], units: UnitAnonymizer) -> None:
+    # The message is parsed and re-serialized as a whole, hence INGEST_EML_MAX_BYTES
+    parser = email.parser.BytesFeedParser(policy=email.policy.default)
+    size = 0
+    for block in iter(lambda: src.read(64 * 1024), b""):
+        size += len(block)
+        if size > INGEST_EML_MAX_BYTES:
+            raise ValueError(f"Email exceeds INGEST_EML_MAX_BYTES ({INGEST_EML_MAX_BYTES} bytes)")
+        parser.feed(block)
+    message = parser.close()
+
+    headers = list(message.items())
+    parts = [p for p in message.walk() if p.get_content_maintype() == "text" and not p.is_multipart()]
+    texts = [str(value) for name, value in headers if name.lower() not in _EML_KEEP_HEADERS]
+    texts += [_part_text(p) for p in parts]
+    anonymized = iter(units.map(texts))
+
+    # Headers are rebuilt in their original order, since replace_header only sees the first of a name
+    for name in {name for name, _ in headers}:
+        del message[name]
+    for name, original in headers:
+        if name.lower() in _EML_KEEP_HEADERS:
+            message[name] = original
+            continue
+        value = next(anonymized)
+        try:
+            message[name] = value
+        except (ValueError, TypeError, IndexError):
+            # An anonymized value the header parser rejects is dropped rather than kept raw
+            pass
+    for part, text in zip(parts, anonymized):
+        # set_content resets Content-* headers, so keep attachment metadata
+        part.set_content(
+            text,
+            subtype=part.get_content_subtype(),
+            charset="utf-8",
+            disposition=part.get_content_disposition(),
+            filename=part.get_filename(),
+        )
+    dst.write(message.as_bytes())
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _paragraph_segments(
+    paragraph: ET.Element,
+) -> Tuple[List[List[ET.Element]], str, Dict[str, List[ET.Element]]]:
+    """Split a paragraph's own ``w:t`` elements at tabs/breaks; nested paragraphs are skipped.
+
+    Returns the ``w:t`` elements of each segment, the separators between them
+    and the paragraph's ``w:delText``/``w:instrText`` elements by tag.
+    """
+
+    segments: List[List[ET.Element]] = [[]]
+    separators: List[str] = []
+    hidden: Dict[str, List[ET.Element]] = {tag: [] for tag in _DOCX_HIDDEN_TEXT}
+
+    def walk(element: ET.Element) -> None:
+        for child in element:
+            if child.tag == f"{_W}p":
+                continue  # text boxes and content controls hold paragraphs of their own
+            if child.tag == f"{_W}t":
+                segments[-1].append(child)
+            elif child.tag in hidden:
+                hidden[child.tag].append(child)
+            elif child.tag in _DOCX_BREAKS:
+                separators.append(_DOCX_BREAKS[child.tag])
+                segments.append([])
+            else:
+                walk(child)
+
+    walk(paragraph)
+    return segments, "".join(separators), hidden
+
+
+def _paragraph_text(segments: List[List[ET.Element]], separators: str) -> str:
+    texts = ["".join(t.text or "" for t in segment) for segment in segments]
+    return "".join(text + sep for text, sep in zip(texts, list(separators) + [""]))
+
+
+def _set_segment(segment: List[ET.Element], text: str) -> None:
+    # The whole segment goes into its first run, so replacements may change length
+    for i, t in enumerate(segment):
+        t.text = text if i == 0 else ""
+        t.set(_XML_SPACE, "preserve")
+
+
+def _rewrite_paragraph(segments: List[List[ET.Element]], separators: str, text: str) -> None:
+    pieces = re.split(r"[\t\n]", text)
+    if "".join(re.findall(r"[\t\n]", text)) == separators and all(
+        segment or not piece for segment, piece in zip(segments, pieces)
+    ):
+        for segment, piece in zip(segments, pieces):
+            _set_segment(segment, piece)
+        return
+    # An entity spanned a tab or break: keep the layout elements, move all text to the first run
+    runs = [t for segment in segments for t in segment]
+    _set_segment(runs, re.sub(r"[\t\n]", " ", text))
+
+
+def _parse_part(xml: bytes) -> Tuple[ET.Element, List[Tuple[str, str]]]:
+    namespaces: List[Tuple[str, str]] = []
+    root: Optional[ET.Element] = None
+    try:
+        for event, item in ET.iterparse(io.BytesIO(xml), events=("start-ns", "start")):
+            if event == "start-ns":
+                namespaces.append(item)
+            elif root is None:
+                root = item
+    except ET.ParseError as exc:
+        raise ValueError(f"Invalid DOCX XML: {exc}") from exc
+    if root is None:
+        raise ValueError("Invalid DOCX XML: no root element")
+    return root, namespaces
+
+
+def _write_part(xml: bytes, root: ET.Element, namespaces: List[Tuple[str, str]]) -> bytes:
+    for prefix, uri in namespaces:
+        try:
+            ET.register_namespace(prefix, uri)
+        except ValueError:  # reserved ns\d+ prefixes
+            pass
+    body = ET.tostring(root, encoding="unicode").encode("utf-8")
+    # ElementTree declares only the namespaces it uses, but mc:Ignorable may name
+    # others, so the original root start tag (attributes are never changed) is kept
+    original_root = _DOCX_ROOT_TAG.search(xml)
+    return xml[:original_root.end()] + body[body.index(b">") + 1:]
+
+
+def _replace_authors(root: ET.Element, authors: Dict[Tuple[str, str], str]) -> bool:
+    """Replace reviewer names with ``Author N`` (``AN`` for initials), consistently per document."""
+
+    changed = False
+    for element in root.iter():
+        for name, value in element.attrib.items():
+            kind = _local(name)
+            if kind not in _DOCX_AUTHOR_ATTRS or not value:
+                continue
+            number = authors.setdefault((kind, value), str(sum(k == kind for k, _ in authors) + 1))
+            element.set(name, {"author": "Author ", "initials": "A", "userId": "user"}[kind] + number)
+            changed = True
+    return changed
+
+
+def _anonymize_docx_xml(
+    xml: bytes, units: UnitAnonymizer, authors: Optional[Dict[Tuple[str, str], str]] = None
+) -> bytes:
+    root, namespaces = _parse_part(xml)
+    paragraphs = [_paragraph_segments(p) for p in root.iter(f"{_W}p")]
+    hidden = [elements for _, _, groups in paragraphs for elements in groups.values() if elements]
+
+    texts = [_paragraph_text(segments, separators) for segments, separators, _ in paragraphs]
+    texts += ["".join(e.text or "" for e in elements) for elements in hidden]
+    anonymized = list(units.map(texts))
+    changed = _replace_authors(root, authors if authors is not None else {})
+    for (segments, separators, _), original, text in zip(paragraphs, texts, anonymized):
+        if text != original:
+            _rewrite_paragraph(segments, separators, text)
+            changed = True
+    for elements, original, text in zip(hidden, texts[len(paragraphs):], anonymized[len(paragraphs):]):
+        if text != original:
+            _set_segment(elements, text)
+            changed = True
+    return _write_part(xml, root, namespaces) if changed else xml
+
+
+def _anonymize_docx_props(xml: bytes, units: UnitAnonymizer) -> bytes:
+    """Clear author/company metadata and anonymize free-text document properties."""
+
+    root, namespaces = _parse_part(xml)
+    changed = False
+    free_text: List[ET.Element] = []
+    for element in root.iter():
+        name = _local(element.tag)
+        if name in _DOCX_PROPS_CLEARED and element.text:
+            element.text = ""
+            changed = True
+        elif name in _DOCX_PROPS_TEXT and element.text:
+            free_text.append(element)
+    for element, text in zip(free_text, units.map([e.text for e in free_text])):
+        if text != element.text:
+            element.text = text
+            changed = True
+    return _write_part(xml, root, namespaces) if changed else xml
+
+
+class _ArchiveBudget:
+    """Counts uncompressed bytes actually read from an archive against ``INGEST_DOCX_MAX_BYTES``.
+
+    Declared sizes are checked up front, but they come from the archive itself,
+    so reads are capped as well.
+    """
+
+    def __init__(self, zin: zipfile.ZipFile, limit: int):
+        self.limit = limit
+        self.used = 0
+        declared = sum(info.file_size for info in zin.infolist())
+        if declared > limit:
+            raise ValueError(f"DOCX expands to {declared} bytes, the limit is INGEST_DOCX_MAX_BYTES ({limit})")
+
+    def blocks(self, part: IO[bytes]) -> Iterator[bytes]:
+        for block in iter(lambda: part.read(64 * 1024), b""):
+            self.used += len(block)
+            if self.used > self.limit:
+                raise ValueError(f"DOCX expands beyond INGEST_DOCX_MAX_BYTES ({self.limit} bytes)")
+            yield block
+
+    def read(self, zin: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+        with zin.open(info) as part:
+            return b"".join(self.blocks(part))
+
+
+def _process_docx(src: IO[bytes], dst: IO[bytes], units: UnitAnonymizer) -> None:
+    try:
+        zin = zipfile.ZipFile(src)
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"Not a DOCX file: {exc}") from exc
+    authors: Dict[Tuple[str, str], str] = {}
+    with zin:
+        budget = _ArchiveBudget(zin, INGEST_DOCX_MAX_BYTES)
+        with zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if _DOCX_PARTS.fullmatch(info.filename):
+                    zout.writestr(info, _anonymize_docx_xml(budget.read(zin, info), units, authors))
+                elif info.filename in _DOCX_PROPS:
+                    zout.writestr(info, _anonymize_docx_props(budget.read(zin, info), units))
+                else:
+                    # zout.open resets the sizes on ``info``, so the source is opened first
+                    with zin.open(info) as part, zout.open(info, "w") as target:
+                        for block in budget.blocks(part):
+                            target.write(block)
+
+
+_HANDLERS: Dict[str, Callable[[IO[bytes], IO[bytes], UnitAnonymizer], None]] = {
+    "txt": _process_txt,
+    "csv": _process_csv,
+    "jsonl": _process_jsonl,
+    "docx": _process_docx,
+    "eml": _process_eml,
+}
+
+
+def detect_format(filename: Optional[str], explicit_format: Optional[str] = None) -> str:
+    fmt = (explicit_format or (filename or "").rsplit(".", 1)[-1]).lower()
+    fmt = {"text": "txt", "ndjson": "jsonl"}.get(fmt, fmt)
+    if fmt not in INGEST_FORMATS:
+        raise ValueError(f"Unsupported file format '{fmt}'. Use one of {INGEST_FORMATS}")
+    return fmt
+
+
+def anonymize_file(
+    fmt: str,
+    src: IO[bytes],
+    dst: IO[bytes],
+    language: Optional[str] = None,
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Anonymize ``src`` into ``dst`` in the same format; returns unit/entity counts.
+
+    Raises ``ValueError`` for unsupported formats or malformed input.
+    """
+
+    units = UnitAnonymizer(language, policy)
+    try:
+        _HANDLERS[detect_format(None, fmt)](src, dst, units)
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as exc:
+        raise ValueError(f"Cannot read {fmt} input: {exc}") from exc
+    return units.stats()
+
@@ -0,0 +1,321 @@
+"""Background jobs for large documents.
+
+Submissions are split into chunks and stored in the SQLite ``JobStore``; worker
+processes claim chunks one by one, analyze (and anonymize) them with a warm
+analyzer and write results back. Run standalone workers with
+``python -m app.application.jobs --workers 2`` or set ``JOB_WORKERS`` to let the
+API spawn them: every API process starts a supervisor thread, and the one that
+holds a file lock next to ``JOBS_DB`` keeps the workers running.
+"""
+
+import argparse
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+from app.application.budget import split_chunks
+from app.application.lang_detect import detect_language
+from app.application.service import analyze_span, anonymize_results, get_analyzer
+from app.config import (
+    JOB_CHUNK_CHARS,
+    JOB_POLL_SECONDS,
+    JOB_RESULT_TTL_SECONDS,
+    JOB_SUBMIT_TTL_SECONDS,
+    JOB_WORKER_NICE,
+    JOB_WORKERS,
+    JOBS_DB,
+)
+from app.infrastructure.jobs import JobStore
+from app.infrastructure.policies import validate_policy
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("analyze", "anonymize")
+
+# Characters of the neighbouring chunks fed to the recognizers, so an entity
+# cut by a chunk boundary is still matched as a whole
+_BOUNDARY_CHARS = 256
+
+# How often the supervisor retries the lock and restarts dead workers
+_SUPERVISOR_POLL_SECONDS = 5.0
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+_workers: List[multiprocessing.Process] = []
+_supervisor: Optional[threading.Thread] = None
+_supervisor_stop = threading.Event()
+_supervisor_lock_fd: Optional[int] = None
+
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(
+                    JOBS_DB, result_ttl=JOB_RESULT_TTL_SECONDS, submit_ttl=JOB_SUBMIT_TTL_SECONDS
+                )
+    return _store
+
+
+def iter_file_chunks(fh: TextIO, chunk_chars: int) -> Iterator[Tuple[int, str]]:
+    """Read a text file in ``chunk_chars`` blocks cut at the last newline."""
+
+    offset = 0
+    carry = ""
+    while True:
+        block = fh.read(chunk_chars)
+        if not block:
+            break
+        buf = carry + block
+        cut = buf.rfind("\n", len(buf) // 2)
+        if cut < 0 or len(buf) < chunk_chars:
+            carry = ""
+            piece = buf
+        else:
+            piece, carry = buf[:cut + 1], buf[cut + 1:]
+        yield offset, piece
+        offset += len(piece)
+    if carry:
+        yield offset, carry
+
+
+def _check_submission(kind: str, policy: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unsupported job kind '{kind}'. Use one of {JOB_KINDS}")
+    if policy is not None:
+        validate_policy(policy)
+
+
+def submit_text(
+    kind: str,
+    text: str,
+    language: Optional[str] = None,
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+    store: Optional[JobStore] = None,
+) -> str:
+    """Queue a job for an in-memory text; returns the job ID."""
+
+    _check_submission(kind, policy)
+    store = store or get_job_store()
+    chunks = split_chunks(text, JOB_CHUNK_CHARS)
+    detection = detect_language(chunks[0][1], explicit_language=language)
+    job_id = store.create(kind, detection.language, policy)
+    store.seal(job_id, store.add_chunks(job_id, chunks))
+    return job_id
+
+
+def submit_file(
+    kind: str,
+    path: str,
+    language: Optional[str] = None,
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+    store: Optional[JobStore] = None,
+) -> str:
+    """Queue a job for a UTF-8 text file, reading it chunk by chunk.
+
+    If the file cannot be read to the end, the job is marked failed so that it
+    expires like any other finished job instead of staying in ``submitting``.
+    """
+
+    _check_submission(kind, policy)
+    store = store or get_job_store()
+    job_id = None
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as fh:
+            chunks = iter_file_chunks(fh, JOB_CHUNK_CHARS)
+            first = next(chunks, (0, ""))
+            detection = detect_language(first[1], explicit_language=language)
+            job_id = store.create(kind, detection.language, policy)
+            total = store.add_chunks(job_id, [first])
+            for chunk in chunks:
+                total += store.add_chunks(job_id, [chunk], start_idx=total)
+        store.seal(job_id, total)
+    except BaseException as exc:
+        if job_id is not None:
+            store.fail(job_id, f"Submission failed: {exc}")
+        raise
+    return job_id
+
+
+def process_chunk(
+    kind: str,
+    text: str,
+    offset: int,
+    language: str,
+    policy: Optional[Dict[str, Any]],
+    before: str = "",
+    after: str = "",
+):
+    """Analyze one chunk; returns items with document-level offsets and optional output.
+
+    ``before`` and ``after`` are the texts of the neighbouring chunks. They are
+    scanned only near the boundaries, but BIK/account linkage and the other
+    post-validation rules see them whole. An entity crossing a boundary is
+    reported once, by the chunk it starts in, and masked in both outputs.
+    """
+
+    start, end = len(before), len(before) + len(text)
+    window = before + text + after
+    results = analyze_span(window, start, end, language, overlap=_BOUNDARY_CHARS)
+    items = [
+        {
+            "entity_type": r.entity_type,
+            "start": r.start - start + offset,
+            "end": r.end - start + offset,
+            "text": window[r.start:r.end],
+            "score": float(r.score),
+        }
+        for r in results
+        if r.start >= start
+    ]
+    output = None
+    if kind == "anonymize":
+        clipped = [
+            RecognizerResult(r.entity_type, max(r.start, start) - start, min(r.end, end) - start, r.score)
+            for r in results
+        ]
+        output = anonymize_results(text, clipped, policy)
+    return items, output
+
+
+def run_worker_once(store: Optional[JobStore] = None) -> bool:
+    """Process one pending chunk; returns ``False`` when the queue is empty."""
+
+    store = store or get_job_store()
+    row = store.claim_chunk()
+    if row is None:
+        return False
+    policy = json.loads(row["policy"]) if row["policy"] else None
+    try:
+        before, after = store.neighbours(row["job_id"], row["idx"])
+        items, output = process_chunk(
+            row["kind"], row["text"], row["offset"], row["language"], policy, before, after
+        )
+    except Exception as exc:
+        logger.exception("Job %s failed on chunk %s", row["job_id"], row["idx"])
+        store.fail(row["job_id"], str(exc))
+        return True
+    store.complete_chunk(row["job_id"], row["idx"], items, output)
+    return True
+
+
+def worker_main(poll_seconds: float = JOB_POLL_SECONDS) -> None:
+    """Worker process loop: warm the analyzer once, then drain the queue forever."""
+
+    if JOB_WORKER_NICE:
+        os.nice(JOB_WORKER_NICE)
+    store = get_job_store()
+    get_analyzer()
+    logger.info("Job worker %s ready", os.getpid())
+    last_purge = 0.0
+    while True:
+        if time.monotonic() - last_purge > 60:
+            store.purge_expired()
+            last_purge = time.monotonic()
+        if not run_worker_once(store):
+            time.sleep(poll_seconds)
+
+
+def start_job_workers(count: int = JOB_WORKERS) -> List[multiprocessing.Process]:
+    """Spawn ``count`` worker processes (spawn, not fork: the API process has threads)."""
+
+    ctx = multiprocessing.get_context("spawn")
+    for _ in range(count):
+        proc = ctx.Process(target=worker_main, name="pii-job-worker", daemon=True)
+        proc.start()
+        _workers.append(proc)
+    return list(_workers)
+
+
+def _acquire_supervisor_lock(path: str) -> Optional[int]:
+    """Take the exclusive supervisor lock without blocking; ``None`` if another process holds it."""
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _supervise(count: int, lock_path: str) -> None:
+    global _supervisor_lock_fd
+    while not _supervisor_stop.is_set():
+        if _supervisor_lock_fd is None:
+            _supervisor_lock_fd = _acquire_supervisor_lock(lock_path)
+            if _supervisor_lock_fd is not None:
+                logger.info("Process %s supervises %s job workers", os.getpid(), count)
+        if _supervisor_lock_fd is not None:
+            dead = [p for p in _workers if not p.is_alive()]
+            for proc in dead:
+                logger.warning("Job worker %s exited with %s, restarting", proc.pid, proc.exitcode)
+                _workers.remove(proc)
+            start_job_workers(count - len(_workers))
+        _supervisor_stop.wait(_SUPERVISOR_POLL_SECONDS)
+
+
+def start_job_supervisor(count: int = JOB_WORKERS) -> None:
+    """Keep ``count`` workers running from exactly one of the API processes sharing ``JOBS_DB``.
+
+    Each process runs a supervisor thread; the one holding the lock spawns the
+    workers and restarts dead ones, the others retry in case it goes away.
+    """
+
+    global _supervisor
+    if _supervisor is not None:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(JOBS_DB)), exist_ok=True)
+    _supervisor_stop.clear()
+    _supervisor = threading.Thread(
+        target=_supervise, args=(count, JOBS_DB + ".supervisor.lock"), name="pii-job-supervisor", daemon=True
+    )
+    _supervisor.start()
+
+
+def stop_job_workers() -> None:
+    global _supervisor, _supervisor_lock_fd
+    if _supervisor is not None:
+        _supervisor_stop.set()
+        _supervisor.join(timeout=5)
+        _supervisor = None
+    for proc in _workers:
+        proc.terminate()
+    for proc in _workers:
+        proc.join(timeout=5)
+    _workers.clear()
+    if _supervisor_lock_fd is not None:
+        os.close(_supervisor_lock_fd)
+        _supervisor_lock_fd = None
+
+
+def job_status() -> Dict[str, Any]:
+    return {
+        "workers": sum(1 for p in _workers if p.is_alive()),
+        "supervisor": _supervisor_lock_fd is not None,
+        "jobs": get_job_store().counts() if _store is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=max(1, JOB_WORKERS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.workers == 1:
+        worker_main()
+        return
+    for proc in start_job_workers(args.workers):
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
-import importlib
+import importlib.util
+import json
 import logging
 import os
+import struct
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.config import SHARED_CACHE_MAX_CHARS
+from app.infrastructure.shared_cache import get_shared_cache
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +19,10 @@ logger = logging.getLogger(__name__)
 _FASTTEXT_MODEL = None
 _FASTTEXT_PATH: Optional[str] = None
 _FASTTEXT_FAILED = False
+_FASTTEXT_INFO: Dict[str, Any] = {}
+
+# First int32 of every fastText model file (.bin and quantized .ftz)
+_FASTTEXT_MAGIC = 793712314
 
 
 @dataclass(frozen=True)
@@ -25,8 +34,33 @@ class LanguageDetection:
     confidence: Optional[float] = None
 
 
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):  # pragma: no cover - non-Linux
+        return None
+
+
+def _validate_fasttext_file(path: str) -> Optional[str]:
+    """Return an error message if ``path`` is not a fastText .bin/.ftz model."""
+
+    if not path.endswith((".bin", ".ftz")):
+        return f"expected a .bin or .ftz file, got '{os.path.basename(path)}'"
+    with open(path, "rb") as fh:
+        header = fh.read(4)
+    if len(header) < 4 or struct.unpack("<i", header)[0] != _FASTTEXT_MAGIC:
+        return "file is not a fastText model (bad magic number)"
+    return None
+
+
 def _load_fasttext_model(path: str):
-    """Load and cache a fastText model if available."""
+    """Load and cache a fastText model if available.
+
+    The quantized ``lid.176.ftz`` (~1 MB) is preferred over ``lid.176.bin``
+    (~126 MB): fastText has no memory-mapped loader, so every worker that loads
+    the model holds its own copy in the heap (see ``preload_language_model``).
+    """
 
     global _FASTTEXT_MODEL, _FASTTEXT_PATH, _FASTTEXT_FAILED
 
@@ -37,6 +71,13 @@ def _load_fasttext_model(path: str):
         _FASTTEXT_FAILED = True
         return None
 
+    error = _validate_fasttext_file(path)
+    if error:
+        logger.warning("Ignoring FASTTEXT_MODEL=%s: %s", path, error)
+        _FASTTEXT_INFO.update(path=path, error=error)
+        _FASTTEXT_FAILED = True
+        return None
+
     spec = importlib.util.find_spec("fasttext")
     if spec is None:
         logger.info("FASTTEXT_MODEL is set but fasttext is not installed; skipping fastText detection")
@@ -45,8 +86,18 @@ def _load_fasttext_model(path: str):
 
     fasttext = importlib.import_module("fasttext")  # type: ignore
     try:
+        rss_before = _rss_bytes()
         _FASTTEXT_MODEL = fasttext.load_model(path)
+        rss_after = _rss_bytes()
         _FASTTEXT_PATH = path
+        is_quant = getattr(getattr(_FASTTEXT_MODEL, "f", None), "isQuant", None)
+        _FASTTEXT_INFO.update(
+            path=path,
+            file_bytes=os.path.getsize(path),
+            quantized=bool(is_quant()) if callable(is_quant) else path.endswith(".ftz"),
+            rss_delta_bytes=(rss_after - rss_before) if rss_before and rss_after else None,
+            loaded_by_pid=os.getpid(),
+        )
         logger.info("Loaded fastText model from %s", path)
     except Exception as exc:  # pragma: no cover - depends on runtime model availability
         _FASTTEXT_FAILED = True
@@ -55,17 +106,39 @@ def _load_fasttext_model(path: str):
     return _FASTTEXT_MODEL
 
 
-def _fasttext_predict(text: str) -> Optional[LanguageDetection]:
+def preload_language_model() -> bool:
+    """Load the fastText model now, in the current process.
+
+    Call it before forking workers (gunicorn ``--preload``, the CLI process
+    pool): the model's weights are never written after loading, so the children
+    share those pages copy-on-write instead of each loading a private copy.
+    Returns whether a model is loaded.
+    """
+
+    return _get_fasttext_model() is not None
+
+
+def language_model_status() -> Dict[str, Any]:
+    """Return fastText model path, format and memory footprint for ``/health``.
+
+    ``shared`` is true when the model was inherited from a parent process.
+    """
+
+    status = {"loaded": _FASTTEXT_MODEL is not None, "failed": _FASTTEXT_FAILED, **_FASTTEXT_INFO}
+    if _FASTTEXT_MODEL is not None:
+        status["shared"] = _FASTTEXT_INFO.get("loaded_by_pid") != os.getpid()
+    return status
+
+
+def _get_fasttext_model():
     model_path = os.getenv("FASTTEXT_MODEL")
-    model = _load_fasttext_model(model_path) if model_path else None
-    if not model:
-        return None
+    return _load_fasttext_model(model_path) if model_path else None
+
 
-    cleaned = text.replace("\n", " ")[:2000]
-    labels, probs = model.predict(cleaned)
+def _fasttext_label(labels, probs) -> Optional[LanguageDetection]:
     label = labels[0]
     lang = label.split("__label__")[-1]
-    prob = probs[0] if probs else None
+    prob = float(probs[0]) if len(probs) else None
 
     if lang.startswith("ru"):
         return LanguageDetection(language="ru", method="fasttext", confidence=prob)
@@ -75,6 +148,15 @@ def _fasttext_predict(text: str) -> Optional[LanguageDetection]:
     return None
 
 
+def _fasttext_predict(text: str) -> Optional[LanguageDetection]:
+    model = _get_fasttext_model()
+    if not model:
+        return None
+
+    labels, probs = model.predict(text.replace("\n", " ")[:2000])
+    return _fasttext_label(labels, probs)
+
+
 def _langdetect_predict(text: str) -> Optional[LanguageDetection]:
     spec = importlib.util.find_spec("langdetect")
     if spec is None:
@@ -102,22 +184,55 @@ def _heuristic_predict(text: str) -> LanguageDetection:
 
 
 def detect_language(text: str, explicit_language: Optional[str] = None) -> LanguageDetection:
-    """Detect language 'ru' or 'en', honoring an explicitly provided value."""
+    """Detect language 'ru' or 'en', honoring an explicitly provided value.
+
+    Detections are shared between workers through the shared cache, if enabled.
+    """
 
     if explicit_language:
         lang = explicit_language.lower()
         if lang not in {"ru", "en"}:
             raise ValueError(f"Unsupported language '{explicit_language}'. Only 'ru' or 'en' are allowed")
-        logger.info("Language forced by request: %s", lang)
+        logger.debug("Language forced by request: %s", lang)
         return LanguageDetection(language=lang, method="explicit")
 
+    key = _cache_key(text)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    detection = _predict_language(text)
+    _cache_put(key, detection)
+    return detection
+
+
+def _cache_key(text: str) -> Optional[bytes]:
+    cache = get_shared_cache() if len(text) <= SHARED_CACHE_MAX_CHARS else None
+    return cache.key("language", os.getenv("FASTTEXT_MODEL", ""), text) if cache is not None else None
+
+
+def _cache_get(key: Optional[bytes]) -> Optional[LanguageDetection]:
+    cache = get_shared_cache() if key is not None else None
+    payload = cache.get(key) if cache is not None else None
+    if payload is None:
+        return None
+    language, method, confidence = json.loads(payload)
+    return LanguageDetection(language=language, method=method, confidence=confidence)
+
+
+def _cache_put(key: Optional[bytes], detection: LanguageDetection) -> None:
+    cache = get_shared_cache() if key is not None else None
+    if cache is not None:
+        cache.put(key, json.dumps([detection.language, detection.method, detection.confidence]).encode("utf-8"))
+
+
+def _predict_language(text: str) -> LanguageDetection:
     # 1) fastText if FASTTEXT_MODEL provided (e.g. /models/lid.176.bin)
     fasttext_detection = _fasttext_predict(text)
     if fasttext_detection:
-        logger.info(
+        logger.debug(
             "Language detected via fastText: %s (confidence=%s) using model %s",
             fasttext_detection.language,
-            f"{fasttext_detection.confidence:.3f}" if fasttext_detection.confidence is not None else "n/a",
+            fasttext_detection.confidence,
             _FASTTEXT_PATH,
         )
         return fasttext_detection
@@ -125,10 +240,41 @@ def detect_language(text: str, explicit_language: Optional[str] = None) -> Langu
     # 2) langdetect fallback
     langdetect_detection = _langdetect_predict(text)
     if langdetect_detection:
-        logger.info("Language detected via langdetect: %s", langdetect_detection.language)
+        logger.debug("Language detected via langdetect: %s", langdetect_detection.language)
         return langdetect_detection
 
     # 3) script heuristic
     heuristic_detection = _heuristic_predict(text)
-    logger.info("Language selected via heuristic: %s", heuristic_detection.language)
+    logger.debug("Language selected via heuristic: %s", heuristic_detection.language)
     return heuristic_detection
+
+
+def detect_languages(
+    texts: Sequence[str], explicit_language: Optional[str] = None
+) -> List[LanguageDetection]:
+    """Detect languages for many texts with a single fastText ``predict`` call.
+
+    Detections found in the shared cache are reused; the remaining texts are
+    predicted together and stored. Texts fastText cannot place fall back to
+    langdetect and the script heuristic one by one.
+    """
+
+    if explicit_language or not texts:
+        return [detect_language(text, explicit_language=explicit_language) for text in texts]
+
+    model = _get_fasttext_model()
+    if not model:
+        return [detect_language(text) for text in texts]
+
+    keys = [_cache_key(text) for text in texts]
+    detections: List[Optional[LanguageDetection]] = [_cache_get(key) for key in keys]
+    missing = [i for i, detection in enumerate(detections) if detection is None]
+    if missing:
+        labels, probs = model.predict([texts[i].replace("\n", " ")[:2000] for i in missing])
+        for i, text_labels, text_probs in zip(missing, labels, probs):
+            detection = _fasttext_label(text_labels, text_probs) if len(text_labels) else None
+            if detection is None:
+                detection = _langdetect_predict(texts[i]) or _heuristic_predict(texts[i])
+            detections[i] = detection
+            _cache_put(keys[i], detection)
+    return detections  # type: ignore[return-value]
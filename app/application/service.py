@@ -1,76 +1,262 @@
 # Service placeholder
+import hashlib
+import json
 import logging
-import re
-from typing import List
+import os
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import Context, copy_context
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from inspect import signature
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from presidio_analyzer import AnalyzerEngine, RecognizerRegistry, RecognizerResult
 from presidio_anonymizer import AnonymizerEngine
 
+from app.application.budget import Deadline, check_deadline, split_chunks
+from app.application.cascade import cascade_stats, check_engine, check_mode, process_texts
+from app.application.fast_anonymizer import compile_policy, fast_anonymize
+from app.application.lang_detect import (
+    LanguageDetection,
+    detect_language,
+    detect_languages,
+    language_model_status,
+)
+from app.config import (
+    FAST_ANONYMIZER,
+    MICROBATCH_MAX_SIZE,
+    MICROBATCH_MAX_WAIT_MS,
+    MICROBATCH_WORKERS,
+    NER_CASCADE,
+    NLP_CONFIG,
+    NLP_SNAPSHOT_DIR,
+    PROFILE_ANALYZER_CACHE,
+    RECOGNIZERS_FILE,
+    RECOGNIZERS_WATCH_INTERVAL,
+    REGEX_ENGINE,
+    REGEX_TIMEOUT_MS,
+    SHARED_CACHE_MAX_CHARS,
+)
 from app.infrastructure.nlp import create_nlp_engine, nlp_status
+from app.infrastructure.policies import get_default_policy, to_operator_config
+from app.infrastructure.profiles import DEFAULT_PROFILE, Profile, get_profile, profile_names
+from app.infrastructure.shared_cache import get_shared_cache, shared_cache_status
+from app.infrastructure.snapshot import load_predefined_from_snapshot, load_snapshot_engine, snapshot_status
+from app.infrastructure.startup import startup_report, timed
+from app.infrastructure.tracing import set_attributes, stage_span
+from app.infrastructure.validation_rules import (
+    RuleContext,
+    get_rule_table,
+    record_rule_stats,
+    rule_stats,
+    rules_digest,
+)
+from app.infrastructure.vault import vault_status
 from app.infrastructure.recognizers import (
     build_generic_recognizers,
     build_ru_bank_recognizers,
     build_ru_critical_recognizers,
+    load_recognizer_definitions,
+    regex_stats,
+    track_regex_timeouts,
 )
-from app.domain.validators import (
-    luhn_ok,
-    snils_checksum_ok,
-    inn_checksum_ok,
-    ogrn_checksum_ok,
-    bik_ok,
-    account_checksum_ok,
-    find_all_biks,
-)
-from app.domain import entities as E
 
 logger = logging.getLogger(__name__)
 
+_ANONYMIZER_SUPPORTS_OPERATORS = "operators" in signature(AnonymizerEngine.anonymize).parameters
+
 _nlp_engine = None
 _registry = None
 _analyzer = None
 _anonymizer = None
+_batcher = None
+_profile_analyzers: "OrderedDict[Tuple[Profile, str], AnalyzerEngine]" = OrderedDict()
+_registry_lock = threading.RLock()
+_registry_version = 0
+_registry_digest: Optional[str] = None
+_cache_scopes: Dict[Tuple[Profile, str, str], str] = {}
+
+# Bump when a code change alters analysis results, so shared cache entries
+# written by older deployments stop matching
+_CACHE_FORMAT = 1
 
 
 def _ensure_nlp_engine():
     global _nlp_engine
     if _nlp_engine is None:
         logger.info("Initializing NLP engine")
-        _nlp_engine = create_nlp_engine()
+        with timed("nlp_engine"):
+            engine = load_snapshot_engine(NLP_SNAPSHOT_DIR) if NLP_SNAPSHOT_DIR else None
+            _nlp_engine = engine or create_nlp_engine()
     return _nlp_engine
 
 
+def _build_registry(path: str) -> Tuple[RecognizerRegistry, str]:
+    """Build a fresh registry; returns it with a digest of the definitions file."""
+
+    registry = RecognizerRegistry()
+    nlp_engine = _ensure_nlp_engine()
+    if not load_predefined_from_snapshot(registry, nlp_engine):
+        registry.load_predefined_recognizers(nlp_engine=nlp_engine)
+
+    file_recognizers, replaced = [], set()
+    digest = "builtin"
+    if path:
+        file_recognizers, replaced = load_recognizer_definitions(path)
+        with open(path, "rb") as fh:
+            digest = hashlib.sha1(fh.read()).hexdigest()[:12]
+
+    for recognizer in (
+        build_generic_recognizers()
+        + build_ru_critical_recognizers()
+        + build_ru_bank_recognizers()
+    ):
+        if recognizer.supported_entities[0] in replaced:
+            continue
+        registry.add_recognizer(recognizer)
+    for recognizer in file_recognizers:
+        registry.add_recognizer(recognizer)
+    return registry, digest
+
+
+def _build_analyzer(registry: RecognizerRegistry) -> AnalyzerEngine:
+    return AnalyzerEngine(
+        nlp_engine=_ensure_nlp_engine(),
+        registry=registry,
+        supported_languages=["ru", "en"],
+    )
+
+
 def _ensure_registry():
-    global _registry
+    global _registry, _registry_digest, _registry_version
     if _registry is None:
-        logger.info("Initializing recognizer registry")
-        _registry = RecognizerRegistry()
-        _registry.load_predefined_recognizers(nlp_engine=_ensure_nlp_engine())
-        for recognizer in (
-            build_generic_recognizers()
-            + build_ru_critical_recognizers()
-            + build_ru_bank_recognizers()
-        ):
-            _registry.add_recognizer(recognizer)
+        with _registry_lock:
+            if _registry is None:
+                logger.info("Initializing recognizer registry")
+                _ensure_nlp_engine()  # timed as its own stage
+                with timed("registry"):
+                    _registry, _registry_digest = _build_registry(RECOGNIZERS_FILE)
+                _registry_version += 1
     return _registry
 
 
 def get_analyzer() -> AnalyzerEngine:
     global _analyzer
     if _analyzer is None:
-        logger.info("Initializing analyzer engine")
-        _analyzer = AnalyzerEngine(
-            nlp_engine=_ensure_nlp_engine(),
-            registry=_ensure_registry(),
-            supported_languages=["ru", "en"],
-        )
+        check_mode(NER_CASCADE)
+        registry = _ensure_registry()
+        with _registry_lock:
+            if _analyzer is None:
+                logger.info("Initializing analyzer engine")
+                with timed("analyzer"):
+                    analyzer = _build_analyzer(registry)
+                if NER_CASCADE != "off":
+                    check_engine(analyzer.nlp_engine)
+                _analyzer = analyzer
     return _analyzer
 
 
+def get_profile_analyzer(profile: Profile) -> AnalyzerEngine:
+    """Analyzer with only the profile's recognizers, sharing the NLP engine.
+
+    Built lazily and kept in an LRU of ``PROFILE_ANALYZER_CACHE`` entries;
+    profiles that do not filter recognizers use the shared analyzer.
+    """
+
+    if not profile.filters_recognizers:
+        return get_analyzer()
+    # Keyed by the definition too, so a reloaded profile gets a fresh analyzer
+    key = (profile, registry_version())
+    with _registry_lock:
+        analyzer = _profile_analyzers.get(key)
+        if analyzer is not None:
+            _profile_analyzers.move_to_end(key)
+            return analyzer
+
+    recognizers = [
+        r for r in _ensure_registry().recognizers
+        if (profile.recognizers is None or r.name in profile.recognizers)
+        and (profile.entities is None or profile.entities.intersection(r.supported_entities))
+    ]
+    logger.info("Initializing analyzer for profile %s (%d recognizers)", profile.name, len(recognizers))
+    analyzer = _build_analyzer(RecognizerRegistry(recognizers=recognizers))
+    with _registry_lock:
+        if key[1] == registry_version():  # not swapped by a concurrent reload
+            _profile_analyzers[key] = analyzer
+            while len(_profile_analyzers) > max(1, PROFILE_ANALYZER_CACHE):
+                _profile_analyzers.popitem(last=False)
+    return analyzer
+
+
+def reload_registry(path: Optional[str] = None) -> str:
+    """Rebuild registry and analyzer on the loaded NLP engine and swap them in.
+
+    Raises ``ValueError`` for invalid definitions; the current analyzer stays active.
+    """
+
+    global _registry, _analyzer, _registry_digest, _registry_version
+    path = RECOGNIZERS_FILE if path is None else path
+    registry, digest = _build_registry(path)
+    analyzer = _build_analyzer(registry)
+    # Smoke run every recognizer before the swap, so a broken one cannot take
+    # down all requests
+    for language in ("ru", "en"):
+        try:
+            analyzer.analyze(text="Smoke test 1234567890 test@example.com", language=language)
+        except Exception as exc:
+            raise ValueError(f"Reloaded recognizers failed a smoke analysis ({language}): {exc}") from exc
+    with _registry_lock:
+        _registry, _analyzer, _registry_digest = registry, analyzer, digest
+        _registry_version += 1
+        _profile_analyzers.clear()
+        _cache_scopes.clear()
+    logger.info("Recognizer registry reloaded: %s", registry_version())
+    return registry_version()
+
+
+def registry_version() -> str:
+    """Return an identifier of the active registry, suitable for cache keys."""
+
+    return f"{_registry_version}-{_registry_digest or 'builtin'}"
+
+
+def _watch_recognizers_file(path: str, interval: float) -> None:
+    last_mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    while True:
+        time.sleep(interval)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime == last_mtime:
+            continue
+        last_mtime = mtime
+        try:
+            reload_registry(path)
+        except Exception as exc:  # keep serving with the previous registry
+            logger.warning("Failed to reload recognizers from %s: %s", path, exc)
+
+
+def start_registry_watcher() -> Optional[threading.Thread]:
+    """Start polling ``RECOGNIZERS_FILE`` for changes if a watch interval is configured."""
+
+    if not RECOGNIZERS_FILE or RECOGNIZERS_WATCH_INTERVAL <= 0:
+        return None
+    thread = threading.Thread(
+        target=_watch_recognizers_file,
+        args=(RECOGNIZERS_FILE, RECOGNIZERS_WATCH_INTERVAL),
+        name="recognizers-watcher",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
 def get_anonymizer() -> AnonymizerEngine:
     global _anonymizer
     if _anonymizer is None:
         logger.info("Initializing anonymizer engine")
-        _anonymizer = AnonymizerEngine()
+        with timed("anonymizer"):
+            _anonymizer = AnonymizerEngine()
     return _anonymizer
 
 
@@ -80,73 +266,59 @@ def runtime_status() -> dict:
     return {
         "analyzer_initialized": _analyzer is not None,
         "anonymizer_initialized": _anonymizer is not None,
+        "registry_version": registry_version(),
         "nlp": nlp_status(),
+        "language_model": language_model_status(),
+        "regex": regex_stats(),
+        "microbatch": _batcher.stats() if _batcher is not None else None,
+        "cascade": cascade_stats(NER_CASCADE) if NER_CASCADE != "off" else None,
+        "vault": vault_status(),
+        "shared_cache": shared_cache_status(),
+        "snapshot": snapshot_status(),
+        "profiles": {
+            "names": profile_names(),
+            "cached_analyzers": [p.name for p, _ in _profile_analyzers],
+            "cache_size": PROFILE_ANALYZER_CACHE,
+        },
+        "validation": rule_stats(),
+        "startup": startup_report(),
     }
 
-def post_validate(text: str, results: List[RecognizerResult]) -> List[RecognizerResult]:
-    """Apply checksum/context validation and dedupe results."""
-    validated: List[RecognizerResult] = []
-    biks_in_text = [b for b in find_all_biks(text) if bik_ok(b)]
-    email_spans = [
-        (r.start, r.end) for r in results if r.entity_type == E.EMAIL
-    ]
-
-    for r in results:
-        et = r.entity_type
-        span = text[r.start:r.end]
-
-        # Filter noisy low-score ML entities
-        if et in {E.PERSON, E.ORG, E.LOC, E.GPE} and (r.score is not None and r.score < 0.55):
-            continue
-
-        # Structured checks
-        if et == E.RU_SNILS and not snils_checksum_ok(span):
-            continue
-        if et == E.RU_INN and not inn_checksum_ok(span):
-            continue
-        if et in {E.RU_OGRN, E.RU_OGRNIP} and not ogrn_checksum_ok(span):
-            continue
-        if et == E.CARD and not luhn_ok(span):
-            continue
-        if et == "URL":
-            overlaps_email = any(
-                not (r.end <= s or r.start >= e) for s, e in email_spans
-            )
-            if "@" in span or overlaps_email:
-                continue
-        if et in {E.PHONE, E.PHONE_RU}:
-            digits = "".join(ch for ch in span if ch.isdigit())
-            window = text[max(0, r.start - 16) : min(len(text), r.end + 16)].lower()
-            has_phone_keyword = bool(
-                re.search(r"\b(phone|tel|mobile|cell|тел|телефон|моб)\b", window)
-            )
+def post_validate(
+    text: str,
+    results: List[RecognizerResult],
+    rejections: Optional[Dict[str, int]] = None,
+    profile: Optional[Profile] = None,
+) -> List[RecognizerResult]:
+    """Apply checksum/context validation and dedupe results.
 
-            has_prefix = span.strip().startswith(("+", "00"))
-            has_ru_domestic_prefix = digits.startswith("8") and len(digits) == 11
+    Each result runs only the rules compiled for its entity type (see
+    ``app.infrastructure.validation_rules``). ``profile`` sets the ML score
+    cutoff, the dropped entity types and the rules that are switched off
+    (default: the service defaults). When ``rejections`` is given, it is
+    updated with per-rule drop counts.
+    """
 
-            if not (has_prefix or has_ru_domestic_prefix or has_phone_keyword):
-                continue
-        if et == "US_DRIVER_LICENSE":
-            continue
-        if et == E.RU_PASSPORT:
-            digits = ''.join(ch for ch in span if ch.isdigit())
-            if len(digits) != 10 or set(digits) == {"0"}:
-                continue
+    profile = profile or DEFAULT_PROFILE
+    table = get_rule_table(profile)
+    ctx = RuleContext(text, results)
+    hits: Counter = Counter()
+    rejected: Counter = Counter()
 
-            # Drop spurious passport matches that only fit the digit pattern but
-            # lack nearby passport context (e.g. misfired on INN numbers).
-            window = text[max(0, r.start - 24): min(len(text), r.end + 16)].lower()
-            if "паспорт" not in window and "passport" not in window:
-                continue
-        if et in {E.RU_RS, E.RU_KS}:
-            if not biks_in_text:
-                continue
-            is_corr = (et == E.RU_KS)
-            if not any(account_checksum_ok(span, b, is_corr=is_corr) for b in biks_in_text):
+    validated: List[RecognizerResult] = []
+    for r in results:
+        rules = table.get(r.entity_type)
+        if rules:
+            span = text[r.start:r.end]
+            failed = None
+            for name, check in rules:
+                hits[name] += 1
+                if not check(ctx, r, span):
+                    failed = name
+                    break
+            if failed is not None:
+                rejected[failed] += 1
                 continue
-        if et == E.RU_BIK and not bik_ok(span):
-            continue
-
         validated.append(r)
 
     # dedupe by (start, end, type)
@@ -154,7 +326,492 @@ def post_validate(text: str, results: List[RecognizerResult]) -> List[Recognizer
     for r in validated:
         key = (r.start, r.end, r.entity_type)
         if key in seen:
+            rejected["duplicate"] += 1
             continue
         seen.add(key)
         out.append(r)
+
+    record_rule_stats(hits, rejected)
+    if rejections is not None:
+        for rule, count in rejected.items():
+            rejections[rule] = rejections.get(rule, 0) + count
     return out
+
+
+def _detect_language_traced(text: str, language: Optional[str]) -> LanguageDetection:
+    with stage_span("detect_language", text_length=len(text)) as span:
+        detection = detect_language(text, explicit_language=language)
+        set_attributes(
+            span,
+            language=detection.language,
+            detection_method=detection.method,
+            confidence=detection.confidence,
+        )
+    return detection
+
+
+def _recognize_traced(
+    analyzer: AnalyzerEngine, text: str, language: str, nlp_artifacts=None, profile: Profile = DEFAULT_PROFILE
+):
+    entities = sorted(profile.entities) if profile.entities is not None else None
+    with stage_span("recognizers", language=language) as span:
+        raw = analyzer.analyze(text=text, language=language, entities=entities, nlp_artifacts=nlp_artifacts)
+        set_attributes(span, results=len(raw), entity_types=[r.entity_type for r in raw])
+    return raw
+
+
+def _post_validate_traced(
+    text: str, raw: List[RecognizerResult], profile: Profile = DEFAULT_PROFILE
+) -> List[RecognizerResult]:
+    with stage_span("post_validate", candidates=len(raw)) as span:
+        rejections: Optional[Dict[str, int]] = {} if span is not None else None
+        results = post_validate(text, raw, rejections, profile)
+        set_attributes(span, results=len(results), **{f"rejected.{k}": v for k, v in (rejections or {}).items()})
+    return results
+
+
+def _analysis_scope(profile: Profile) -> str:
+    """Everything besides language and text that an analysis depends on.
+
+    Must be called after the analyzer is initialized, so the NLP fallback
+    state is final.
+    """
+
+    key = (profile, registry_version(), rules_digest())
+    scope = _cache_scopes.get(key)
+    if scope is None:
+        scope = json.dumps([
+            _CACHE_FORMAT,
+            _registry_digest or "builtin",
+            NLP_CONFIG.get("models"),
+            nlp_status()["fallback_used"],
+            NER_CASCADE,
+            REGEX_ENGINE,
+            REGEX_TIMEOUT_MS,
+            rules_digest(),
+            profile.name,
+            sorted(profile.entities) if profile.entities is not None else None,
+            sorted(profile.recognizers) if profile.recognizers is not None else None,
+            profile.min_ml_score,
+            sorted(profile.drop_entities),
+            sorted(profile.disabled_rules),
+        ])
+        _cache_scopes[key] = scope
+    return scope
+
+
+def _cached_results(
+    texts: Sequence[str], language: str, profile: Profile, namespace: str = "analysis"
+) -> Tuple[List[Optional[bytes]], List[Optional[List[RecognizerResult]]]]:
+    """Shared cache keys and cached results for ``texts``.
+
+    Keys are ``None`` without a cache or for texts above ``SHARED_CACHE_MAX_CHARS``.
+    ``namespace`` separates validated results from raw recognizer output.
+    """
+
+    cache = get_shared_cache()
+    if cache is None:
+        return [None] * len(texts), [None] * len(texts)
+    scope = _analysis_scope(profile)
+    keys = [
+        cache.key(namespace, scope, language, text) if len(text) <= SHARED_CACHE_MAX_CHARS else None
+        for text in texts
+    ]
+    cached: List[Optional[List[RecognizerResult]]] = []
+    with stage_span("shared_cache", documents=len(texts)) as span:
+        for key in keys:
+            payload = cache.get(key) if key is not None else None
+            cached.append(
+                [RecognizerResult(et, start, end, score) for et, start, end, score in json.loads(payload)]
+                if payload is not None
+                else None
+            )
+        set_attributes(span, hits=sum(r is not None for r in cached))
+    return keys, cached
+
+
+def _store_results(key: Optional[bytes], results: List[RecognizerResult], timed_out: Sequence[str] = ()) -> None:
+    # Results of a timed-out pattern are incomplete and must not be served to others
+    cache = get_shared_cache()
+    if key is not None and cache is not None and not timed_out:
+        payload = [[r.entity_type, r.start, r.end, float(r.score)] for r in results]
+        cache.put(key, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def _nlp_traced(analyzer: AnalyzerEngine, text: str, language: str):
+    with stage_span("nlp", language=language, text_length=len(text)) as span:
+        if NER_CASCADE != "off":
+            nlp_artifacts = process_texts(analyzer.nlp_engine, [text], language, NER_CASCADE)[0]
+        else:
+            nlp_artifacts = analyzer.nlp_engine.process_text(text, language)
+        set_attributes(span, tokens=len(nlp_artifacts.tokens), ner_entities=len(nlp_artifacts.entities))
+    return nlp_artifacts
+
+
+def recognize(text: str, language: str) -> List[RecognizerResult]:
+    """Raw recognizer results for ``text`` with the default profile, before ``post_validate``.
+
+    For callers that keep raw spans and validate them later against a larger
+    text (incremental analysis). Runs the same NLP cascade, tracing and regex
+    timeout tracking as ``analyze_text`` and shares its cache scope, under a
+    separate key namespace.
+    """
+
+    selected = get_profile(None)
+    analyzer = get_profile_analyzer(selected)
+    (cache_key,), (cached,) = _cached_results([text], language, selected, namespace="raw")
+    if cached is not None:
+        return cached
+    nlp_artifacts = _nlp_traced(analyzer, text, language)
+    with track_regex_timeouts() as timed_out:
+        raw = _recognize_traced(analyzer, text, language, nlp_artifacts, selected)
+    _store_results(cache_key, raw, timed_out)
+    return raw
+
+
+def validate_results(text: str, raw: List[RecognizerResult]) -> List[RecognizerResult]:
+    """``post_validate`` with the default profile, traced like the other analysis paths."""
+
+    return _post_validate_traced(text, raw, get_profile(None))
+
+
+def analyze_text(
+    text: str,
+    language: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    profile: Optional[str] = None,
+) -> Tuple[LanguageDetection, List[RecognizerResult]]:
+    """Detect language, run the analyzer and post-validate results for one text.
+
+    Raises ``ValueError`` for an unsupported explicit language or an unknown
+    profile and ``BudgetExceeded`` when ``deadline`` runs out between stages.
+    """
+
+    selected = get_profile(profile)
+    detection = _detect_language_traced(text, language)
+    check_deadline(deadline, "language_detection")
+    analyzer = get_profile_analyzer(selected)
+    (cache_key,), (cached,) = _cached_results([text], detection.language, selected)
+    if cached is not None:
+        return detection, cached
+    nlp_artifacts = _nlp_traced(analyzer, text, detection.language)
+    check_deadline(deadline, "nlp")
+    with track_regex_timeouts() as timed_out:
+        raw = _recognize_traced(analyzer, text, detection.language, nlp_artifacts, selected)
+    check_deadline(deadline, "recognizers")
+    results = _post_validate_traced(text, raw, selected)
+    _store_results(cache_key, results, timed_out)
+    return detection, results
+
+
+def analyze_chunked(
+    text: str,
+    chunk_chars: int,
+    language: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    profile: Optional[str] = None,
+) -> Tuple[LanguageDetection, List[RecognizerResult]]:
+    """Analyze a long text in ``chunk_chars`` pieces and merge offsets.
+
+    The language is detected once on the first chunk; ``post_validate`` runs
+    over the full text so checksum/BIK rules see the whole document.
+    """
+
+    selected = get_profile(profile)
+    chunks = split_chunks(text, chunk_chars)
+    detection = _detect_language_traced(chunks[0][1], language)
+    analyzer = get_profile_analyzer(selected)
+    raw: List[RecognizerResult] = []
+    for offset, chunk in chunks:
+        check_deadline(deadline, "chunk")
+        nlp_artifacts = None
+        if NER_CASCADE != "off":
+            nlp_artifacts = process_texts(analyzer.nlp_engine, [chunk], detection.language, NER_CASCADE)[0]
+        for r in _recognize_traced(analyzer, chunk, detection.language, nlp_artifacts, selected):
+            r.start += offset
+            r.end += offset
+            raw.append(r)
+    check_deadline(deadline, "recognizers")
+    return detection, _post_validate_traced(text, raw, selected)
+
+
+def analyze_span(text: str, start: int, end: int, language: str, overlap: int = 0) -> List[RecognizerResult]:
+    """Analyze ``text[start:end]`` while post-validating against the whole ``text``.
+
+    Used by background jobs, which pass one chunk together with its neighbours:
+    recognizers run on the span widened by ``overlap`` characters on each side,
+    so an entity crossing a boundary is seen whole, and ``post_validate`` sees
+    the neighbours, so an account keeps the BIK written in the previous chunk.
+    Returns the results that intersect the span, in ``text`` coordinates.
+    """
+
+    selected = get_profile(None)
+    analyzer = get_profile_analyzer(selected)
+    lo, hi = max(0, start - overlap), min(len(text), end + overlap)
+    window = text[lo:hi]
+    nlp_artifacts = None
+    if NER_CASCADE != "off":
+        nlp_artifacts = process_texts(analyzer.nlp_engine, [window], language, NER_CASCADE)[0]
+    raw: List[RecognizerResult] = []
+    for r in _recognize_traced(analyzer, window, language, nlp_artifacts, selected):
+        r.start += lo
+        r.end += lo
+        if r.start < end and r.end > start:
+            raw.append(r)
+    return _post_validate_traced(text, raw, selected)
+
+
+def _nlp_batch(analyzer: AnalyzerEngine, texts: Sequence[str], language: str) -> List[Any]:
+    with stage_span("nlp", language=language, documents=len(texts)):
+        if NER_CASCADE != "off":
+            return process_texts(analyzer.nlp_engine, texts, language, NER_CASCADE)
+        return [a for _, a in analyzer.nlp_engine.process_batch(texts, language=language)]
+
+
+def _recognize_and_validate(
+    analyzer: AnalyzerEngine, text: str, language: str, nlp_artifacts, profile: Profile, cache_key: Optional[bytes]
+) -> List[RecognizerResult]:
+    with track_regex_timeouts() as timed_out:
+        raw = _recognize_traced(analyzer, text, language, nlp_artifacts, profile)
+    results = _post_validate_traced(text, raw, profile)
+    _store_results(cache_key, results, timed_out)
+    return results
+
+
+def _analyze_language_batch(
+    texts: Sequence[str],
+    language: str,
+    profile: Profile = DEFAULT_PROFILE,
+    contexts: Optional[Sequence[Context]] = None,
+) -> List[List[RecognizerResult]]:
+    """Run one spaCy ``pipe`` over texts of a single language, then recognizers per text.
+
+    Texts found in the shared cache are skipped. With ``NER_CASCADE`` enabled,
+    NER only runs on the texts (or sentences) the cascade flags. ``contexts``
+    holds the caller's context per text: recognizers run under their text's
+    context and the shared spaCy pass under the first analyzed text's.
+    """
+
+    def run(idx: int, func, *args):
+        return contexts[idx].run(func, *args) if contexts is not None else func(*args)
+
+    analyzer = get_profile_analyzer(profile)
+    keys, outcomes = _cached_results(texts, language, profile)
+    misses = [idx for idx, results in enumerate(outcomes) if results is None]
+    if not misses:
+        return outcomes  # type: ignore[return-value]
+    pending = [texts[idx] for idx in misses]
+    artifacts = run(misses[0], _nlp_batch, analyzer, pending, language)
+    for idx, text, nlp_artifacts in zip(misses, pending, artifacts):
+        outcomes[idx] = run(idx, _recognize_and_validate, analyzer, text, language, nlp_artifacts, profile, keys[idx])
+    return outcomes  # type: ignore[return-value]
+
+
+def analyze_texts(
+    texts: Sequence[str], language: Optional[str] = None, profile: Optional[str] = None
+) -> List[Tuple[LanguageDetection, List[RecognizerResult]]]:
+    """Analyze several texts, running spaCy once per language via ``nlp.pipe``."""
+
+    selected = get_profile(profile)
+    with stage_span("detect_language", documents=len(texts)) as span:
+        detections = detect_languages(texts, explicit_language=language)
+        set_attributes(
+            span,
+            language=sorted({d.language for d in detections}),
+            detection_method=sorted({d.method for d in detections}),
+        )
+    outcomes: List[Optional[Tuple[LanguageDetection, List[RecognizerResult]]]] = [None] * len(texts)
+
+    by_language: Dict[str, List[int]] = {}
+    for idx, detection in enumerate(detections):
+        by_language.setdefault(detection.language, []).append(idx)
+
+    for lang, indices in by_language.items():
+        batch_results = _analyze_language_batch([texts[i] for i in indices], lang, selected)
+        for idx, results in zip(indices, batch_results):
+            outcomes[idx] = (detections[idx], results)
+    return outcomes  # type: ignore[return-value]
+
+
+def _settle(future: Future, result: Any = None, exc: Optional[BaseException] = None) -> None:
+    # A waiter may have cancelled its future; that must not abort the rest of the batch
+    try:
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+# text, explicit language, profile, the caller's future and its context at submit()
+_Submission = Tuple[str, Optional[str], Profile, Future, Context]
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-text analyze calls into per-language spaCy batches.
+
+    ``submit`` returns a ``concurrent.futures.Future`` so both threads and event
+    loops (via ``asyncio.wrap_future``) can wait on it. A collector thread gathers
+    requests for up to ``max_wait_ms`` or ``max_batch_size`` texts and hands each
+    batch to a small executor. Each text is analyzed under a copy of the context
+    it was submitted from, so its spans join the caller's trace.
+    """
+
+    def __init__(self, max_wait_ms: float, max_batch_size: int, workers: int = 2):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: "queue.Queue[_Submission]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="microbatch")
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._documents = 0
+        self._largest_batch = 0
+        self._thread = threading.Thread(target=self._collect, name="microbatch-collector", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, language: Optional[str] = None, profile: Optional[str] = None) -> Future:
+        """Queue one text; raises ``ValueError`` for an unknown profile."""
+
+        selected = get_profile(profile)
+        future: Future = Future()
+        self._queue.put((text, language, selected, future, copy_context()))
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: List[_Submission]) -> None:
+        try:
+            self._run_batch(batch)
+        except BaseException as exc:
+            # A waiter whose future is never resolved would hold its admission slot forever
+            for _, _, _, future, _ in batch:
+                _settle(future, exc=exc)
+            if not isinstance(exc, Exception):
+                raise
+            logger.exception("Micro-batch of %d texts failed", len(batch))
+
+    def _run_batch(self, batch: List[_Submission]) -> None:
+        # Texts are grouped by language and profile, since profiles may use different analyzers
+        by_language: Dict[Tuple[str, Profile], List[Tuple[str, LanguageDetection, Future, Context]]] = {}
+        undetected = [(text, profile, future, ctx) for text, language, profile, future, ctx in batch if not language]
+        try:
+            detected: List[Optional[LanguageDetection]] = list(detect_languages([text for text, _, _, _ in undetected]))
+        except Exception:
+            # Fall back to one text at a time, so a bad text only fails its own future
+            logger.warning("Batched language detection failed, detecting per text", exc_info=True)
+            detected = []
+            for text, _, future, _ in undetected:
+                try:
+                    detected.append(detect_language(text))
+                except Exception as exc:
+                    _settle(future, exc=exc)
+                    detected.append(None)
+        for (text, profile, future, ctx), detection in zip(undetected, detected):
+            if detection is not None:
+                by_language.setdefault((detection.language, profile), []).append((text, detection, future, ctx))
+        for text, language, profile, future, ctx in batch:
+            if not language:
+                continue
+            try:
+                detection = detect_language(text, explicit_language=language)
+            except Exception as exc:
+                _settle(future, exc=exc)
+                continue
+            by_language.setdefault((detection.language, profile), []).append((text, detection, future, ctx))
+
+        for (lang, profile), items in by_language.items():
+            try:
+                batch_results = _analyze_language_batch(
+                    [text for text, _, _, _ in items], lang, profile, [ctx for _, _, _, ctx in items]
+                )
+            except Exception as exc:
+                for _, _, future, _ in items:
+                    _settle(future, exc=exc)
+                continue
+            for (_, detection, future, _), results in zip(items, batch_results):
+                _settle(future, (detection, results))
+
+        with self._stats_lock:
+            self._batches += 1
+            self._documents += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_batch_size": self.max_batch_size,
+                "batches": self._batches,
+                "documents": self._documents,
+                "largest_batch": self._largest_batch,
+            }
+
+
+def get_batcher() -> Optional[MicroBatcher]:
+    """Return the shared micro-batcher, or ``None`` when ``MICROBATCH_MAX_WAIT_MS`` is 0."""
+
+    global _batcher
+    if _batcher is None and MICROBATCH_MAX_WAIT_MS > 0:
+        with _registry_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(MICROBATCH_MAX_WAIT_MS, MICROBATCH_MAX_SIZE, MICROBATCH_WORKERS)
+    return _batcher
+
+
+def anonymize_results(
+    text: str,
+    results: List[RecognizerResult],
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+    profile: Optional[str] = None,
+) -> str:
+    """Apply the default policy, then the profile's, then ``policy`` to analyzed results.
+
+    Replace/mask-style policies go through the single-pass ``fast_anonymize``;
+    anything else (hash, encrypt, pseudonymize) through Presidio.
+    """
+
+    merged = {**get_default_policy(), **get_profile(profile).policy, **(policy or {})}
+    with stage_span("anonymize", entities=len(results)) as span:
+        fast = fast_anonymize(text, results, compile_policy(merged)) if FAST_ANONYMIZER else None
+        set_attributes(span, fast_path=fast is not None)
+        if fast is not None:
+            anonymized, operators = fast
+            set_attributes(span, operators=operators)
+            return anonymized
+        if _ANONYMIZER_SUPPORTS_OPERATORS:
+            out = get_anonymizer().anonymize(
+                text=text, analyzer_results=results, operators=to_operator_config(merged)
+            )
+        else:  # pragma: no cover - exercised only when running against legacy Presidio versions
+            out = get_anonymizer().anonymize(
+                text=text, analyzer_results=results, anonymizers_config=merged
+            )
+        set_attributes(span, operators=[item.operator for item in out.items])
+    return out.text
+
+
+def anonymize_text(
+    text: str,
+    language: Optional[str] = None,
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+    deadline: Optional[Deadline] = None,
+    profile: Optional[str] = None,
+) -> Tuple[LanguageDetection, str, List[RecognizerResult]]:
+    """Analyze and anonymize one text; returns detection, new text and results."""
+
+    detection, results = analyze_text(text, language, deadline, profile)
+    check_deadline(deadline, "post_validate")
+    return detection, anonymize_results(text, results, policy, profile), results
@@ -0,0 +1,146 @@
+"""Anonymization of nested JSON payloads.
+
+All string leaves are collected first, deduplicated per language and analyzed
+in one ``nlp.pipe`` pass per language; anonymized values are then written back
+into a copy of the original structure. Field-path rules can skip a leaf, mask
+it entirely, or fix its language.
+
+Paths are dotted keys; list items are addressed by index or ``*``. ``*``
+matches exactly one segment and ``**`` any number of segments, e.g.
+``user.email``, ``events.*.payload.**``.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.application.lang_detect import detect_language
+from app.application.service import analyze_texts, anonymize_results
+
+Path = Tuple[str, ...]
+
+# Languages are detected once on a sample of the leaves; short values alone are unreliable
+_DETECTION_SAMPLE_CHARS = 5000
+
+
+def _split(pattern: str) -> Path:
+    return tuple(pattern.replace("[]", ".*").strip(".").split("."))
+
+
+def _matches(pattern: Path, path: Path) -> bool:
+    if not pattern:
+        return not path
+    head = pattern[0]
+    if head == "**":
+        return any(_matches(pattern[1:], path[i:]) for i in range(len(path) + 1))
+    if not path:
+        return False
+    return (head == "*" or head == path[0]) and _matches(pattern[1:], path[1:])
+
+
+@dataclass
+class FieldRules:
+    """Per-path handling; ``skip`` wins over ``mask``, which wins over ``languages``."""
+
+    skip: List[str] = field(default_factory=list)
+    mask: List[str] = field(default_factory=list)
+    languages: Dict[str, str] = field(default_factory=dict)
+    mask_char: str = "*"
+
+    def __post_init__(self):
+        if len(self.mask_char) != 1:
+            raise ValueError("'mask_char' must be a single character")
+        self._skip = [_split(p) for p in self.skip]
+        self._mask = [_split(p) for p in self.mask]
+        self._languages = [(_split(p), lang.lower()) for p, lang in self.languages.items()]
+
+    def action(self, path: Path) -> Tuple[str, Optional[str]]:
+        """Return ``("skip" | "mask" | "analyze", language)`` for a leaf path."""
+
+        if any(_matches(p, path) for p in self._skip):
+            return "skip", None
+        if any(_matches(p, path) for p in self._mask):
+            return "mask", None
+        for pattern, lang in self._languages:
+            if _matches(pattern, path):
+                return "analyze", lang
+        return "analyze", None
+
+
+def iter_string_leaves(data: Any, path: Path = ()):
+    """Yield ``(path, value)`` for every string leaf; list indexes become path segments."""
+
+    if isinstance(data, str):
+        yield path, data
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            yield from iter_string_leaves(value, path + (str(key),))
+    elif isinstance(data, list):
+        for idx, value in enumerate(data):
+            yield from iter_string_leaves(value, path + (str(idx),))
+
+
+def _rebuild(data: Any, replace, path: Path = ()) -> Any:
+    if isinstance(data, str):
+        return replace(path, data)
+    if isinstance(data, dict):
+        return {key: _rebuild(value, replace, path + (str(key),)) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_rebuild(value, replace, path + (str(idx),)) for idx, value in enumerate(data)]
+    return data
+
+
+def anonymize_structure(
+    data: Any,
+    language: Optional[str] = None,
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+    rules: Optional[FieldRules] = None,
+    profile: Optional[str] = None,
+) -> Tuple[Any, Dict[str, int]]:
+    """Return an anonymized copy of ``data`` and leaf counters.
+
+    Raises ``ValueError`` for an unsupported language (request or rule) or an
+    unknown profile.
+    """
+
+    rules = rules or FieldRules()
+    stats = {"leaves": 0, "skipped": 0, "masked": 0, "analyzed": 0, "unique": 0, "entities": 0}
+
+    actions: Dict[Path, Tuple[str, Optional[str]]] = {}
+    pending: Dict[Optional[str], Dict[str, None]] = {}  # language -> unique values, in order
+    for path, value in iter_string_leaves(data):
+        stats["leaves"] += 1
+        action, lang = rules.action(path)
+        actions[path] = (action, lang or language)
+        if action == "analyze" and value.strip():
+            pending.setdefault(lang or language, {})[value] = None
+        elif action != "analyze":
+            stats[{"skip": "skipped", "mask": "masked"}[action]] += 1
+
+    undetected = pending.pop(None, None)
+    if undetected:
+        sample = "\n".join(undetected)[:_DETECTION_SAMPLE_CHARS]
+        detected = detect_language(sample).language
+        # Undetected values join the detected language's batch
+        pending[detected] = {**pending.get(detected, {}), **undetected}
+        for path, (action, lang) in actions.items():
+            if lang is None:
+                actions[path] = (action, detected)
+
+    replacements: Dict[Tuple[str, str], str] = {}
+    for lang, values in pending.items():
+        texts = list(values)
+        stats["unique"] += len(texts)
+        for text, (_, results) in zip(texts, analyze_texts(texts, lang, profile)):
+            stats["entities"] += len(results)
+            replacements[(lang, text)] = anonymize_results(text, results, policy, profile) if results else text
+
+    def replace(path: Path, value: str) -> str:
+        action, lang = actions[path]
+        if action == "skip":
+            return value
+        if action == "mask":
+            return rules.mask_char * len(value)
+        stats["analyzed"] += 1
+        return replacements.get((lang, value), value)
+
+    return _rebuild(data, replace), stats
@@ -1,5 +1,6 @@
 # Config placeholder
 
+import os
 from typing import Any, Dict
 
 # spaCy model configuration for Presidio
@@ -11,6 +12,148 @@ NLP_CONFIG: Dict[str, Any] = {
     ],
 }
 
+# Directory written by ``python -m app.infrastructure.snapshot``; when set, spaCy
+# pipelines and predefined recognizers are loaded from it instead of packages.
+NLP_SNAPSHOT_DIR: str = os.getenv("NLP_SNAPSHOT_DIR", "")
+
+# Regex engine used by pattern recognizers: "regex" (Presidio default), "re" or
+# "re2" (linear-time, optional). Timeouts are only enforceable with "regex".
+REGEX_ENGINE: str = os.getenv("REGEX_ENGINE", "regex")
+REGEX_TIMEOUT_MS: float = float(os.getenv("REGEX_TIMEOUT_MS", "250"))
+
+# Optional JSON/YAML file with extra recognizer definitions; reloaded via the
+# admin endpoint or, when the interval is > 0, by polling the file's mtime.
+RECOGNIZERS_FILE: str = os.getenv("RECOGNIZERS_FILE", "")
+RECOGNIZERS_WATCH_INTERVAL: float = float(os.getenv("RECOGNIZERS_WATCH_INTERVAL", "0"))
+
+# Optional JSON/YAML file with post_validate rules, added to or replacing the
+# built-in rule table by name.
+VALIDATION_RULES_FILE: str = os.getenv("VALIDATION_RULES_FILE", "")
+
+# Named profiles (JSON/YAML) with their own recognizers, post_validate settings
+# and base policy; per-profile analyzers share the NLP engine and are kept in
+# an LRU of PROFILE_ANALYZER_CACHE entries.
+PROFILES_FILE: str = os.getenv("PROFILES_FILE", "")
+PROFILE_ANALYZER_CACHE: int = int(os.getenv("PROFILE_ANALYZER_CACHE", "8"))
+
+# Token required in the X-Admin-Token header; admin endpoints are disabled if empty
+ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+# Micro-batching of concurrent /analyze and /anonymize calls into one nlp.pipe
+# per language. Disabled when the max wait is 0.
+MICROBATCH_MAX_WAIT_MS: float = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "0"))
+MICROBATCH_MAX_SIZE: int = int(os.getenv("MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_WORKERS: int = int(os.getenv("MICROBATCH_WORKERS", "2"))
+
+# Cascade NER scheduling: "off" (NER on every text), "document" or "sentence"
+# (NER only where cheap lexical signals suggest names, organizations or places).
+NER_CASCADE: str = os.getenv("NER_CASCADE", "off")
+
+# Keyed pseudonymization ("type": "pseudonymize" in a policy). Without a key the
+# pseudonyms are only stable for the lifetime of the process. VAULT_PATH enables
+# an on-disk SQLite vault; DEANONYMIZE_TOKEN guards the /deanonymize endpoint.
+PSEUDONYM_KEY: str = os.getenv("PSEUDONYM_KEY", "")
+VAULT_PATH: str = os.getenv("VAULT_PATH", "")
+VAULT_CACHE_SIZE: int = int(os.getenv("VAULT_CACHE_SIZE", "100000"))
+DEANONYMIZE_TOKEN: str = os.getenv("DEANONYMIZE_TOKEN", "")
+
+# Optional node-local cache shared by the worker processes of a host (SQLite
+# file in WAL mode, ideally on tmpfs) for analysis results and language
+# detections. Keys are BLAKE2 hashes of the inputs keyed with SHARED_CACHE_KEY, a
+# per-deployment secret; without it the cache stays off. The least recently used
+# entries are evicted above SHARED_CACHE_MAX_MB and texts above
+# SHARED_CACHE_MAX_CHARS bypass it. Clear the file when deploying changed
+# recognizer code.
+SHARED_CACHE_PATH: str = os.getenv("SHARED_CACHE_PATH", "")
+SHARED_CACHE_KEY: str = os.getenv("SHARED_CACHE_KEY", "")
+SHARED_CACHE_MAX_MB: float = float(os.getenv("SHARED_CACHE_MAX_MB", "256"))
+SHARED_CACHE_MAX_CHARS: int = int(os.getenv("SHARED_CACHE_MAX_CHARS", "20000"))
+
+# Incremental re-analysis sessions: documents kept in the LRU, their total size
+# in chars (the least recently used are evicted past either bound) and the
+# context margin (chars) re-analyzed around changed paragraphs.
+INCREMENTAL_MAX_DOCUMENTS: int = int(os.getenv("INCREMENTAL_MAX_DOCUMENTS", "1000"))
+INCREMENTAL_MAX_CHARS: int = int(os.getenv("INCREMENTAL_MAX_CHARS", "50000000"))
+INCREMENTAL_CONTEXT_CHARS: int = int(os.getenv("INCREMENTAL_CONTEXT_CHARS", "200"))
+
+# Admission control for analysis endpoints. Request cost is 1 + len(text) /
+# REQUEST_COST_CHARS units. The adaptive in-flight limit is disabled when the
+# target latency (per cost unit) is 0; per-client buckets are disabled when the
+# rate is 0.
+REQUEST_COST_CHARS: int = int(os.getenv("REQUEST_COST_CHARS", "10000"))
+OVERLOAD_TARGET_LATENCY_MS: float = float(os.getenv("OVERLOAD_TARGET_LATENCY_MS", "0"))
+OVERLOAD_INITIAL_LIMIT: float = float(os.getenv("OVERLOAD_INITIAL_LIMIT", "8"))
+OVERLOAD_MIN_LIMIT: float = float(os.getenv("OVERLOAD_MIN_LIMIT", "1"))
+OVERLOAD_MAX_LIMIT: float = float(os.getenv("OVERLOAD_MAX_LIMIT", "64"))
+RATE_LIMIT_COST_PER_SEC: float = float(os.getenv("RATE_LIMIT_COST_PER_SEC", "0"))
+RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "0"))
+
+# Per-endpoint request budgets; 0 disables a limit. Texts above max_chars are
+# rejected (413), truncated and flagged, or analyzed in max_chars chunks
+# ("reject" | "truncate" | "chunk"). max_ms is checked between pipeline stages.
+# Each value can be overridden per endpoint, e.g. ANONYMIZE_MAX_CHARS.
+def _budget(endpoint: str) -> Dict[str, Any]:
+    def env(name: str, default: str) -> str:
+        return os.getenv(f"{endpoint.upper()}_{name}", os.getenv(name, default))
+
+    return {
+        "max_chars": int(env("MAX_CHARS", "1000000")),
+        "max_entities": int(env("MAX_ENTITIES", "0")),
+        "max_ms": float(env("MAX_PROCESSING_MS", "0")),
+        "oversize_policy": env("OVERSIZE_POLICY", "reject"),
+    }
+
+
+REQUEST_BUDGETS: Dict[str, Dict[str, Any]] = {
+    endpoint: _budget(endpoint) for endpoint in ("analyze", "anonymize", "incremental")
+}
+
+# Background jobs for large documents: SQLite queue file, chunk size, result
+# expiry and worker processes spawned by the API (0 = run them separately with
+# ``python -m app.application.jobs``). Only one API process supervises the
+# workers, however many uvicorn workers share JOBS_DB. Workers are reniced by
+# JOB_WORKER_NICE so interactive requests keep priority on shared cores. A job
+# still submitting after JOB_SUBMIT_TTL_SECONDS (its submitter died) is purged.
+JOBS_DB: str = os.getenv("JOBS_DB", "/tmp/pii-jobs/jobs.sqlite3")
+JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "0"))
+JOB_CHUNK_CHARS: int = int(os.getenv("JOB_CHUNK_CHARS", "100000"))
+JOB_RESULT_TTL_SECONDS: float = float(os.getenv("JOB_RESULT_TTL_SECONDS", "86400"))
+JOB_SUBMIT_TTL_SECONDS: float = float(os.getenv("JOB_SUBMIT_TTL_SECONDS", "3600"))
+JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+JOB_WORKER_NICE: int = int(os.getenv("JOB_WORKER_NICE", "10"))
+JOB_MAX_BYTES: int = int(os.getenv("JOB_MAX_BYTES", str(1024 ** 3)))
+
+# File ingestion (/anonymize/file): units analyzed per batch, bounded by count
+# and total chars, and the maximum upload size. Emails are parsed in memory as a
+# whole, so they have their own, smaller limit (INGEST_EML_MAX_BYTES).
+INGEST_BATCH_UNITS: int = int(os.getenv("INGEST_BATCH_UNITS", "64"))
+INGEST_BATCH_CHARS: int = int(os.getenv("INGEST_BATCH_CHARS", "50000"))
+INGEST_MAX_BYTES: int = int(os.getenv("INGEST_MAX_BYTES", str(200 * 1024 ** 2)))
+INGEST_EML_MAX_BYTES: int = int(os.getenv("INGEST_EML_MAX_BYTES", str(64 * 1024 ** 2)))
+# Uncompressed size of all parts of a DOCX archive, so a zip bomb cannot get
+# past INGEST_MAX_BYTES (which only bounds the compressed upload)
+INGEST_DOCX_MAX_BYTES: int = int(os.getenv("INGEST_DOCX_MAX_BYTES", str(256 * 1024 ** 2)))
+
+# OpenTelemetry spans per pipeline stage (needs opentelemetry-sdk): "" (off),
+# "memory", "file" (JSON lines in TRACING_FILE), "console" or "otlp".
+TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE: str = os.getenv("TRACING_FILE", "/tmp/pii-traces.jsonl")
+TRACING_SERVICE_NAME: str = os.getenv("TRACING_SERVICE_NAME", "presidio-pii-server")
+
+# Logging of the app.* loggers in the HTTP server goes through a queue to a
+# background writer ("0" keeps synchronous handlers). LOG_SAMPLE_RATES
+# ("type=rate,..."; a type is a logger name or "request_summary") samples
+# INFO/DEBUG records; LOG_RATE_LIMIT caps each type at that many records/s
+# (0 = unlimited). Warnings and errors are never dropped.
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUE: bool = os.getenv("LOG_QUEUE", "1") != "0"
+LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_RATE_LIMIT: float = float(os.getenv("LOG_RATE_LIMIT", "0"))
+
+# Single-pass anonymizer for replace/mask/redact/keep policies; "0" always
+# uses the Presidio anonymizer engine.
+FAST_ANONYMIZER: bool = os.getenv("FAST_ANONYMIZER", "1") != "0"
+
 
 # Default anonymization policy (can be overridden per-request)
 DEFAULT_POLICY: Dict[str, Dict[str, Any]] = {
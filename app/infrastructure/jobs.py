@@ -0,0 +1,216 @@
+"""SQLite-backed job queue for large documents.
+
+Jobs are split into chunks at submission time; every chunk row carries its
+text and, once processed, its results. Workers claim one chunk at a time, so a
+crashed worker only loses the chunk it held and progress resumes from there.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    language TEXT,
+    policy TEXT,
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    done_chunks INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    claimed_at REAL,
+    items TEXT,
+    output TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS chunks_status ON chunks (status, job_id, idx);
+"""
+
+JOB_STATUSES = ("submitting", "queued", "running", "done", "failed")
+
+
+class JobStore:
+    """Persistent job/chunk queue in a single SQLite file (WAL mode)."""
+
+    def __init__(
+        self, path: str, result_ttl: float = 86400.0, claim_timeout: float = 600.0, submit_ttl: float = 3600.0
+    ):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.result_ttl = result_ttl
+        self.submit_ttl = submit_ttl
+        self.claim_timeout = claim_timeout
+        self._local = threading.local()
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def create(self, kind: str, language: Optional[str], policy: Optional[Dict[str, Any]]) -> str:
+        """Insert a job in ``submitting`` state.
+
+        It expires after ``submit_ttl`` unless sealed, so a submitter that dies
+        midway does not leave the job and its chunks behind forever.
+        """
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO jobs (id, kind, status, language, policy, created, updated, expires_at) "
+                "VALUES (?, ?, 'submitting', ?, ?, ?, ?, ?)",
+                (job_id, kind, language, json.dumps(policy) if policy else None, now, now, now + self.submit_ttl),
+            )
+        return job_id
+
+    def add_chunks(self, job_id: str, chunks: Iterable[Tuple[int, str]], start_idx: int = 0) -> int:
+        rows = [(job_id, start_idx + i, offset, text) for i, (offset, text) in enumerate(chunks)]
+        with self._tx() as db:
+            db.executemany("INSERT INTO chunks (job_id, idx, offset, text) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def seal(self, job_id: str, total_chunks: int) -> None:
+        """Mark a job as fully submitted so workers may pick it up."""
+
+        with self._tx() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'queued', total_chunks = ?, updated = ?, expires_at = NULL WHERE id = ?",
+                (total_chunks, time.time(), job_id),
+            )
+
+    def claim_chunk(self) -> Optional[sqlite3.Row]:
+        """Claim the oldest pending chunk of a sealed job, reclaiming stale ones."""
+
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT c.job_id, c.idx, c.offset, c.text, j.kind, j.language, j.policy "
+                "FROM chunks c JOIN jobs j ON j.id = c.job_id "
+                "WHERE j.status IN ('queued', 'running') "
+                "AND (c.status = 'queued' OR (c.status = 'running' AND c.claimed_at < ?)) "
+                "ORDER BY j.created, c.idx LIMIT 1",
+                (now - self.claim_timeout,),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE chunks SET status = 'running', claimed_at = ? WHERE job_id = ? AND idx = ?",
+                (now, row["job_id"], row["idx"]),
+            )
+            db.execute(
+                "UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'queued'",
+                (now, row["job_id"]),
+            )
+        return row
+
+    def neighbours(self, job_id: str, idx: int) -> Tuple[str, str]:
+        """Texts of the chunks before and after ``idx`` (empty at the document edges)."""
+
+        rows = self._db().execute(
+            "SELECT idx, text FROM chunks WHERE job_id = ? AND idx IN (?, ?)", (job_id, idx - 1, idx + 1)
+        ).fetchall()
+        texts = {row["idx"]: row["text"] for row in rows}
+        return texts.get(idx - 1, ""), texts.get(idx + 1, "")
+
+    def complete_chunk(self, job_id: str, idx: int, items: List[Dict[str, Any]], output: Optional[str]) -> None:
+        now = time.time()
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE chunks SET status = 'done', items = ?, output = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'running'",
+                (json.dumps(items), output, job_id, idx),
+            )
+            if cur.rowcount == 0:  # reclaimed by another worker that finished first
+                return
+            db.execute(
+                "UPDATE jobs SET done_chunks = done_chunks + 1, updated = ?, "
+                "status = CASE WHEN done_chunks + 1 >= total_chunks THEN 'done' ELSE status END, "
+                "expires_at = CASE WHEN done_chunks + 1 >= total_chunks THEN ? ELSE expires_at END "
+                "WHERE id = ?",
+                (now, now + self.result_ttl, job_id),
+            )
+            # Chunk texts serve as context for their neighbours until the whole job is done
+            db.execute(
+                "UPDATE chunks SET text = '' WHERE job_id = ? "
+                "AND (SELECT status FROM jobs WHERE id = ?) = 'done'",
+                (job_id, job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated = ?, expires_at = ? WHERE id = ?",
+                (error, now, now + self.result_ttl, job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db().execute(
+            "SELECT id, kind, status, language, total_chunks, done_chunks, error, created, updated, "
+            "expires_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def iter_results(self, job_id: str) -> Iterator[sqlite3.Row]:
+        """Yield finished chunks in order, one row at a time."""
+
+        idx = 0
+        while True:
+            row = self._db().execute(
+                "SELECT idx, offset, items, output FROM chunks WHERE job_id = ? AND idx = ?",
+                (job_id, idx),
+            ).fetchone()
+            if row is None:
+                return
+            yield row
+            idx += 1
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._tx() as db:
+            expired = [r[0] for r in db.execute(
+                "SELECT id FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            )]
+            for job_id in expired:
+                db.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
@@ -0,0 +1,211 @@
+"""Non-blocking, sampled logging for the request path.
+
+``init_logging`` routes the ``app.*`` loggers through a bounded queue to a
+``QueueListener`` thread that formats and writes the records, so a request
+only pays for creating a record. Records are enqueued unformatted.
+
+INFO/DEBUG records are sampled and rate-limited per type (the logger name, or
+``log_type`` passed in ``extra``) by ``LOG_SAMPLE_RATES`` and
+``LOG_RATE_LIMIT``; warnings and errors always pass. When the queue is full,
+INFO/DEBUG records are dropped and counted, while warnings and errors are
+written synchronously by the calling thread instead. Each ``/analyze`` and
+``/anonymize`` call emits one ``request_summary`` record with timings,
+detection method and entity counts. Summaries never contain document text.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple, Union
+
+from app.config import LOG_LEVEL, LOG_QUEUE, LOG_RATE_LIMIT, LOG_SAMPLE_RATES
+
+SUMMARY_TYPE = "request_summary"
+_QUEUE_SIZE = 10000
+
+summary_logger = logging.getLogger("app.requests")
+
+_listener: Optional[QueueListener] = None
+_queue: Optional["queue.Queue[logging.LogRecord]"] = None
+_handler: Optional["_DeferredQueueHandler"] = None
+_init_lock = threading.Lock()
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse ``"type=rate,..."``; raises ``ValueError`` for malformed entries."""
+
+    rates: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, sep, value = item.partition("=")
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = -1.0
+        if not sep or not kind or not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Invalid LOG_SAMPLE_RATES entry '{item}', expected type=rate with rate in [0, 1]")
+        rates[kind.strip()] = rate
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Drop a share of INFO/DEBUG records and cap each type at ``rate_limit`` records/s."""
+
+    def __init__(self, rates: Mapping[str, float], rate_limit: float = 0.0):
+        super().__init__()
+        self.rates = dict(rates)
+        self.rate_limit = rate_limit
+        self.sampled_out: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        kind = getattr(record, "log_type", record.name)
+        rate = self.rates.get(kind, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            with self._lock:
+                self.sampled_out[kind] += 1
+            return False
+        if self.rate_limit <= 0:
+            return True
+
+        # Rates below 1/s still need room for one whole token
+        capacity = max(1.0, self.rate_limit)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(kind, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * self.rate_limit)
+            if tokens < 1.0:
+                self._buckets[kind] = (tokens, now)
+                self.rate_limited[kind] += 1
+                return False
+            self._buckets[kind] = (tokens - 1.0, now)
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is; message formatting happens on the listener thread.
+
+    ``fallback`` handlers write warnings and errors directly when the queue is full.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]", fallback: Sequence[logging.Handler] = ()):
+        super().__init__(log_queue)
+        self.fallback = list(fallback)
+        self.dropped = 0
+        self.written_directly = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING or not self.fallback:
+                self.dropped += 1
+                return
+            self.written_directly += 1
+            for handler in self.fallback:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+
+def init_logging(handlers: Optional[Iterable[logging.Handler]] = None) -> bool:
+    """Route ``app.*`` logging through the queue once; returns whether it is active.
+
+    ``handlers`` default to the root logger's handlers, or stderr if it has none.
+    """
+
+    global _listener, _queue, _handler
+    if _listener is not None or not LOG_QUEUE:
+        return _listener is not None
+    with _init_lock:
+        if _listener is None:
+            targets = list(handlers) if handlers is not None else list(logging.getLogger().handlers)
+            if not targets:
+                stream = logging.StreamHandler(sys.stderr)
+                stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+                targets = [stream]
+            _queue = queue.Queue(_QUEUE_SIZE)
+            _handler = _DeferredQueueHandler(_queue, fallback=targets)
+            _handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES), LOG_RATE_LIMIT))
+            _listener = QueueListener(_queue, *targets, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+            app_logger = logging.getLogger("app")
+            app_logger.addHandler(_handler)
+            app_logger.setLevel(LOG_LEVEL.upper())
+            # The listener writes to the root handlers itself
+            app_logger.propagate = False
+    return True
+
+
+def flush_logs() -> None:
+    """Block until the writer thread has handled every queued record."""
+
+    if _queue is not None:
+        _queue.join()
+
+
+class _Summary(dict):
+    """Serialized to JSON only when the writer thread formats the record."""
+
+    def __str__(self) -> str:
+        return json.dumps(self, ensure_ascii=False, sort_keys=True)
+
+
+def log_request(
+    endpoint: str,
+    detection: Any,
+    results: Union[Sequence[Any], Mapping[str, int]],
+    timings: Mapping[str, float],
+    **fields: Any,
+) -> None:
+    """Emit the request's ``request_summary`` record; ``timings`` are in seconds.
+
+    ``results`` are recognizer results or, for endpoints that only keep
+    totals, counts by entity type; ``detection`` may be ``None`` when nothing
+    was analyzed. Only counts, timings and metadata are logged, never the
+    analyzed text.
+    """
+
+    if not summary_logger.isEnabledFor(logging.INFO):
+        return
+    entities = dict(results) if isinstance(results, Mapping) else dict(Counter(r.entity_type for r in results))
+    summary = _Summary(
+        endpoint=endpoint,
+        language=getattr(detection, "language", None),
+        language_method=getattr(detection, "method", None),
+        confidence=getattr(detection, "confidence", None),
+        entities=entities,
+        entity_total=sum(entities.values()),
+        timings_ms={name: round(value * 1000, 2) for name, value in timings.items()},
+        **{k: v for k, v in fields.items() if v is not None},
+    )
+    summary_logger.info("%s %s", SUMMARY_TYPE, summary, extra={"log_type": SUMMARY_TYPE, "summary": summary})
+
+
+def logging_status() -> Dict[str, Any]:
+    if _handler is None or _queue is None:
+        return {"queue": False}
+    sampling = next(f for f in _handler.filters if isinstance(f, SamplingFilter))
+    return {
+        "queue": True,
+        "pending": _queue.qsize(),
+        "dropped_queue_full": _handler.dropped,
+        "written_directly": _handler.written_directly,
+        "sampled_out": dict(sampling.sampled_out),
+        "rate_limited": dict(sampling.rate_limited),
+    }
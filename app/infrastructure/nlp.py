@@ -48,6 +48,16 @@ def create_nlp_engine() -> NlpEngine:
         return engine
 
 
+def mark_initialized(fallback_reason: Optional[str] = None) -> None:
+    """Record an engine created outside ``create_nlp_engine`` (e.g. from a snapshot)."""
+
+    global INITIALIZED, FALLBACK_USED, FALLBACK_REASON
+    INITIALIZED = True
+    if fallback_reason:
+        FALLBACK_USED = True
+        FALLBACK_REASON = fallback_reason
+
+
 def nlp_status() -> dict:
     """Return runtime status for the NLP engine/fallbacks."""
 
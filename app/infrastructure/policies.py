@@ -1,11 +1,17 @@
 # Policies placeholder
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import copy
+from functools import partial
 
-from presidio_anonymizer.entities import OperatorConfig
+from presidio_anonymizer.entities import InvalidParamException, OperatorConfig
+from presidio_anonymizer.operators import OperatorsFactory, OperatorType
 
 from app.config import DEFAULT_POLICY
+from app.infrastructure.vault import PREFIX_RE, get_vault
+
+# Service-level operator: keyed HMAC pseudonym recorded in the token vault
+PSEUDONYMIZE = "pseudonymize"
 
 
 def get_default_policy() -> Dict[str, Dict[str, Any]]:
@@ -13,6 +19,52 @@ def get_default_policy() -> Dict[str, Dict[str, Any]]:
     return copy.deepcopy(DEFAULT_POLICY)
 
 
+def split_policy_entry(name: str, cfg: Any) -> Tuple[str, Dict[str, Any]]:
+    """Return ``(operator type, params)`` for one policy entry, validating its shape."""
+
+    if not isinstance(cfg, dict):
+        raise TypeError(f"Policy config for '{name}' must be a dict, got {type(cfg)!r}")
+
+    params = dict(cfg)  # shallow copy so we can pop "type"
+    operator_type = params.pop("type", None)
+    if not operator_type:
+        raise ValueError(f"Policy config for '{name}' must include a 'type' field")
+    if operator_type == PSEUDONYMIZE:
+        pseudonym_prefix(name, params)
+    return operator_type, params
+
+
+def pseudonym_prefix(name: str, params: Dict[str, Any]) -> str:
+    """Return the token prefix of a ``pseudonymize`` entry; raises ``ValueError`` if it is invalid."""
+
+    prefix = params.get("prefix") or (name.upper() if name != "default" else "PII")
+    if not isinstance(prefix, str) or not PREFIX_RE.fullmatch(prefix):
+        raise ValueError(
+            f"Pseudonym prefix {prefix!r} for '{name}' must match [A-Z][A-Z0-9_]*, "
+            "otherwise its tokens cannot be deanonymized"
+        )
+    return prefix
+
+
+def validate_policy(policy: Any) -> None:
+    """Raise ``ValueError`` unless every entry names a known operator with valid params.
+
+    For callers that apply the policy later (background jobs), so a bad policy is
+    rejected when it is submitted rather than failing the work afterwards.
+    """
+
+    if not isinstance(policy, dict):
+        raise ValueError("Policy must be a JSON object")
+    factory = OperatorsFactory()
+    for name, cfg in policy.items():
+        try:
+            operator_type, params = split_policy_entry(name, cfg)
+            if operator_type != PSEUDONYMIZE:
+                factory.create_operator_class(operator_type, OperatorType.Anonymize).validate(params)
+        except (TypeError, InvalidParamException) as exc:
+            raise ValueError(f"Invalid policy entry '{name}': {exc}") from exc
+
+
 def to_operator_config(policy: Dict[str, Dict[str, Any]]) -> Dict[str, OperatorConfig]:
     """Convert a policy mapping to Presidio anonymizer operator configs.
 
@@ -21,18 +73,49 @@ def to_operator_config(policy: Dict[str, Dict[str, Any]]) -> Dict[str, OperatorC
     the deprecated ``anonymizers_config`` argument. Upgrading to the new API requires
     transforming the user/configured policy dictionaries into ``OperatorConfig``
     objects while keeping the remaining parameters intact.
+
+    ``pseudonymize`` entries (optional ``prefix``, defaulting to the entity name)
+    become Presidio ``custom`` operators backed by the token vault.
     """
 
     operators: Dict[str, OperatorConfig] = {}
     for name, cfg in policy.items():
-        if not isinstance(cfg, dict):
-            raise TypeError(f"Policy config for '{name}' must be a dict, got {type(cfg)!r}")
+        operator_type, params = split_policy_entry(name, cfg)
 
-        params = dict(cfg)  # shallow copy so we can pop "type"
-        operator_type = params.pop("type", None)
-        if not operator_type:
-            raise ValueError(f"Policy config for '{name}' must include a 'type' field")
+        if operator_type == PSEUDONYMIZE:
+            prefix = pseudonym_prefix(name, params)
+            operators[name] = OperatorConfig(
+                operator_name="custom",
+                params={"lambda": partial(get_vault().pseudonymize, prefix=prefix)},
+            )
+            continue
 
         operators[name] = OperatorConfig(operator_name=operator_type, params=params)
 
     return operators
+
+
+def _uniform_policy(cfg: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Presidio falls back to the upper-case "DEFAULT" operator for unlisted entities
+    entities = [name for name in DEFAULT_POLICY if name != "default"] + ["DEFAULT"]
+    return {name: dict(cfg) for name in entities}
+
+
+# Policies selectable by name (CLI ``--policy``); applied on top of the default one
+NAMED_POLICIES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "default": {},
+    "redact": _uniform_policy({"type": "redact"}),
+    "mask": _uniform_policy({"type": "mask", "chars_to_mask": 100, "from_end": False, "masking_char": "*"}),
+    "pseudonymize": {
+        **_uniform_policy({"type": PSEUDONYMIZE}),
+        "DEFAULT": {"type": PSEUDONYMIZE, "prefix": "PII"},
+    },
+}
+
+
+def get_named_policy(name: str) -> Dict[str, Dict[str, Any]]:
+    """Return a copy of a named policy; raises ``ValueError`` for unknown names."""
+
+    if name not in NAMED_POLICIES:
+        raise ValueError(f"Unknown policy '{name}'. Use one of {sorted(NAMED_POLICIES)}")
+    return copy.deepcopy(NAMED_POLICIES[name])
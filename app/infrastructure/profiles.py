@@ -0,0 +1,168 @@
+"""Named analysis profiles for teams sharing one deployment.
+
+A profile selects the recognizers to run, tunes ``post_validate`` and sets the
+base anonymization policy. Profiles come from ``PROFILES_FILE`` (JSON, or
+YAML with PyYAML installed)::
+
+    {"profiles": {
+        "payments": {
+            "entities": ["CREDIT_CARD", "RU_RS", "RU_KS", "RU_BIK", "PERSON"],
+            "min_ml_score": 0.7,
+            "disabled_rules": ["phone_context"],
+            "policy": {"PERSON": {"type": "mask", "chars_to_mask": 100, "from_end": false, "masking_char": "*"}}
+        }
+    }}
+
+``entities`` and ``recognizers`` (recognizer names) are optional filters;
+``drop_entities`` lists types removed after analysis (default
+``US_DRIVER_LICENSE``). The ``default`` profile reproduces the service's
+behaviour without profiles and may itself be overridden in the file.
+"""
+
+import importlib.util
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from app.config import PROFILES_FILE
+from app.infrastructure.policies import split_policy_entry
+from app.infrastructure.validation_rules import rule_names
+
+DEFAULT_PROFILE_NAME = "default"
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    entities: Optional[FrozenSet[str]] = None
+    recognizers: Optional[FrozenSet[str]] = None
+    min_ml_score: float = 0.55
+    drop_entities: FrozenSet[str] = frozenset({"US_DRIVER_LICENSE"})
+    disabled_rules: FrozenSet[str] = frozenset()
+    policy: Dict[str, Dict[str, Any]] = field(default_factory=dict, compare=False, hash=False)
+
+    @property
+    def filters_recognizers(self) -> bool:
+        return self.entities is not None or self.recognizers is not None
+
+
+DEFAULT_PROFILE = Profile(DEFAULT_PROFILE_NAME)
+
+_profiles: Optional[Dict[str, Profile]] = None
+_profiles_lock = threading.Lock()
+
+
+def _names(spec: Dict[str, Any], key: str, profile: str) -> Optional[FrozenSet[str]]:
+    value = spec.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"Profile '{profile}': '{key}' must be a list of strings")
+    return frozenset(value)
+
+
+def parse_profile(name: str, spec: Any) -> Profile:
+    """Build a ``Profile`` from its file entry; raises ``ValueError`` when invalid."""
+
+    if not isinstance(spec, dict):
+        raise ValueError(f"Profile '{name}' must be a mapping")
+    unknown = set(spec) - {"entities", "recognizers", "min_ml_score", "drop_entities", "disabled_rules", "policy"}
+    if unknown:
+        raise ValueError(f"Profile '{name}' has unknown keys: {sorted(unknown)}")
+
+    disabled = _names(spec, "disabled_rules", name) or frozenset()
+    known = rule_names()
+    if disabled - known:
+        raise ValueError(
+            f"Profile '{name}' disables unknown rules {sorted(disabled - known)}. Available: {sorted(known)}"
+        )
+    policy = spec.get("policy") or {}
+    if not isinstance(policy, dict):
+        raise ValueError(f"Profile '{name}': 'policy' must be a mapping")
+    for entity, cfg in policy.items():
+        try:
+            split_policy_entry(entity, cfg)
+        except TypeError as exc:
+            raise ValueError(f"Profile '{name}': {exc}") from exc
+    try:
+        min_ml_score = float(spec.get("min_ml_score", DEFAULT_PROFILE.min_ml_score))
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Profile '{name}': 'min_ml_score' must be a number") from exc
+
+    drop_entities = _names(spec, "drop_entities", name)
+    return Profile(
+        name=name,
+        entities=_names(spec, "entities", name),
+        recognizers=_names(spec, "recognizers", name),
+        min_ml_score=min_ml_score,
+        drop_entities=DEFAULT_PROFILE.drop_entities if drop_entities is None else drop_entities,
+        disabled_rules=disabled,
+        policy=policy,
+    )
+
+
+def load_profiles(path: str) -> Dict[str, Profile]:
+    """Read ``path`` into profiles by name; the default profile is always present."""
+
+    profiles = {DEFAULT_PROFILE_NAME: DEFAULT_PROFILE}
+    if not path:
+        return profiles
+    if not os.path.exists(path):
+        raise ValueError(f"Profiles file '{path}' does not exist")
+    with open(path, "r", encoding="utf-8") as fh:
+        raw = fh.read()
+    if path.endswith((".yaml", ".yml")):
+        if importlib.util.find_spec("yaml") is None:
+            raise ValueError(f"Profiles file '{path}' is YAML but PyYAML is not installed")
+        yaml = importlib.import_module("yaml")
+        try:
+            data = yaml.safe_load(raw)  # type: ignore
+        except yaml.YAMLError as exc:  # type: ignore
+            raise ValueError(f"Profiles file '{path}' is not valid YAML: {exc}") from exc
+    else:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Profiles file '{path}' is not valid JSON: {exc}") from exc
+
+    if not isinstance(data, dict) or not isinstance(data.get("profiles"), dict):
+        raise ValueError(f"Profiles file '{path}' must contain a 'profiles' mapping")
+    for name, spec in data["profiles"].items():
+        profiles[name] = parse_profile(name, spec)
+    return profiles
+
+
+def get_profile(name: Optional[str] = None) -> Profile:
+    """Return a profile by name (``None`` means default); raises ``ValueError`` if unknown."""
+
+    global _profiles
+    if _profiles is None:
+        with _profiles_lock:
+            if _profiles is None:
+                _profiles = load_profiles(PROFILES_FILE)
+    profile = _profiles.get(name or DEFAULT_PROFILE_NAME)
+    if profile is None:
+        raise ValueError(f"Unknown profile '{name}'. Available: {sorted(_profiles)}")
+    return profile
+
+
+def reload_profiles(path: Optional[str] = None) -> Dict[str, Profile]:
+    """Re-read the profiles file and swap it in; the old profiles stay on error."""
+
+    global _profiles
+    profiles = load_profiles(PROFILES_FILE if path is None else path)
+    with _profiles_lock:
+        _profiles = profiles
+    return profiles
+
+
+def profile_names() -> List[str]:
+    """Names of the loaded profiles; only the default one if the file is invalid."""
+
+    try:
+        get_profile()
+    except ValueError:
+        return [DEFAULT_PROFILE_NAME]
+    return sorted(_profiles or {})
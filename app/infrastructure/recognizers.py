@@ -1,9 +1,220 @@
 # Recognizers placeholder
-from typing import List
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-from presidio_analyzer import Pattern, PatternRecognizer
+import regex
+from presidio_analyzer import EntityRecognizer, Pattern, PatternRecognizer, RecognizerResult
 
+from app.config import REGEX_ENGINE, REGEX_TIMEOUT_MS
 from app.domain import entities as E
+from app.domain.validators import (
+    bik_ok,
+    inn_checksum_ok,
+    luhn_ok,
+    ogrn_checksum_ok,
+    snils_checksum_ok,
+)
+
+logger = logging.getLogger(__name__)
+
+REGEX_ENGINES = ("regex", "re", "re2")
+
+_regex_lock = threading.Lock()
+_regex_timeouts: Counter = Counter()
+_regex_overruns: Counter = Counter()
+_regex_fallbacks: Counter = Counter()
+# Patterns that timed out in the current analysis, see ``track_regex_timeouts``
+_timed_out: ContextVar[Optional[List[str]]] = ContextVar("regex_timed_out", default=None)
+
+
+def _load_re2():
+    """Return the optional linear-time ``re2`` module, or ``None``."""
+
+    if importlib.util.find_spec("re2") is None:
+        return None
+    return importlib.import_module("re2")  # type: ignore
+
+
+def _inline_flags(flags: int) -> str:
+    """Translate ``re``-style flags into an inline group understood by every engine."""
+
+    inline = ""
+    if flags & re.IGNORECASE:
+        inline += "i"
+    if flags & re.MULTILINE:
+        inline += "m"
+    if flags & re.DOTALL:
+        inline += "s"
+    return f"(?{inline})" if inline else ""
+
+
+@contextmanager
+def track_regex_timeouts() -> Iterator[List[str]]:
+    """Collect the names of patterns that time out inside the block.
+
+    A timed-out pattern returns only the matches found so far, so callers use
+    this to avoid caching such incomplete results.
+    """
+
+    timed_out: List[str] = []
+    token = _timed_out.set(timed_out)
+    try:
+        yield timed_out
+    finally:
+        _timed_out.reset(token)
+
+
+def regex_stats() -> Dict[str, Any]:
+    """Return regex engine configuration and timeout counters per pattern."""
+
+    with _regex_lock:
+        return {
+            "engine": REGEX_ENGINE,
+            "timeout_ms": REGEX_TIMEOUT_MS,
+            "timeouts": dict(_regex_timeouts),
+            "overruns": dict(_regex_overruns),
+            "fallbacks": dict(_regex_fallbacks),
+        }
+
+
+class GuardedPatternRecognizer(PatternRecognizer):
+    """``PatternRecognizer`` with precompiled patterns and per-pattern timeouts.
+
+    Patterns are compiled once per flag set with the selected engine. With the
+    ``regex`` engine a pattern that exceeds ``timeout_ms`` is aborted and counted
+    instead of hanging the worker; ``re`` cannot be interrupted, so slow runs are
+    only counted as overruns. ``re2`` runs in linear time; patterns it cannot
+    compile (lookarounds) fall back to ``regex``.
+    """
+
+    def __init__(
+        self,
+        *args,
+        engine: Optional[str] = None,
+        timeout_ms: Optional[float] = None,
+        validator: Optional[Callable[[str], bool]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.validator = validator
+        self.engine = (engine or REGEX_ENGINE).lower()
+        if self.engine not in REGEX_ENGINES:
+            raise ValueError(f"Unsupported regex engine '{self.engine}'. Use one of {REGEX_ENGINES}")
+        if self.engine == "re2" and _load_re2() is None:
+            logger.info("REGEX_ENGINE=re2 but re2 is not installed; using regex")
+            self.engine = "regex"
+        self.timeout_ms = REGEX_TIMEOUT_MS if timeout_ms is None else timeout_ms
+        self._compiled: Dict[int, List[Tuple[Pattern, Any, str]]] = {}
+
+    def validate_result(self, pattern_text: str) -> Optional[bool]:
+        if self.validator is None:
+            return None
+        return bool(self.validator(pattern_text))
+
+    def _compile(self, pattern: Pattern, flags: int) -> Tuple[Any, str]:
+        if self.engine == "re2":
+            try:
+                return _load_re2().compile(_inline_flags(flags) + pattern.regex), "re2"
+            except Exception:
+                with _regex_lock:
+                    _regex_fallbacks[pattern.name] += 1
+                logger.debug("Pattern %s is not supported by re2; using regex", pattern.name)
+        if self.engine == "re":
+            try:
+                return re.compile(pattern.regex, flags), "re"
+            except re.error:
+                with _regex_lock:
+                    _regex_fallbacks[pattern.name] += 1
+        return regex.compile(pattern.regex, flags), "regex"
+
+    def _compiled_patterns(self, flags: int) -> List[Tuple[Pattern, Any, str]]:
+        compiled = self._compiled.get(flags)
+        if compiled is None:
+            compiled = [(p, *self._compile(p, flags)) for p in self.patterns]
+            self._compiled[flags] = compiled
+        return compiled
+
+    def _find_spans(
+        self, pattern: Pattern, compiled: Any, engine: str, text: str
+    ) -> List[Tuple[int, int]]:
+        timeout = self.timeout_ms / 1000.0 if self.timeout_ms else None
+        spans: List[Tuple[int, int]] = []
+        started = time.perf_counter()
+        try:
+            if engine == "regex" and timeout:
+                matches = compiled.finditer(text, timeout=timeout)
+            else:
+                matches = compiled.finditer(text)
+            for match in matches:
+                spans.append(match.span())
+        except TimeoutError:
+            with _regex_lock:
+                _regex_timeouts[pattern.name] += 1
+            tracker = _timed_out.get()
+            if tracker is not None:
+                tracker.append(pattern.name)
+            logger.warning(
+                "Pattern %s timed out after %.0f ms on %d chars; keeping %d matches",
+                pattern.name, self.timeout_ms, len(text), len(spans),
+            )
+            return spans
+
+        if timeout and (time.perf_counter() - started) > timeout:
+            with _regex_lock:
+                _regex_overruns[pattern.name] += 1
+        return spans
+
+    def analyze(
+        self,
+        text: str,
+        entities: List[str],
+        nlp_artifacts=None,
+        regex_flags: Optional[int] = None,
+    ) -> List[RecognizerResult]:
+        flags = int((regex_flags if regex_flags else self.global_regex_flags) or 0)
+        results: List[RecognizerResult] = []
+        for pattern, compiled, engine in self._compiled_patterns(flags):
+            for start, end in self._find_spans(pattern, compiled, engine, text):
+                current_match = text[start:end]
+                if current_match == "":
+                    continue
+
+                validation_result = self.validate_result(current_match)
+                description = self.build_regex_explanation(
+                    self.name, pattern.name, pattern.regex, pattern.score, validation_result, flags
+                )
+                result = RecognizerResult(
+                    entity_type=self.supported_entities[0],
+                    start=start,
+                    end=end,
+                    score=pattern.score,
+                    analysis_explanation=description,
+                    recognition_metadata={
+                        RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                        RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                    },
+                )
+                if validation_result is not None:
+                    result.score = (
+                        EntityRecognizer.MAX_SCORE if validation_result else EntityRecognizer.MIN_SCORE
+                    )
+                if self.invalidate_result(current_match):
+                    result.score = EntityRecognizer.MIN_SCORE
+
+                if result.score > EntityRecognizer.MIN_SCORE:
+                    results.append(result)
+                description.score = result.score
+
+        return EntityRecognizer.remove_duplicates(results)
 
 _SURNAME_SUFFIXES = (
     "ов",
@@ -71,7 +282,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     # Passport (series 4 digits + number 6 digits)
     passport_context = ["паспорт", "passport", "серия", "номер", "number"]
     for lang in ("ru", "en"):
-        recs.append(PatternRecognizer(
+        recs.append(GuardedPatternRecognizer(
             supported_entity=E.RU_PASSPORT,
             patterns=[Pattern("russian_passport", r"\b\d{2}\s?\d{2}\s?\d{6}\b", 0.3)],
             context=passport_context,
@@ -79,7 +290,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
         ))
 
     # Russian full name (ФИО)
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.PERSON,
         patterns=[
             Pattern("ru_fio_three", _RU_FIO_THREE, 0.9),
@@ -98,7 +309,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     ))
 
     # SNILS
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_SNILS,
         patterns=[
             Pattern("snils_hyphen", r"\b\d{3}-\d{3}-\d{3}\s?\d{2}\b", 0.2),
@@ -109,7 +320,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     ))
 
     # INN
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_INN,
         patterns=[Pattern("inn_10_12", r"(?<!\d)(?:\d{10}|\d{12})(?!\d)", 0.2)],
         context=["инн"],
@@ -117,13 +328,13 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     ))
 
     # OGRN/OGRNIP
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_OGRN,
         patterns=[Pattern("ogrn_13", r"(?<!\d)\d{13}(?!\d)", 0.15)],
         context=["огрн"],
         supported_language="ru",
     ))
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_OGRNIP,
         patterns=[Pattern("ogrnip_15", r"(?<!\d)\d{15}(?!\d)", 0.15)],
         context=["огрнип"],
@@ -145,7 +356,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     ]
     for lang in ("ru", "en"):
         recs.append(
-            PatternRecognizer(
+            GuardedPatternRecognizer(
                 supported_entity=E.PHONE_RU,
                 patterns=phone_ru_patterns,
                 context=["тел", "моб", "телефон", "phone", "tel"],
@@ -161,7 +372,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     )
     for lang in ("ru", "en"):
         recs.append(
-            PatternRecognizer(
+            GuardedPatternRecognizer(
                 supported_entity=E.EMAIL,
                 patterns=[email_pattern],
                 context=["email", "e-mail", "почта"],
@@ -173,7 +384,7 @@ def build_ru_critical_recognizers() -> List[PatternRecognizer]:
     card_pattern = Pattern("card_pan", r"\b(?:\d[ -]?){13,19}\b", 0.1)
     for lang in ("ru", "en"):
         recs.append(
-            PatternRecognizer(
+            GuardedPatternRecognizer(
                 supported_entity=E.CARD,
                 patterns=[card_pattern],
                 context=["card", "карта", "visa", "mastercard"],
@@ -197,7 +408,7 @@ def build_generic_recognizers() -> List[PatternRecognizer]:
 
     for lang in ("en", "ru"):
         recs.append(
-            PatternRecognizer(
+            GuardedPatternRecognizer(
                 supported_entity=E.PHONE,
                 patterns=[phone_generic],
                 context=["phone", "tel", "mobile", "cell", "тел", "телефон", "моб"],
@@ -212,7 +423,7 @@ def build_ru_bank_recognizers() -> List[PatternRecognizer]:
     recs: List[PatternRecognizer] = []
 
     # BIK (9 digits)
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_BIK,
         patterns=[Pattern("bik_9", r"(?<![0-9])[0-9]{9}(?![0-9])", 0.1)],
         context=["бик"],
@@ -220,7 +431,7 @@ def build_ru_bank_recognizers() -> List[PatternRecognizer]:
     ))
 
     # r/s (settlement account, 20 digits)
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_RS,
         patterns=[Pattern("rs_20", r"(?<![0-9])[0-9]{20}(?![0-9])", 0.05)],
         context=["р/с", "расчет", "расчёт", "счет", "счёт"],
@@ -228,7 +439,7 @@ def build_ru_bank_recognizers() -> List[PatternRecognizer]:
     ))
 
     # k/s (correspondent account, 20 digits)
-    recs.append(PatternRecognizer(
+    recs.append(GuardedPatternRecognizer(
         supported_entity=E.RU_KS,
         patterns=[Pattern("ks_20", r"(?<![0-9])[0-9]{20}(?![0-9])", 0.05)],
         context=["к/с", "корр", "корреспондентский"],
@@ -236,3 +447,96 @@ def build_ru_bank_recognizers() -> List[PatternRecognizer]:
     ))
 
     return recs
+
+
+# Validators that recognizer definition files may reference by name
+VALIDATORS: Dict[str, Callable[[str], bool]] = {
+    "luhn": luhn_ok,
+    "snils": snils_checksum_ok,
+    "inn": inn_checksum_ok,
+    "ogrn": ogrn_checksum_ok,
+    "bik": bik_ok,
+}
+
+
+def _read_definitions(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        raw = fh.read()
+
+    if path.endswith((".yaml", ".yml")):
+        if importlib.util.find_spec("yaml") is None:
+            raise ValueError(f"Recognizer file '{path}' is YAML but PyYAML is not installed")
+        yaml = importlib.import_module("yaml")
+        try:
+            data = yaml.safe_load(raw)  # type: ignore
+        except yaml.YAMLError as exc:  # type: ignore
+            raise ValueError(f"Recognizer file '{path}' is not valid YAML: {exc}") from exc
+    else:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Recognizer file '{path}' is not valid JSON: {exc}") from exc
+
+    if isinstance(data, list):
+        data = {"recognizers": data}
+    if not isinstance(data, dict) or not isinstance(data.get("recognizers", []), list):
+        raise ValueError(f"Recognizer file '{path}' must contain a 'recognizers' list")
+    return data
+
+
+def load_recognizer_definitions(path: str) -> Tuple[List[PatternRecognizer], Set[str]]:
+    """Build recognizers from a JSON/YAML definition file.
+
+    Returns the recognizers plus the entity types whose built-in recognizers they
+    replace (entries with ``replace: true``).
+    """
+
+    if not os.path.exists(path):
+        raise ValueError(f"Recognizer file '{path}' does not exist")
+
+    recs: List[PatternRecognizer] = []
+    replaced: Set[str] = set()
+    for idx, spec in enumerate(_read_definitions(path).get("recognizers", [])):
+        if not isinstance(spec, dict) or not spec.get("entity"):
+            raise ValueError(f"Recognizer #{idx} in '{path}' must be a mapping with an 'entity'")
+        entity = spec["entity"]
+
+        try:
+            patterns = [
+                Pattern(p["name"], p["regex"], float(p.get("score", 0.5)))
+                for p in spec.get("patterns", [])
+            ]
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Recognizer '{entity}' has an invalid pattern: {exc}") from exc
+        if not patterns:
+            raise ValueError(f"Recognizer '{entity}' must define at least one pattern")
+        # Fail the load here; otherwise a bad pattern only surfaces when a
+        # request reaches the swapped-in analyzer
+        for p in patterns:
+            try:
+                regex.compile(p.regex)
+            except (regex.error, TypeError) as exc:
+                raise ValueError(f"Recognizer '{entity}' pattern '{p.name}' is invalid: {exc}") from exc
+
+        validator = None
+        if spec.get("validator"):
+            validator = VALIDATORS.get(spec["validator"])
+            if validator is None:
+                raise ValueError(
+                    f"Unknown validator '{spec['validator']}' for '{entity}'. "
+                    f"Available: {sorted(VALIDATORS)}"
+                )
+
+        for lang in spec.get("languages", ["ru", "en"]):
+            recs.append(GuardedPatternRecognizer(
+                supported_entity=entity,
+                name=spec.get("name", f"{entity.lower()}_file"),
+                patterns=patterns,
+                context=spec.get("context"),
+                supported_language=lang,
+                validator=validator,
+            ))
+        if spec.get("replace"):
+            replaced.add(entity)
+
+    return recs, replaced
@@ -0,0 +1,170 @@
+"""Node-local cache shared by all worker processes on a host.
+
+A single SQLite file in WAL mode (``SHARED_CACHE_PATH``, ideally on tmpfs):
+readers never block, a point lookup costs tens of microseconds, so a hit is
+far cheaper than a spaCy call. Keys are BLAKE2 hashes of the inputs keyed
+with the deployment's ``SHARED_CACHE_KEY``, so texts are not stored verbatim
+and cannot be confirmed by hashing guesses without the key. Values (detected
+languages, entity types and offsets) are still derived from documents, so the
+file needs the same protection as the data. The total payload size is kept in a trigger-maintained counter
+and the least recently used entries are evicted above ``SHARED_CACHE_MAX_MB``.
+
+The cache is best-effort: a locked or broken database counts as a miss and
+never fails a request.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.config import SHARED_CACHE_KEY, SHARED_CACHE_MAX_MB, SHARED_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (id, total) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries
+BEGIN UPDATE meta SET total = total + NEW.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries
+BEGIN UPDATE meta SET total = total - OLD.size WHERE id = 0; END;
+"""
+
+# Hits refresh ``used`` at most this often (seconds), so reads rarely write
+_TOUCH_AFTER = 30.0
+# Entries removed per eviction statement
+_EVICT_BATCH = 256
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class SharedCache:
+    """Size-bounded key/value store in one SQLite file shared between processes."""
+
+    def __init__(self, path: str, max_bytes: int, secret: bytes, busy_timeout_ms: int = 50):
+        if not secret:
+            raise ValueError("Shared cache needs a non-empty secret")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        # BLAKE2 keys are at most 64 bytes, so longer secrets are condensed first
+        self._secret = secret if len(secret) <= 64 else hashlib.sha512(secret).digest()
+        self.max_bytes = max(1, max_bytes)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0, "errors": 0}
+        # Workers start together, so allow schema creation to wait for the others
+        db = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    def _db(self) -> sqlite3.Connection:
+        # Per thread and per process: a connection must not cross a fork
+        pid, db = getattr(self._local, "db", (None, None))
+        if db is None or pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+            db.execute("PRAGMA synchronous=OFF")
+            self._local.db = (os.getpid(), db)
+        return db
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[name] += n
+
+    def key(self, kind: str, *parts: str) -> bytes:
+        digest = hashlib.blake2b(kind.encode("utf-8"), digest_size=16, key=self._secret)
+        for part in parts:
+            digest.update(b"\x00")
+            digest.update(part.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        try:
+            db = self._db()
+            row = db.execute("SELECT value, used FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and time.time() - row[1] > _TOUCH_AFTER:
+                db.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as exc:
+            logger.debug("Shared cache read failed: %s", exc)
+            self._count("errors")
+            return None
+        self._count("hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+
+    def put(self, key: bytes, value: bytes) -> None:
+        try:
+            db = self._db()
+            cur = db.execute(
+                "INSERT OR IGNORE INTO entries (key, value, size, used) VALUES (?, ?, ?, ?)",
+                (key, value, len(key) + len(value), time.time()),
+            )
+            if cur.rowcount:
+                self._count("writes")
+                self._evict(db)
+        except sqlite3.Error as exc:
+            logger.debug("Shared cache write failed: %s", exc)
+            self._count("errors")
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        (total,) = db.execute("SELECT total FROM meta WHERE id = 0").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Trim below the limit, so eviction does not run on every following write
+        while total > self.max_bytes * 0.9:
+            cur = db.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used LIMIT ?)",
+                (_EVICT_BATCH,),
+            )
+            if not cur.rowcount:
+                break
+            self._count("evicted", cur.rowcount)
+            (total,) = db.execute("SELECT total FROM meta WHERE id = 0").fetchone()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counters = dict(self._counters)
+        try:
+            (total,) = self._db().execute("SELECT total FROM meta WHERE id = 0").fetchone()
+        except sqlite3.Error:
+            total = None
+        return {"path": self.path, "max_bytes": self.max_bytes, "bytes": total, **counters}
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Return the process-wide cache, or ``None`` when ``SHARED_CACHE_PATH`` or
+    ``SHARED_CACHE_KEY`` is unset or the file is unusable."""
+
+    global _cache
+    if _cache is None and SHARED_CACHE_PATH:
+        with _cache_lock:
+            if _cache is None and not SHARED_CACHE_KEY:
+                logger.warning("SHARED_CACHE_PATH is set but SHARED_CACHE_KEY is not; the shared cache is off")
+                _cache = False
+            elif _cache is None:
+                try:
+                    _cache = SharedCache(
+                        SHARED_CACHE_PATH, int(SHARED_CACHE_MAX_MB * 1024 ** 2), SHARED_CACHE_KEY.encode("utf-8")
+                    )
+                except (OSError, sqlite3.Error) as exc:
+                    logger.warning("Shared cache %s is unavailable: %s", SHARED_CACHE_PATH, exc)
+                    _cache = False
+    return _cache or None
+
+
+def shared_cache_status() -> Optional[Dict[str, Any]]:
+    return _cache.stats() if _cache else None
@@ -0,0 +1,198 @@
+"""Pre-built pipeline snapshot for fast cold starts.
+
+``python -m app.infrastructure.snapshot DIR`` loads the configured spaCy
+models once, drops components Presidio never reads (``parser`` and ``senter``
+by default), writes them with ``nlp.to_disk`` and records the predefined
+recognizers the registry uses in ``DIR/manifest.json``. With
+``NLP_SNAPSHOT_DIR=DIR`` the server loads the pipelines from that directory
+(no package lookup or download check) and instantiates only the listed
+recognizers instead of calling ``load_predefined_recognizers``.
+
+A snapshot built with other spaCy/Presidio versions is ignored with a warning.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from importlib.metadata import version
+from typing import Any, Dict, List, Optional, Sequence
+
+import spacy
+from presidio_analyzer import PatternRecognizer, RecognizerRegistry
+from presidio_analyzer import predefined_recognizers
+from presidio_analyzer.nlp_engine import NlpEngine
+from presidio_analyzer.nlp_engine.spacy_nlp_engine import SpacyNlpEngine
+
+from app.config import NLP_CONFIG
+from app.infrastructure.nlp import create_nlp_engine, mark_initialized, nlp_status
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+# Presidio uses tokens, lemmas and entities only
+DEFAULT_EXCLUDED_PIPES = ("parser", "senter")
+
+_manifest: Optional[Dict[str, Any]] = None
+_snapshot_dir: Optional[str] = None
+
+
+def _versions() -> Dict[str, str]:
+    return {"spacy": spacy.__version__, "presidio_analyzer": version("presidio_analyzer")}
+
+
+def build_snapshot(
+    path: str,
+    engine: NlpEngine,
+    exclude_pipes: Sequence[str] = DEFAULT_EXCLUDED_PIPES,
+    skip_recognizers: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """Write the pipelines of a loaded spaCy ``engine`` and the manifest to ``path``.
+
+    ``exclude_pipes`` are removed from the engine's pipelines in place. The
+    snapshot is written to a staging directory next to ``path`` first, so a
+    failed build leaves any previous snapshot intact. Returns the manifest.
+    """
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+    try:
+        os.makedirs(os.path.join(staging, "spacy"))
+        models: Dict[str, Dict[str, Any]] = {}
+        for lang, nlp in sorted(engine.nlp.items()):
+            removed = [name for name in exclude_pipes if name in nlp.pipe_names]
+            for name in removed:
+                nlp.remove_pipe(name)
+            nlp.to_disk(os.path.join(staging, "spacy", lang))
+            source = next((m["model_name"] for m in NLP_CONFIG.get("models", []) if m["lang_code"] == lang), None)
+            models[lang] = {"path": f"spacy/{lang}", "source": source, "pipes": nlp.pipe_names, "removed": removed}
+
+        registry = RecognizerRegistry()
+        registry.load_predefined_recognizers(nlp_engine=engine)
+        predefined = [
+            {"class": type(rec).__name__, "language": rec.supported_language}
+            for rec in registry.recognizers
+            if type(rec).__name__ not in skip_recognizers
+        ]
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "versions": _versions(),
+            "models": models,
+            "blank": all(not nlp.pipe_names for nlp in engine.nlp.values()),
+            "predefined_recognizers": predefined,
+        }
+        with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, ensure_ascii=False, indent=2)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Return the manifest in ``path``; raises ``ValueError`` if it is unusable."""
+
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No snapshot manifest at {manifest_path}")
+    with open(manifest_path, "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')!r}")
+    if manifest.get("versions") != _versions():
+        raise ValueError(f"Snapshot built with {manifest.get('versions')}, running {_versions()}")
+    return manifest
+
+
+def load_snapshot_engine(path: str) -> Optional[NlpEngine]:
+    """spaCy engine loaded from a snapshot, or ``None`` (with a warning) if unusable."""
+
+    global _manifest, _snapshot_dir
+    try:
+        manifest = read_manifest(path)
+        models = manifest["models"]
+        engine = SpacyNlpEngine(
+            models=[{"lang_code": lang, "model_name": os.path.join(path, m["path"])} for lang, m in models.items()]
+        )
+        engine.nlp = {lang: spacy.load(os.path.join(path, m["path"])) for lang, m in models.items()}
+    except Exception as exc:
+        logger.warning("Ignoring NLP snapshot %s: %s", path, exc)
+        return None
+    _manifest, _snapshot_dir = manifest, path
+    mark_initialized("snapshot contains blank spaCy pipelines" if manifest.get("blank") else None)
+    logger.info("Loaded NLP snapshot %s (%s)", path, manifest["created"])
+    return engine
+
+
+def load_predefined_from_snapshot(registry: RecognizerRegistry, nlp_engine: NlpEngine) -> bool:
+    """Add the snapshot's predefined recognizers to ``registry``.
+
+    Returns ``False`` when no snapshot is loaded, so the caller falls back to
+    ``load_predefined_recognizers``.
+    """
+
+    if _manifest is None:
+        return False
+    recognizers: List[Any] = []
+    for entry in _manifest["predefined_recognizers"]:
+        cls = getattr(predefined_recognizers, entry["class"])
+        if issubclass(cls, predefined_recognizers.SpacyRecognizer):
+            rec = cls(supported_language=entry["language"], supported_entities=nlp_engine.get_supported_entities())
+        else:
+            rec = cls(supported_language=entry["language"])
+        if isinstance(rec, PatternRecognizer):
+            rec.global_regex_flags = registry.global_regex_flags
+        recognizers.append(rec)
+    registry.recognizers.extend(recognizers)
+    return True
+
+
+def snapshot_status() -> Optional[Dict[str, Any]]:
+    if _manifest is None:
+        return None
+    return {
+        "path": _snapshot_dir,
+        "created": _manifest["created"],
+        "languages": sorted(_manifest["models"]),
+        "predefined_recognizers": len(_manifest["predefined_recognizers"]),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build a pre-loaded pipeline snapshot for NLP_SNAPSHOT_DIR")
+    parser.add_argument("path", help="Output directory (replaced if it exists)")
+    parser.add_argument(
+        "--exclude-pipes",
+        default=",".join(DEFAULT_EXCLUDED_PIPES),
+        help="Comma-separated spaCy components to drop",
+    )
+    parser.add_argument("--skip-recognizers", default="", help="Comma-separated predefined recognizer classes to drop")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    engine = create_nlp_engine()
+    if nlp_status()["fallback_used"]:
+        logger.warning("Configured spaCy models are unavailable; the snapshot contains blank pipelines")
+    manifest = build_snapshot(
+        args.path,
+        engine,
+        exclude_pipes=[p for p in args.exclude_pipes.split(",") if p],
+        skip_recognizers=[r for r in args.skip_recognizers.split(",") if r],
+    )
+    print(json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Startup timing report.
+
+Initialization stages (NLP engine, registry, analyzer, ...) are timed with
+``timed`` as they run and show up in ``/health`` under ``startup``.
+``python -m app.infrastructure.startup`` does a cold start in a fresh process
+and prints per-module import times followed by the stage timings::
+
+    python -m app.infrastructure.startup --warmup
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+# Heaviest imports first, so each later entry only shows its own incremental cost
+IMPORT_PROBE = (
+    "spacy",
+    "presidio_analyzer",
+    "presidio_anonymizer",
+    "fastapi",
+    "app.application.service",
+    "app.interface.api",
+)
+
+_lock = threading.Lock()
+_stages: Dict[str, float] = {}
+_imports: Dict[str, float] = {}
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record how long ``stage`` took; repeated stages keep the latest duration."""
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _stages[stage] = round(time.perf_counter() - started, 4)
+
+
+def time_imports(modules: Sequence[str] = IMPORT_PROBE) -> Dict[str, float]:
+    """Import ``modules`` in order and record the time each one added."""
+
+    for name in modules:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        with _lock:
+            _imports[name] = round(time.perf_counter() - started, 4)
+    return dict(_imports)
+
+
+def startup_report() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "imports": dict(_imports),
+            "stages": dict(_stages),
+            "total_s": round(sum(_imports.values()) + sum(_stages.values()), 4),
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Report import and initialization times of a cold start")
+    parser.add_argument("--warmup", action="store_true", help="Also run one analyze call per language")
+    args = parser.parse_args(argv)
+
+    # Under ``python -m`` this file runs as ``__main__``; the service records
+    # its stages in the regular module, so the report must use that one too
+    from app.infrastructure import startup
+
+    already = [name for name in IMPORT_PROBE if name in sys.modules]
+    if already:
+        print(f"warning: already imported, times are not cold: {already}", file=sys.stderr)
+    startup.time_imports()
+
+    from app.application.service import analyze_text, get_analyzer, get_anonymizer
+
+    get_analyzer()
+    get_anonymizer()
+    if args.warmup:
+        for language in ("ru", "en"):
+            with startup.timed(f"first_analyze_{language}"):
+                analyze_text("warmup", language)
+    print(json.dumps(startup.startup_report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Optional OpenTelemetry tracing of pipeline stages.
+
+Enabled by ``TRACING_EXPORTER`` when ``opentelemetry-sdk`` is installed:
+``memory`` (kept in-process, for tests), ``file`` (JSON lines in
+``TRACING_FILE``), ``console`` or ``otlp`` (needs
+``opentelemetry-exporter-otlp``). Otherwise every helper here is a no-op.
+
+Spans never carry document text: string attributes are only accepted for the
+keys in ``_STRING_ATTRIBUTES`` (languages, methods, entity types), everything
+else must be a number or a boolean.
+"""
+
+import importlib.util
+import json
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Iterator, Mapping, Optional
+
+from app.config import TRACING_EXPORTER, TRACING_FILE, TRACING_SERVICE_NAME
+
+logger = logging.getLogger(__name__)
+
+_OTEL_AVAILABLE = importlib.util.find_spec("opentelemetry") is not None and (
+    importlib.util.find_spec("opentelemetry.sdk") is not None
+)
+
+_STRING_ATTRIBUTES = frozenset({
+    "pii.stage",
+    "pii.language",
+    "pii.detection_method",
+    "pii.entity_types",
+    "pii.operators",
+    "http.method",
+    "http.route",
+})
+
+_tracer = None
+_provider = None
+_exporter_kind: Optional[str] = None
+_memory_exporter = None
+_tracing_lock = threading.Lock()
+
+
+class _JsonLinesExporter:
+    """Append finished spans to a file, one JSON document per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            for span in spans:
+                fh.write(json.dumps(json.loads(span.to_json())) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        return None
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def _build_exporter(kind: str):
+    global _memory_exporter
+    if kind == "memory":
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+        _memory_exporter = InMemorySpanExporter()
+        return _memory_exporter
+    if kind == "file":
+        return _JsonLinesExporter(TRACING_FILE)
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    if kind == "otlp":
+        if importlib.util.find_spec("opentelemetry.exporter.otlp") is None:
+            raise ValueError("TRACING_EXPORTER=otlp requires opentelemetry-exporter-otlp")
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter()
+    raise ValueError(f"Unsupported TRACING_EXPORTER '{kind}'. Use memory, file, console or otlp")
+
+
+def init_tracing(exporter: str = TRACING_EXPORTER) -> bool:
+    """Set up the tracer once; returns whether tracing is active."""
+
+    global _tracer, _provider, _exporter_kind
+    if _tracer is not None or not exporter:
+        return _tracer is not None
+    if not _OTEL_AVAILABLE:
+        logger.warning("TRACING_EXPORTER=%s but opentelemetry-sdk is not installed; tracing disabled", exporter)
+        return False
+    with _tracing_lock:
+        if _tracer is None:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+
+            span_exporter = _build_exporter(exporter)
+            # Memory/file exports are synchronous so tests and local runs see spans immediately
+            processor = (BatchSpanProcessor if exporter in ("otlp", "console") else SimpleSpanProcessor)(span_exporter)
+            # A private provider, so an application-wide global provider is left alone
+            _provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+            _provider.add_span_processor(processor)
+            _tracer = _provider.get_tracer(__name__)
+            _exporter_kind = exporter
+            logger.info("Tracing enabled with %s exporter", exporter)
+    return True
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def memory_exporter():
+    """The in-memory exporter when ``TRACING_EXPORTER=memory``, else ``None``."""
+
+    return _memory_exporter
+
+
+def set_attributes(span: Any, **attributes: Any) -> None:
+    """Set ``pii.*`` attributes on ``span``, dropping anything that could carry text."""
+
+    if span is None:
+        return
+    for key, value in attributes.items():
+        name = key if key.startswith(("pii.", "http.")) else f"pii.{key}"
+        if value is None:
+            continue
+        if isinstance(value, (bool, int, float)):
+            span.set_attribute(name, value)
+        elif name in _STRING_ATTRIBUTES:
+            if isinstance(value, str):
+                span.set_attribute(name, value)
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                span.set_attribute(name, sorted({str(v) for v in value}))
+        else:
+            logger.debug("Dropped non-numeric span attribute %s", name)
+
+
+@contextmanager
+def stage_span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Span around one pipeline stage; yields ``None`` when tracing is off."""
+
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name) as span:
+        set_attributes(span, stage=name, **attributes)
+        yield span
+
+
+def remote_context(headers: Mapping[str, str]):
+    """Context manager attaching the trace context from incoming request headers."""
+
+    if _tracer is None:
+        return nullcontext()
+    from opentelemetry import context, propagate
+
+    @contextmanager
+    def attached():
+        token = context.attach(propagate.extract(dict(headers)))
+        try:
+            yield
+        finally:
+            context.detach(token)
+
+    return attached()
+
+
+def tracing_status() -> Optional[dict]:
+    if _tracer is None:
+        return None
+    return {"exporter": _exporter_kind}
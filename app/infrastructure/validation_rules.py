@@ -0,0 +1,330 @@
+"""Post-validation rule table used by ``post_validate``.
+
+Each rule has a ``name`` (used in rejection counters and a profile's
+``disabled_rules``), a ``kind`` (validator factory), the ``entities`` it
+applies to and kind-specific parameters. The rules are compiled per profile
+into ``{entity type: ((name, check), ...)}``, so a result only runs the
+checks of its own type. ``VALIDATION_RULES_FILE`` (JSON/YAML) adds rules or
+replaces built-in ones with the same name::
+
+    rules:
+      - name: employee_id_luhn
+        kind: checksum
+        entities: [EMPLOYEE_ID]
+        algorithm: luhn
+
+Kinds: ``min_score``, ``checksum``, ``context``, ``digits``, ``not_email``,
+``bik_required``, ``bik_linkage`` and ``drop``; ``register_kind`` adds more.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+from app.config import VALIDATION_RULES_FILE
+from app.domain import entities as E
+from app.domain.validators import account_checksum_ok, bik_ok, find_all_biks
+from app.infrastructure.recognizers import VALIDATORS
+
+if TYPE_CHECKING:
+    from app.infrastructure.profiles import Profile
+
+
+class RuleContext:
+    """Per-document data shared by the checks; computed on first use."""
+
+    __slots__ = ("text", "results", "_biks", "_email_spans")
+
+    def __init__(self, text: str, results: Sequence[RecognizerResult]):
+        self.text = text
+        self.results = results
+        self._biks: Optional[List[str]] = None
+        self._email_spans: Optional[List[Tuple[int, int]]] = None
+
+    @property
+    def biks(self) -> List[str]:
+        if self._biks is None:
+            self._biks = [b for b in find_all_biks(self.text) if bik_ok(b)]
+        return self._biks
+
+    @property
+    def email_spans(self) -> List[Tuple[int, int]]:
+        if self._email_spans is None:
+            self._email_spans = [(r.start, r.end) for r in self.results if r.entity_type == E.EMAIL]
+        return self._email_spans
+
+
+# A check returns True to keep the result
+Check = Callable[[RuleContext, RecognizerResult, str], bool]
+RuleTable = Dict[str, Tuple[Tuple[str, Check], ...]]
+
+
+def _min_score(spec: Dict[str, Any], profile: "Profile") -> Check:
+    threshold = float(spec.get("threshold", profile.min_ml_score))
+    return lambda ctx, r, span: r.score is None or r.score >= threshold
+
+
+def _checksum(spec: Dict[str, Any], profile: "Profile") -> Check:
+    validator = VALIDATORS.get(spec.get("algorithm", ""))
+    if validator is None:
+        raise ValueError(f"'algorithm' must be one of {sorted(VALIDATORS)}")
+    return lambda ctx, r, span: validator(span)
+
+
+def _context(spec: Dict[str, Any], profile: "Profile") -> Check:
+    keywords = spec.get("keywords") or []
+    if not keywords or not all(isinstance(k, str) for k in keywords):
+        raise ValueError("'keywords' must be a non-empty list of strings")
+    before, after = int(spec.get("before", 16)), int(spec.get("after", 16))
+    alternation = "|".join(re.escape(k) for k in keywords)
+    keyword_re = re.compile(rf"\b(?:{alternation})\b" if spec.get("whole_words") else alternation, re.IGNORECASE)
+    # Prefix rules: a span starting with one of ``prefixes`` or whose digits
+    # match ``digits_regex`` needs no keyword nearby
+    prefixes = tuple(spec.get("prefixes", ()))
+    digits_re = re.compile(spec["digits_regex"]) if spec.get("digits_regex") else None
+
+    def check(ctx: RuleContext, r: RecognizerResult, span: str) -> bool:
+        if prefixes and span.strip().startswith(prefixes):
+            return True
+        if digits_re is not None and digits_re.fullmatch("".join(ch for ch in span if ch.isdigit())):
+            return True
+        text = ctx.text
+        return keyword_re.search(text[max(0, r.start - before) : r.end + after]) is not None
+
+    return check
+
+
+def _digits(spec: Dict[str, Any], profile: "Profile") -> Check:
+    length = int(spec["length"])
+
+    def check(ctx: RuleContext, r: RecognizerResult, span: str) -> bool:
+        digits = "".join(ch for ch in span if ch.isdigit())
+        return len(digits) == length and set(digits) != {"0"}
+
+    return check
+
+
+def _not_email(spec: Dict[str, Any], profile: "Profile") -> Check:
+    def check(ctx: RuleContext, r: RecognizerResult, span: str) -> bool:
+        return "@" not in span and all(r.end <= s or r.start >= e for s, e in ctx.email_spans)
+
+    return check
+
+
+def _bik_required(spec: Dict[str, Any], profile: "Profile") -> Check:
+    return lambda ctx, r, span: bool(ctx.biks)
+
+
+def _bik_linkage(spec: Dict[str, Any], profile: "Profile") -> Check:
+    correspondent = frozenset(spec.get("correspondent", (E.RU_KS,)))
+
+    def check(ctx: RuleContext, r: RecognizerResult, span: str) -> bool:
+        # Without a BIK there is nothing to check against (see ``bik_required``)
+        is_corr = r.entity_type in correspondent
+        return not ctx.biks or any(account_checksum_ok(span, b, is_corr=is_corr) for b in ctx.biks)
+
+    return check
+
+
+def _drop(spec: Dict[str, Any], profile: "Profile") -> Check:
+    return lambda ctx, r, span: False
+
+
+KINDS: Dict[str, Callable[[Dict[str, Any], "Profile"], Check]] = {
+    "min_score": _min_score,
+    "checksum": _checksum,
+    "context": _context,
+    "digits": _digits,
+    "not_email": _not_email,
+    "bik_required": _bik_required,
+    "bik_linkage": _bik_linkage,
+    "drop": _drop,
+}
+
+# Built-in rules, in evaluation order. ``drop`` rules without ``entities``
+# apply to the profile's ``drop_entities``.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "low_score", "kind": "min_score", "entities": [E.PERSON, E.ORG, E.LOC, E.GPE]},
+    {"name": "snils_checksum", "kind": "checksum", "entities": [E.RU_SNILS], "algorithm": "snils"},
+    {"name": "inn_checksum", "kind": "checksum", "entities": [E.RU_INN], "algorithm": "inn"},
+    {"name": "ogrn_checksum", "kind": "checksum", "entities": [E.RU_OGRN, E.RU_OGRNIP], "algorithm": "ogrn"},
+    {"name": "card_luhn", "kind": "checksum", "entities": [E.CARD], "algorithm": "luhn"},
+    {"name": "url_in_email", "kind": "not_email", "entities": ["URL"]},
+    {
+        "name": "phone_context",
+        "kind": "context",
+        "entities": [E.PHONE, E.PHONE_RU],
+        "keywords": ["phone", "tel", "mobile", "cell", "тел", "телефон", "моб"],
+        "whole_words": True,
+        "before": 16,
+        "after": 16,
+        "prefixes": ["+", "00"],
+        "digits_regex": r"8\d{10}",
+    },
+    {"name": "dropped_entity", "kind": "drop"},
+    {"name": "passport_digits", "kind": "digits", "entities": [E.RU_PASSPORT], "length": 10},
+    {
+        # Spurious matches that only fit the digit pattern (e.g. INN numbers)
+        "name": "passport_context",
+        "kind": "context",
+        "entities": [E.RU_PASSPORT],
+        "keywords": ["паспорт", "passport"],
+        "before": 24,
+        "after": 16,
+    },
+    {"name": "account_without_bik", "kind": "bik_required", "entities": [E.RU_RS, E.RU_KS]},
+    {"name": "account_checksum", "kind": "bik_linkage", "entities": [E.RU_RS, E.RU_KS]},
+    {"name": "bik_checksum", "kind": "checksum", "entities": [E.RU_BIK], "algorithm": "bik"},
+]
+
+_specs: Optional[List[Dict[str, Any]]] = None
+_digest: Tuple[Optional[List[Dict[str, Any]]], str] = (None, "")
+_tables: Dict["Profile", RuleTable] = {}
+_hits: Counter = Counter()
+_rejects: Counter = Counter()
+_rules_lock = threading.Lock()
+
+
+def register_kind(kind: str, factory: Callable[[Dict[str, Any], "Profile"], Check]) -> None:
+    """Make ``kind`` available to rule definitions; the factory returns the check."""
+
+    KINDS[kind] = factory
+
+
+def _rule_entities(spec: Dict[str, Any], profile: "Profile") -> FrozenSet[str]:
+    if spec.get("entities") is None and spec["kind"] == "drop":
+        return profile.drop_entities
+    return frozenset(spec["entities"])
+
+
+def _validate_spec(idx: int, spec: Any, path: str) -> Dict[str, Any]:
+    from app.infrastructure.profiles import DEFAULT_PROFILE
+
+    if not isinstance(spec, dict) or not isinstance(spec.get("name"), str) or not spec["name"]:
+        raise ValueError(f"Rule #{idx} in '{path}' must be a mapping with a 'name'")
+    name = spec["name"]
+    if spec.get("kind") not in KINDS:
+        raise ValueError(f"Rule '{name}' has unknown kind {spec.get('kind')!r}. Available: {sorted(KINDS)}")
+    entities = spec.get("entities")
+    if spec["kind"] != "drop" or entities is not None:
+        if not isinstance(entities, list) or not entities or not all(isinstance(e, str) for e in entities):
+            raise ValueError(f"Rule '{name}': 'entities' must be a non-empty list of strings")
+    try:
+        KINDS[spec["kind"]](spec, DEFAULT_PROFILE)
+    except (KeyError, TypeError, ValueError, re.error) as exc:
+        raise ValueError(f"Rule '{name}' is invalid: {exc}") from exc
+    return spec
+
+
+def load_rule_specs(path: str) -> List[Dict[str, Any]]:
+    """Built-in rules merged with the definitions in ``path`` (same name replaces)."""
+
+    specs = {spec["name"]: spec for spec in DEFAULT_RULES}
+    if not path:
+        return list(specs.values())
+    if not os.path.exists(path):
+        raise ValueError(f"Validation rules file '{path}' does not exist")
+    with open(path, "r", encoding="utf-8") as fh:
+        raw = fh.read()
+    if path.endswith((".yaml", ".yml")):
+        if importlib.util.find_spec("yaml") is None:
+            raise ValueError(f"Validation rules file '{path}' is YAML but PyYAML is not installed")
+        yaml = importlib.import_module("yaml")
+        try:
+            data = yaml.safe_load(raw)  # type: ignore
+        except yaml.YAMLError as exc:  # type: ignore
+            raise ValueError(f"Validation rules file '{path}' is not valid YAML: {exc}") from exc
+    else:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Validation rules file '{path}' is not valid JSON: {exc}") from exc
+
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise ValueError(f"Validation rules file '{path}' must contain a 'rules' list")
+    for idx, spec in enumerate(data["rules"]):
+        spec = _validate_spec(idx, spec, path)
+        specs[spec["name"]] = spec
+    return list(specs.values())
+
+
+def _ensure_specs() -> List[Dict[str, Any]]:
+    global _specs
+    if _specs is None:
+        with _rules_lock:
+            if _specs is None:
+                _specs = load_rule_specs(VALIDATION_RULES_FILE)
+    return _specs
+
+
+def compile_rules(specs: Sequence[Dict[str, Any]], profile: "Profile") -> RuleTable:
+    """Compile ``specs`` into the per-entity dispatch table for ``profile``."""
+
+    table: Dict[str, List[Tuple[str, Check]]] = {}
+    for spec in specs:
+        if spec["name"] in profile.disabled_rules:
+            continue
+        check = KINDS[spec["kind"]](spec, profile)
+        for entity in _rule_entities(spec, profile):
+            table.setdefault(entity, []).append((spec["name"], check))
+    return {entity: tuple(checks) for entity, checks in table.items()}
+
+
+def get_rule_table(profile: "Profile") -> RuleTable:
+    table = _tables.get(profile)
+    if table is None:
+        table = compile_rules(_ensure_specs(), profile)
+        with _rules_lock:
+            _tables[profile] = table
+    return table
+
+
+def reload_validation_rules(path: Optional[str] = None) -> List[str]:
+    """Re-read the rules file and drop compiled tables; the old rules stay on error."""
+
+    global _specs
+    specs = load_rule_specs(VALIDATION_RULES_FILE if path is None else path)
+    with _rules_lock:
+        _specs = specs
+        _tables.clear()
+    return [spec["name"] for spec in specs]
+
+
+def rules_digest() -> str:
+    """Stable digest of the active rule specs, e.g. for cache keys."""
+
+    global _digest
+    specs = _ensure_specs()
+    if _digest[0] is not specs:
+        encoded = json.dumps(specs, sort_keys=True, ensure_ascii=False, default=str)
+        _digest = (specs, hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16])
+    return _digest[1]
+
+
+def rule_names() -> FrozenSet[str]:
+    return frozenset(spec["name"] for spec in _ensure_specs())
+
+
+def record_rule_stats(hits: Counter, rejects: Counter) -> None:
+    """Merge one ``post_validate`` call's counters into the process totals."""
+
+    with _rules_lock:
+        _hits.update(hits)
+        _rejects.update(rejects)
+
+
+def rule_stats() -> Dict[str, Any]:
+    with _rules_lock:
+        return {
+            "rules": [spec["name"] for spec in _specs or DEFAULT_RULES],
+            "compiled_profiles": sorted(p.name for p in _tables),
+            "hits": dict(_hits),
+            "rejects": dict(_rejects),
+        }
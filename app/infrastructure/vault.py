@@ -0,0 +1,162 @@
+"""Keyed pseudonymization and the token vault used to reverse it."""
+
+import hashlib
+import hmac
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import PSEUDONYM_KEY, VAULT_CACHE_SIZE, VAULT_PATH
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEX_CHARS = 16
+# Token prefixes are restricted so that ``reveal`` can find every token again
+PREFIX_PATTERN = r"[A-Z][A-Z0-9_]*"
+PREFIX_RE = re.compile(PREFIX_PATTERN)
+TOKEN_RE = re.compile(rf"\b{PREFIX_PATTERN}_[0-9a-f]{{{TOKEN_HEX_CHARS}}}\b")
+
+_vault = None
+_vault_lock = threading.Lock()
+# Random key shared by a group of processes when PSEUDONYM_KEY is unset
+_shared_key: Optional[bytes] = None
+
+
+class TokenVault:
+    """Maps pseudonyms back to original values.
+
+    Hot mappings live in a bounded LRU; when ``path`` is set they are also
+    persisted to SQLite (WAL mode) so tokens survive restarts and can be shared
+    by workers on the same host.
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        cache_size: int = 100_000,
+        path: Optional[str] = None,
+        ephemeral_key: bool = False,
+    ):
+        self._key = key
+        self.ephemeral_key = ephemeral_key
+        self._cache_size = max(1, cache_size)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tokens (token TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def token_for(self, value: str, prefix: str) -> str:
+        digest = hmac.new(self._key, f"{prefix}\x00{value}".encode("utf-8"), hashlib.sha256)
+        return f"{prefix}_{digest.hexdigest()[:TOKEN_HEX_CHARS]}"
+
+    def _remember(self, token: str, value: str) -> bool:
+        """Add to the LRU; returns ``True`` if the token was not cached yet."""
+
+        if token in self._cache:
+            self._cache.move_to_end(token)
+            return False
+        self._cache[token] = value
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return True
+
+    def pseudonymize(self, value: str, prefix: str) -> str:
+        """Return the deterministic pseudonym for ``value`` and record the mapping."""
+
+        token = self.token_for(value, prefix)
+        with self._lock:
+            is_new = self._remember(token, value)
+            if is_new and self._db is not None:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO tokens (token, value) VALUES (?, ?)", (token, value)
+                )
+        return token
+
+    def lookup_many(self, tokens: Iterable[str]) -> Dict[str, str]:
+        """Resolve tokens to original values; unknown tokens are omitted."""
+
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        with self._lock:
+            for token in dict.fromkeys(tokens):
+                value = self._cache.get(token)
+                if value is None:
+                    missing.append(token)
+                else:
+                    self._cache.move_to_end(token)
+                    found[token] = value
+
+            if missing and self._db is not None:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT token, value FROM tokens WHERE token IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for token, value in rows:
+                        self._remember(token, value)
+                        found[token] = value
+        return found
+
+    def reveal(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Replace every known token in ``text`` with its original value."""
+
+        mapping = self.lookup_many(TOKEN_RE.findall(text))
+        restored = TOKEN_RE.sub(lambda m: mapping.get(m.group(0), m.group(0)), text)
+        return restored, mapping
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "cache_size": self._cache_size,
+                "persistent": self._db is not None,
+                "ephemeral_key": self.ephemeral_key,
+            }
+
+
+def get_vault() -> TokenVault:
+    """Return the process-wide vault configured from ``PSEUDONYM_KEY``/``VAULT_PATH``."""
+
+    global _vault
+    if _vault is None:
+        with _vault_lock:
+            if _vault is None:
+                key = PSEUDONYM_KEY.encode("utf-8") or _shared_key
+                ephemeral = not PSEUDONYM_KEY
+                if not key:
+                    logger.warning(
+                        "PSEUDONYM_KEY is not set; pseudonyms are only stable within this process"
+                    )
+                    key = secrets.token_bytes(32)
+                path = VAULT_PATH or None
+                if path:
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _vault = TokenVault(key, cache_size=VAULT_CACHE_SIZE, path=path, ephemeral_key=ephemeral)
+    return _vault
+
+
+def set_shared_key(key: bytes) -> None:
+    """Use ``key`` instead of a random per-process one when ``PSEUDONYM_KEY`` is unset.
+
+    Lets a parent hand one key to all of its worker processes; must be called
+    before the vault is first used.
+    """
+
+    global _shared_key
+    _shared_key = key
+
+
+def vault_status() -> Optional[Dict[str, object]]:
+    return _vault.stats() if _vault is not None else None
@@ -0,0 +1,168 @@
+"""Admission control for the analysis endpoints.
+
+Two layers run before a request reaches spaCy:
+
+* per-client token buckets (keyed by ``X-API-Key`` or the client address) that
+  charge a cost proportional to the text size;
+* an AIMD concurrency limit on in-flight cost that grows while the observed
+  latency per cost unit stays under the target and shrinks multiplicatively
+  when it does not. Requests above the limit are shed instead of queueing.
+
+``/health`` and ``/ready`` never go through here and run on the event loop, so
+they keep answering while the threadpool is busy with analysis.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from fastapi import HTTPException
+
+from app.config import (
+    OVERLOAD_INITIAL_LIMIT,
+    OVERLOAD_MAX_LIMIT,
+    OVERLOAD_MIN_LIMIT,
+    OVERLOAD_TARGET_LATENCY_MS,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_COST_PER_SEC,
+    REQUEST_COST_CHARS,
+)
+
+_MAX_BUCKETS = 10_000
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def request_cost(text_length: int, chars_per_unit: int = REQUEST_COST_CHARS) -> float:
+    """Cost units for a text: one unit per request plus one per ``chars_per_unit`` chars."""
+
+    return 1.0 + text_length / max(1, chars_per_unit)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Consume ``cost`` tokens; returns 0 on success or seconds to wait otherwise."""
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A single request bigger than the burst is admitted from a full bucket
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-client rate limiting plus an adaptive (AIMD) in-flight cost limit."""
+
+    def __init__(
+        self,
+        target_latency_ms: float = 1000.0,
+        initial_limit: float = 8.0,
+        min_limit: float = 1.0,
+        max_limit: float = 64.0,
+        rate: float = 0.0,
+        burst: float = 0.0,
+    ):
+        self.target = target_latency_ms / 1000.0
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial_limit, min_limit), max_limit)
+        self.rate = rate
+        self.burst = burst or rate
+        self.inflight = 0.0
+        self.counters: Counter = Counter()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_rate(self, client: str, cost: float) -> None:
+        if self.rate <= 0:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > _MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take(cost)
+        if wait:
+            self.counters["rate_limited"] += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    def _record(self, cost: float, elapsed: float) -> None:
+        if elapsed / cost > self.target:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            self.counters["decreases"] += 1
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    @contextmanager
+    def admit(self, client: str, cost: float) -> Iterator[None]:
+        """Admit a request of ``cost`` units or raise 429 (rate limit) / 503 (shed)."""
+
+        with self._lock:
+            self._check_rate(client, cost)
+            # An idle node always admits, so oversized requests cannot starve
+            if self.target > 0 and self.inflight > 0 and self.inflight + cost > self.limit:
+                self.counters["shed"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is overloaded, retry later",
+                    headers={"Retry-After": "1"},
+                )
+            self.inflight += cost
+            self.counters["admitted"] += 1
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.inflight -= cost
+                if self.target > 0:
+                    self._record(cost, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "inflight": round(self.inflight, 2),
+                "target_latency_ms": self.target * 1000.0,
+                "rate_per_sec": self.rate,
+                "clients": len(self._buckets),
+                **{k: self.counters[k] for k in ("admitted", "shed", "rate_limited", "decreases")},
+            }
+
+
+def get_admission() -> AdmissionController:
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = AdmissionController(
+                    target_latency_ms=OVERLOAD_TARGET_LATENCY_MS,
+                    initial_limit=OVERLOAD_INITIAL_LIMIT,
+                    min_limit=OVERLOAD_MIN_LIMIT,
+                    max_limit=OVERLOAD_MAX_LIMIT,
+                    rate=RATE_LIMIT_COST_PER_SEC,
+                    burst=RATE_LIMIT_BURST,
+                )
+    return _admission
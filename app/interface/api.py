@@ -1,97 +1,664 @@
+import asyncio
+import json
 import logging
-from inspect import signature
-from typing import Any, Dict, List, Optional
+import os
+import secrets
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from presidio_analyzer import RecognizerResult
 from pydantic import BaseModel, Field
 
-from presidio_anonymizer import AnonymizerEngine
-
-from app.application.lang_detect import detect_language
+from app.application.budget import Budget, BudgetExceeded, budget_status, get_budget
+from app.application.incremental import get_incremental_analyzer, incremental_status
+from app.application.ingest import anonymize_file, detect_format
+from app.application.jobs import (
+    get_job_store,
+    job_status,
+    start_job_supervisor,
+    stop_job_workers,
+    submit_file,
+    submit_text,
+)
+from app.application.cascade import check_mode
+from app.application.lang_detect import LanguageDetection, preload_language_model
 from app.application.service import (
-    get_analyzer,
-    get_anonymizer,
-    post_validate,
+    analyze_chunked,
+    analyze_text,
+    anonymize_results,
+    get_batcher,
+    reload_registry,
     runtime_status,
+    start_registry_watcher,
+)
+from app.application.structured import FieldRules, anonymize_structure, iter_string_leaves
+from app.config import (
+    ADMIN_TOKEN,
+    DEANONYMIZE_TOKEN,
+    INGEST_MAX_BYTES,
+    JOB_MAX_BYTES,
+    JOB_WORKERS,
+    NER_CASCADE,
 )
-from app.infrastructure.policies import get_default_policy, to_operator_config
+from app.infrastructure.logs import init_logging, log_request, logging_status
+from app.infrastructure.policies import validate_policy
+from app.infrastructure.profiles import reload_profiles
+from app.infrastructure.tracing import init_tracing, remote_context, stage_span, tracing_status
+from app.infrastructure.validation_rules import reload_validation_rules
+from app.infrastructure.vault import get_vault
+from app.interface.admission import get_admission, request_cost
+from app.interface.responses import FastJSONResponse, serialize_results
 
-app = FastAPI(title="Presidio RU+EN PII Server", version="1.3.0")
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Fail fast on broken rules/profiles files rather than answering 400 to every request;
+    # rules first, profiles refer to them by name
+    check_mode(NER_CASCADE)
+    reload_validation_rules()
+    reload_profiles()
+    start_registry_watcher()
+    if JOB_WORKERS > 0:
+        start_job_supervisor(JOB_WORKERS)
+    yield
+    stop_job_workers()
+
+
+app = FastAPI(title="Presidio RU+EN PII Server", version="1.3.0", lifespan=lifespan)
 
-_ANONYMIZER_SUPPORTS_OPERATORS = "operators" in signature(AnonymizerEngine.anonymize).parameters
 logger = logging.getLogger(__name__)
 
+init_tracing()
+init_logging()
+# Under gunicorn --preload this runs once in the master, and forked workers share the model
+preload_language_model()
+
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    """Server span per request, continuing the caller's trace from ``traceparent``."""
+
+    with remote_context(request.headers):
+        with stage_span("http.request", **{"http.method": request.method}) as span:
+            response = await call_next(request)
+            if span is not None:
+                route = request.scope.get("route")
+                # The route template, not the raw path, which may embed IDs
+                span.update_name(f"{request.method} {route.path if route else 'unmatched'}")
+                span.set_attribute("http.route", route.path if route else "unmatched")
+                span.set_attribute("http.status_code", response.status_code)
+            return response
+
+# Budgets whose max_chars rejects oversized texts, by path; the body is
+# checked against them before it is parsed as JSON
+_BODY_LIMITED_PATHS = {"/analyze": "analyze", "/anonymize": "anonymize", "/analyze/incremental": "incremental"}
+# JSON may escape a char as \uXXXX (6 bytes); the rest of the request envelope gets this much
+_BODY_ENVELOPE_BYTES = 64 * 1024
+
+
+def body_limit(path: str) -> int:
+    """Largest request body (bytes) that may still fit the endpoint's ``max_chars``; 0 = unlimited."""
+
+    endpoint = _BODY_LIMITED_PATHS.get(path)
+    if endpoint is None:
+        return 0
+    budget = get_budget(endpoint)
+    # truncate/chunk accept longer texts by design; incremental always rejects
+    if not budget.max_chars or (endpoint != "incremental" and budget.oversize_policy != "reject"):
+        return 0
+    return budget.max_chars * 6 + _BODY_ENVELOPE_BYTES
+
+
+class BodyLimitMiddleware:
+    """Reject oversized JSON bodies with 413 before they are read and parsed.
+
+    A ``Content-Length`` above the limit is refused outright; chunked bodies are
+    buffered only up to the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit = body_limit(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else 0
+        if not limit:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if b"content-length" in headers:
+            try:
+                too_large = int(headers[b"content-length"]) > limit
+            except ValueError:
+                too_large = False
+            if too_large:
+                await self._reject(scope, receive, send, limit)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        messages, size = [], 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            if size > limit:
+                await self._reject(scope, receive, send, limit)
+                return
+            if not message.get("more_body"):
+                break
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        await self.app(scope, replay, send)
+
+    @staticmethod
+    async def _reject(scope, receive, send, limit: int) -> None:
+        response = FastJSONResponse(
+            {"detail": f"Request body exceeds {limit} bytes allowed by the size budget"}, status_code=413
+        )
+        await response(scope, receive, send)
+
+
+app.add_middleware(BodyLimitMiddleware)
+
+Layout = Literal["items", "offsets", "columnar"]
+
 class AnalyzeRequest(BaseModel):
     text: str
     language: Optional[str] = Field(default=None, description="'ru' or 'en'")
+    layout: Layout = Field(
+        default="items",
+        description="'items' (with text), 'offsets' (no substrings) or 'columnar' (parallel arrays)",
+    )
+    profile: Optional[str] = Field(default=None, description="Named profile from PROFILES_FILE")
 
 class AnalyzeResponse(BaseModel):
-    items: List[Dict[str, Any]]
+    items: Optional[List[Dict[str, Any]]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+    budget: Optional[Dict[str, Any]] = Field(default=None, description="Set when a budget truncated the request")
 
 class AnonymizeRequest(BaseModel):
     text: str
     language: Optional[str] = None
     policy: Optional[Dict[str, Dict[str, Any]]] = None
+    layout: Layout = "items"
+    profile: Optional[str] = None
 
 class AnonymizeResponse(BaseModel):
     text: str
-    items: List[Dict[str, Any]]
+    items: Optional[List[Dict[str, Any]]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+    budget: Optional[Dict[str, Any]] = None
+
+class IncrementalAnalyzeRequest(AnalyzeRequest):
+    document_id: str = Field(description="Stable ID of the edited document")
+
+class IncrementalAnalyzeResponse(AnalyzeResponse):
+    document_id: str
+    full: bool
+    window: Optional[List[int]] = None
+
+class JobRequest(BaseModel):
+    text: str
+    kind: Literal["analyze", "anonymize"] = "anonymize"
+    language: Optional[str] = None
+    policy: Optional[Dict[str, Dict[str, Any]]] = None
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    language: Optional[str] = None
+    total_chunks: int
+    done_chunks: int
+    progress: float
+    error: Optional[str] = None
+    created: float
+    updated: float
+    expires_at: Optional[float] = None
+
+class JsonRules(BaseModel):
+    skip: List[str] = Field(default_factory=list, description="Paths left untouched, e.g. 'meta.**'")
+    mask: List[str] = Field(default_factory=list, description="Paths always masked in full")
+    languages: Dict[str, str] = Field(default_factory=dict, description="Path -> 'ru' or 'en'")
+    mask_char: str = "*"
+
+class AnonymizeJsonRequest(BaseModel):
+    data: Any
+    language: Optional[str] = None
+    policy: Optional[Dict[str, Dict[str, Any]]] = None
+    rules: JsonRules = Field(default_factory=JsonRules)
+    profile: Optional[str] = None
+
+class AnonymizeJsonResponse(BaseModel):
+    data: Any
+    stats: Dict[str, int]
 
+class DeanonymizeRequest(BaseModel):
+    text: Optional[str] = Field(default=None, description="Text containing pseudonyms to restore")
+    tokens: Optional[List[str]] = Field(default=None, description="Pseudonyms to look up in bulk")
+
+class DeanonymizeResponse(BaseModel):
+    text: Optional[str] = None
+    mapping: Dict[str, str]
+
+# Health/readiness are async so they run on the event loop, not in the threadpool
+# that analysis requests may saturate. The parts that query SQLite (shared cache,
+# job queue) go to the loop's own executor so they never block the loop either.
 @app.get("/health")
-def health() -> Dict[str, Any]:
-    status = runtime_status()
+async def health() -> Dict[str, Any]:
+    status, jobs = await asyncio.gather(asyncio.to_thread(runtime_status), asyncio.to_thread(job_status))
     overall = "ok"
-    if status["nlp"].get("fallback_used"):
+    if status["nlp"].get("fallback_used") or (status["vault"] or {}).get("ephemeral_key"):
         overall = "degraded"
     elif not status["nlp"].get("initialized"):
         overall = "cold_start"
-    return {"status": overall, **status}
+    return {
+        "status": overall,
+        **status,
+        "incremental": incremental_status(),
+        "admission": get_admission().stats(),
+        "budgets": budget_status(),
+        "jobs": jobs,
+        "tracing": tracing_status(),
+        "logging": logging_status(),
+    }
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze_endpoint(req: AnalyzeRequest):
+@app.get("/ready")
+async def ready():
+    admission = get_admission().stats()
+    overloaded = admission["target_latency_ms"] > 0 and admission["inflight"] >= admission["limit"]
+    body = {"ready": not overloaded, "inflight": admission["inflight"], "limit": admission["limit"]}
+    return FastJSONResponse(body, status_code=503 if overloaded else 200)
+
+def _require_token(expected: str, provided: Optional[str], setting: str) -> None:
+    if not expected:
+        raise HTTPException(status_code=403, detail=f"Endpoint is disabled ({setting} is not set)")
+    if provided is None or not secrets.compare_digest(provided, expected):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+def _require_admin(token: Optional[str]) -> None:
+    _require_token(ADMIN_TOKEN, token, "ADMIN_TOKEN")
+
+@app.post("/admin/reload-recognizers")
+def reload_recognizers_endpoint(x_admin_token: Optional[str] = Header(default=None)):
+    _require_admin(x_admin_token)
     try:
-        detection = detect_language(req.text, explicit_language=req.language)
+        version = reload_registry()
+        reload_validation_rules()
+        profiles = reload_profiles()
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    return {"registry_version": version, "profiles": sorted(profiles)}
 
-    language = detection.language
-    logger.info("Analyze called with language %s via %s", language, detection.method)
-    raw = get_analyzer().analyze(text=req.text, language=language)
-    results = post_validate(req.text, raw)
-    items = [{
-        "entity_type": r.entity_type,
-        "start": r.start,
-        "end": r.end,
-        "text": req.text[r.start:r.end],
-        "score": r.score,
-    } for r in results]
-    return {"items": items}
+def _client_key(request: Request, api_key: Optional[str]) -> str:
+    if api_key:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host}" if request.client else "anonymous"
 
-@app.post("/anonymize", response_model=AnonymizeResponse)
-def anonymize_endpoint(req: AnonymizeRequest):
+@dataclass
+class _Analysis:
+    text: str  # the text actually analyzed (may be truncated)
+    detection: LanguageDetection
+    results: List[RecognizerResult]
+    flags: Dict[str, Any] = field(default_factory=dict)
+
+def _check_size(text: str, budget: Budget) -> None:
+    if budget.max_chars and len(text) > budget.max_chars:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Text has {len(text)} chars, the limit is {budget.max_chars}",
+        )
+
+async def _analyze(
+    text: str, language: Optional[str], budget: Budget, profile: Optional[str] = None
+) -> _Analysis:
+    """Apply the size budget, then analyze via the micro-batcher or the threadpool."""
+
+    flags: Dict[str, Any] = {}
+    deadline = budget.deadline()
+    batcher = get_batcher()
     try:
-        detection = detect_language(req.text, explicit_language=req.language)
+        if budget.max_chars and len(text) > budget.max_chars:
+            if budget.oversize_policy == "truncate":
+                flags.update(truncated=True, original_chars=len(text))
+                text = text[:budget.max_chars]
+            elif budget.oversize_policy == "chunk":
+                flags.update(chunked=True)
+                detection, results = await run_in_threadpool(
+                    analyze_chunked, text, budget.max_chars, language, deadline, profile
+                )
+                return _Analysis(text, detection, results, flags)
+            else:
+                _check_size(text, budget)
+
+        # The batcher shares spaCy runs across requests, so it cannot honor a per-request deadline
+        if batcher is not None and deadline is None:
+            detection, results = await asyncio.wrap_future(batcher.submit(text, language, profile))
+        else:
+            detection, results = await run_in_threadpool(analyze_text, text, language, deadline, profile)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    except BudgetExceeded as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    return _Analysis(text, detection, results, flags)
+
+def _limit_entities(analysis: _Analysis, budget: Budget) -> List[RecognizerResult]:
+    """Results to return; anonymization still uses all of them."""
+
+    if budget.max_entities and len(analysis.results) > budget.max_entities:
+        analysis.flags.update(entities_truncated=True, total_entities=len(analysis.results))
+        return analysis.results[:budget.max_entities]
+    return analysis.results
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+async def analyze_endpoint(
+    req: AnalyzeRequest, request: Request, x_api_key: Optional[str] = Header(default=None)
+):
+    started = time.perf_counter()
+    budget = get_budget("analyze")
+    with get_admission().admit(_client_key(request, x_api_key), request_cost(len(req.text))):
+        admitted = time.perf_counter()
+        analysis = await _analyze(req.text, req.language, budget, req.profile)
+        analyzed = time.perf_counter()
+    body = serialize_results(analysis.text, _limit_entities(analysis, budget), req.layout)
+    if analysis.flags:
+        body["budget"] = analysis.flags
+    # Returned as a Response so FastAPI skips per-item response_model validation
+    response = FastJSONResponse(body)
+    timings = {"admission": admitted - started, "analyze": analyzed - admitted, "total": time.perf_counter() - started}
+    log_request(
+        "analyze", analysis.detection, analysis.results, timings,
+        chars=len(analysis.text), profile=req.profile, budget=analysis.flags or None,
+    )
+    return response
+
+@app.post("/analyze/incremental", response_model=IncrementalAnalyzeResponse)
+async def analyze_incremental_endpoint(
+    req: IncrementalAnalyzeRequest, request: Request, x_api_key: Optional[str] = Header(default=None)
+):
+    if req.profile:
+        raise HTTPException(status_code=400, detail="Profiles are not supported for incremental analysis")
+    # Truncating or chunking would break the session's offsets, so oversize is always rejected
+    budget = get_budget("incremental")
+    _check_size(req.text, budget)
+    with get_admission().admit(_client_key(request, x_api_key), request_cost(len(req.text))):
+        try:
+            out = await run_in_threadpool(
+                get_incremental_analyzer().analyze, req.document_id, req.text, req.language
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    analysis = _Analysis(req.text, out.detection, out.results)
+    body = {
+        "document_id": req.document_id,
+        "full": out.full,
+        "window": list(out.window) if out.window else None,
+        **serialize_results(req.text, _limit_entities(analysis, budget), req.layout),
+    }
+    if analysis.flags:
+        body["budget"] = analysis.flags
+    return FastJSONResponse(body)
+
+@app.delete("/analyze/incremental/{document_id}")
+def forget_incremental_endpoint(document_id: str):
+    return {"document_id": document_id, "forgotten": get_incremental_analyzer().forget(document_id)}
+
+@app.post("/anonymize", response_model=AnonymizeResponse)
+async def anonymize_endpoint(
+    req: AnonymizeRequest, request: Request, x_api_key: Optional[str] = Header(default=None)
+):
+    started = time.perf_counter()
+    budget = get_budget("anonymize")
+    with get_admission().admit(_client_key(request, x_api_key), request_cost(len(req.text))):
+        admitted = time.perf_counter()
+        analysis = await _analyze(req.text, req.language, budget, req.profile)
+        analyzed = time.perf_counter()
+        try:
+            text = await run_in_threadpool(
+                anonymize_results, analysis.text, analysis.results, req.policy, req.profile
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        anonymized = time.perf_counter()
+    body = {"text": text, **serialize_results(analysis.text, _limit_entities(analysis, budget), req.layout)}
+    if analysis.flags:
+        body["budget"] = analysis.flags
+    response = FastJSONResponse(body)
+    timings = {
+        "admission": admitted - started,
+        "analyze": analyzed - admitted,
+        "anonymize": anonymized - analyzed,
+        "total": time.perf_counter() - started,
+    }
+    log_request(
+        "anonymize", analysis.detection, analysis.results, timings,
+        chars=len(analysis.text), profile=req.profile, budget=analysis.flags or None,
+    )
+    return response
 
-    language = detection.language
-    logger.info("Anonymize called with language %s via %s", language, detection.method)
-    raw = get_analyzer().analyze(text=req.text, language=language)
-    results = post_validate(req.text, raw)
-    policy = {**get_default_policy(), **(req.policy or {})}
-    if _ANONYMIZER_SUPPORTS_OPERATORS:
-        operators = to_operator_config(policy)
-        out = get_anonymizer().anonymize(text=req.text, analyzer_results=results, operators=operators)
-    else:  # pragma: no cover - exercised only when running against legacy Presidio versions
-        out = get_anonymizer().anonymize(
-            text=req.text, analyzer_results=results, anonymizers_config=policy
+@app.post("/anonymize/json", response_model=AnonymizeJsonResponse)
+async def anonymize_json_endpoint(
+    req: AnonymizeJsonRequest, request: Request, x_api_key: Optional[str] = Header(default=None)
+):
+    total_chars = sum(len(value) for _, value in iter_string_leaves(req.data))
+    budget = get_budget("anonymize")
+    if budget.max_chars and total_chars > budget.max_chars:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Payload has {total_chars} chars in string fields, the limit is {budget.max_chars}",
         )
-    items = [{
-        "entity_type": r.entity_type,
-        "start": r.start,
-        "end": r.end,
-        "text": req.text[r.start:r.end],
-        "score": r.score,
-    } for r in results]
-    return {"text": out.text, "items": items}
+    with get_admission().admit(_client_key(request, x_api_key), request_cost(total_chars)):
+        try:
+            rules = FieldRules(**req.rules.model_dump())
+            data, stats = await run_in_threadpool(
+                anonymize_structure, req.data, req.language, req.policy, rules, req.profile
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    return FastJSONResponse({"data": data, "stats": stats})
+
+_FILE_MEDIA_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "eml": "message/rfc822",
+}
+
+def _iter_file(fh, block_size: int = 64 * 1024):
+    try:
+        fh.seek(0)
+        for block in iter(lambda: fh.read(block_size), b""):
+            yield block
+    finally:
+        fh.close()
+
+@app.post("/anonymize/file")
+async def anonymize_file_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    language: Optional[str] = Form(default=None),
+    policy: Optional[str] = Form(default=None, description="Policy as a JSON object"),
+    format: Optional[str] = Form(default=None, description="txt, csv, jsonl, docx or eml; default from the file name"),
+    x_api_key: Optional[str] = Header(default=None),
+):
+    """Anonymize an uploaded file and return it in the same format.
+
+    The upload is spooled to disk by Starlette and the result is written to a
+    spooled temp file, so neither is held in memory in full.
+    """
+
+    size = file.size or 0
+    if size > INGEST_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File has {size} bytes, the limit is {INGEST_MAX_BYTES}")
+    try:
+        fmt = detect_format(file.filename, format)
+        parsed_policy = json.loads(policy) if policy else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    started = time.perf_counter()
+    out = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    try:
+        with get_admission().admit(_client_key(request, x_api_key), request_cost(size)):
+            admitted = time.perf_counter()
+            stats = await run_in_threadpool(anonymize_file, fmt, file.file, out, language, parsed_policy)
+    except ValueError as exc:
+        out.close()
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:
+        out.close()
+        raise
+    finished = time.perf_counter()
+    log_request(
+        "anonymize_file", stats["detection"], stats["entity_types"],
+        {"admission": admitted - started, "anonymize": finished - admitted, "total": finished - started},
+        chars=stats["chars"], format=fmt, units=stats["units"], bytes=size,
+    )
+
+    filename = os.path.basename(file.filename or f"document.{fmt}")
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote('anonymized-' + filename)}",
+        "X-Units": str(stats["units"]),
+        "X-Entities": str(stats["entities"]),
+    }
+    return StreamingResponse(_iter_file(out), media_type=_FILE_MEDIA_TYPES[fmt], headers=headers)
+
+@app.post("/deanonymize", response_model=DeanonymizeResponse)
+def deanonymize_endpoint(
+    req: DeanonymizeRequest, x_deanonymize_token: Optional[str] = Header(default=None)
+):
+    _require_token(DEANONYMIZE_TOKEN, x_deanonymize_token, "DEANONYMIZE_TOKEN")
+    if req.text is None and not req.tokens:
+        raise HTTPException(status_code=400, detail="Provide 'text' or 'tokens'")
+
+    vault = get_vault()
+    if req.text is not None:
+        text, mapping = vault.reveal(req.text)
+        if req.tokens:
+            mapping.update(vault.lookup_many(req.tokens))
+        return {"text": text, "mapping": mapping}
+    return {"mapping": vault.lookup_many(req.tokens)}
+
+def _job_or_404(job_id: str) -> Dict[str, Any]:
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    job["progress"] = job["done_chunks"] / job["total_chunks"] if job["total_chunks"] else 0.0
+    return job
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+def submit_job_endpoint(req: JobRequest, request: Request, x_api_key: Optional[str] = Header(default=None)):
+    try:
+        with get_admission().admit(_client_key(request, x_api_key), request_cost(len(req.text))):
+            job_id = submit_text(req.kind, req.text, req.language, req.policy)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _job_or_404(job_id)
+
+@app.post("/jobs/raw", response_model=JobResponse, status_code=202)
+async def submit_raw_job_endpoint(
+    request: Request,
+    kind: Literal["analyze", "anonymize"] = "anonymize",
+    language: Optional[str] = None,
+    policy: Optional[str] = Query(default=None, description="Policy as a JSON object"),
+    x_api_key: Optional[str] = Header(default=None),
+):
+    """Submit a UTF-8 text body of any size; it is spooled to disk, never held in memory.
+
+    Admission charges the declared ``Content-Length`` (one unit for chunked uploads).
+    """
+
+    try:
+        parsed_policy = json.loads(policy) if policy else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="'policy' must be a JSON object")
+    if parsed_policy is not None:
+        try:
+            validate_policy(parsed_policy)  # before the upload is spooled
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        declared = 0
+    spool_dir = os.path.dirname(os.path.abspath(get_job_store().path))
+    with get_admission().admit(_client_key(request, x_api_key), request_cost(declared)):
+        fd, path = tempfile.mkstemp(prefix="upload-", dir=spool_dir)
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as spool:
+                async for block in request.stream():
+                    size += len(block)
+                    if size > JOB_MAX_BYTES:
+                        raise HTTPException(status_code=413, detail=f"Upload exceeds {JOB_MAX_BYTES} bytes")
+                    spool.write(block)
+            job_id = await run_in_threadpool(submit_file, kind, path, language, parsed_policy)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        finally:
+            os.unlink(path)
+    return _job_or_404(job_id)
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+def job_status_endpoint(job_id: str):
+    return _job_or_404(job_id)
+
+def _finished_job(job_id: str) -> Dict[str, Any]:
+    job = _job_or_404(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Job failed: {job['error']}")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+def job_result_endpoint(job_id: str):
+    """Stream the result JSON chunk by chunk: ``{"text": ..., "items": [...]}``."""
+
+    job = _finished_job(job_id)
+    store = get_job_store()
+
+    def body():
+        yield f'{{"id": {json.dumps(job_id)}, "kind": {json.dumps(job["kind"])}, '
+        if job["kind"] == "anonymize":
+            yield '"text": "'
+            for row in store.iter_results(job_id):
+                # Escaping is per character, so encoded pieces concatenate into one JSON string
+                yield json.dumps(row["output"], ensure_ascii=False)[1:-1]
+            yield '", '
+        yield '"items": ['
+        first = True
+        for row in store.iter_results(job_id):
+            items = row["items"][1:-1]
+            if items:
+                yield items if first else ", " + items
+                first = False
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+@app.get("/jobs/{job_id}/result/text")
+def job_result_text_endpoint(job_id: str):
+    """Stream the anonymized text of an ``anonymize`` job as plain text."""
+
+    job = _finished_job(job_id)
+    if job["kind"] != "anonymize":
+        raise HTTPException(status_code=400, detail="Only anonymize jobs produce text")
+    store = get_job_store()
+    return StreamingResponse(
+        (row["output"] for row in store.iter_results(job_id)), media_type="text/plain; charset=utf-8"
+    )
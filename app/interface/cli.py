@@ -0,0 +1,303 @@
+"""Offline bulk anonymization without the HTTP server.
+
+Reads text lines, JSONL records (one field path) or CSV columns from files or
+stdin, fans batches out over a process pool whose workers warm the analyzer
+once, and writes results in input order with progress on stderr::
+
+    python cli.py dump.jsonl --format jsonl --field payload.text --policy mask -o out.jsonl
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import secrets
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.application.lang_detect import preload_language_model
+from app.application.service import analyze_texts, anonymize_results, get_analyzer
+from app.config import PSEUDONYM_KEY
+from app.infrastructure.policies import NAMED_POLICIES, get_named_policy
+from app.infrastructure.vault import set_shared_key
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("txt", "jsonl", "csv")
+
+# Per-process worker settings, set by ``_init_worker``
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(fmt: str, field_path: Sequence[str], columns: Optional[Sequence[int]],
+                 language: Optional[str], policy: Dict[str, Dict[str, Any]],
+                 pseudonym_key: Optional[bytes] = None) -> None:
+    _worker.update(fmt=fmt, field_path=list(field_path), columns=columns, language=language, policy=policy)
+    if pseudonym_key is not None:
+        set_shared_key(pseudonym_key)
+    get_analyzer()
+
+
+def _get_path(record: Any, path: Sequence[str]) -> Any:
+    for key in path:
+        if isinstance(record, dict):
+            record = record.get(key)
+        elif isinstance(record, list) and key.isdigit() and int(key) < len(record):
+            record = record[int(key)]
+        else:
+            return None
+    return record
+
+
+def _set_path(record: Any, path: Sequence[str], value: str) -> None:
+    for key in path[:-1]:
+        record = record[int(key)] if isinstance(record, list) else record[key]
+    if isinstance(record, list):
+        record[int(path[-1])] = value
+    else:
+        record[path[-1]] = value
+
+
+def _anonymize_many(texts: List[str]) -> Tuple[List[str], int]:
+    out = list(texts)
+    todo = [i for i, text in enumerate(texts) if text.strip()]
+    entities = 0
+    if todo:
+        analyzed = analyze_texts([texts[i] for i in todo], _worker["language"])
+        for i, (_, results) in zip(todo, analyzed):
+            entities += len(results)
+            if results:
+                out[i] = anonymize_results(texts[i], results, _worker["policy"])
+    return out, entities
+
+
+def process_batch(records: List[Any]) -> Tuple[List[Any], int, int]:
+    """Anonymize one batch in a worker; returns output records, chars and entity count."""
+
+    fmt = _worker["fmt"]
+    if fmt == "txt":
+        out, entities = _anonymize_many(records)
+        return out, sum(map(len, records)), entities
+
+    if fmt == "jsonl":
+        parsed = [json.loads(line) if line.strip() else None for line in records]
+        slots = [i for i, rec in enumerate(parsed) if isinstance(_get_path(rec, _worker["field_path"]), str)]
+        texts = [_get_path(parsed[i], _worker["field_path"]) for i in slots]
+        anonymized, entities = _anonymize_many(texts)
+        for i, text in zip(slots, anonymized):
+            _set_path(parsed[i], _worker["field_path"], text)
+        out = [
+            json.dumps(rec, ensure_ascii=False) + "\n" if rec is not None else line
+            for rec, line in zip(parsed, records)
+        ]
+        return out, sum(map(len, texts)), entities
+
+    # csv: records are rows; only the selected columns are analyzed
+    columns = _worker["columns"]
+    cells = [
+        (r, c) for r, row in enumerate(records)
+        for c in (columns if columns is not None else range(len(row))) if c < len(row)
+    ]
+    anonymized, entities = _anonymize_many([records[r][c] for r, c in cells])
+    out = [list(row) for row in records]
+    for (r, c), text in zip(cells, anonymized):
+        out[r][c] = text
+    return out, sum(len(records[r][c]) for r, c in cells), entities
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _open_inputs(paths: Sequence[str]) -> Iterator[IO[str]]:
+    for path in paths or ["-"]:
+        if path == "-":
+            yield sys.stdin
+        else:
+            with open(path, "r", encoding="utf-8-sig", newline="") as fh:
+                yield fh
+
+
+class _Progress:
+    def __init__(self, interval: float, stream: IO[str]):
+        self.interval = interval
+        self.stream = stream
+        self.started = self.last = time.perf_counter()
+        self.records = self.chars = self.entities = 0
+
+    def add(self, records: int, chars: int, entities: int) -> None:
+        self.records += records
+        self.chars += chars
+        self.entities += entities
+        now = time.perf_counter()
+        if self.interval > 0 and now - self.last >= self.interval:
+            self.last = now
+            self.report()
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "records": self.records,
+            "chars": self.chars,
+            "entities": self.entities,
+            "elapsed_s": round(elapsed, 3),
+            "records_per_s": round(self.records / elapsed, 1),
+            "chars_per_s": round(self.chars / elapsed, 1),
+        }
+
+    def report(self, final: bool = False) -> None:
+        prefix = "done" if final else "progress"
+        print(f"{prefix}: " + json.dumps(self.summary()), file=self.stream, flush=True)
+
+
+def run(
+    inputs: Sequence[str],
+    output: IO[str],
+    fmt: str = "txt",
+    field: str = "text",
+    columns: Optional[Sequence[str]] = None,
+    language: Optional[str] = None,
+    policy: Optional[Dict[str, Dict[str, Any]]] = None,
+    workers: int = 1,
+    batch_size: int = 64,
+    progress_interval: float = 5.0,
+    progress_stream: Optional[IO[str]] = None,
+) -> Dict[str, Any]:
+    """Process ``inputs`` into ``output``; returns the throughput summary.
+
+    At most ``2 * workers`` batches are in flight, so memory stays bounded
+    regardless of input size.
+    """
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of {FORMATS}")
+    field_path = field.split(".")
+    progress = _Progress(progress_interval, progress_stream or sys.stderr)
+    writer = csv.writer(output, lineterminator="\n") if fmt == "csv" else None
+    column_idx: Optional[List[int]] = None
+    header_written = False
+
+    def records() -> Iterator[Any]:
+        nonlocal column_idx, header_written
+        for fh in _open_inputs(inputs):
+            if fmt != "csv":
+                yield from fh
+                continue
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if header is None:
+                continue
+            if not header_written:  # later files are assumed to share the first header
+                writer.writerow(header)
+                header_written = True
+                if columns:
+                    missing = [c for c in columns if c not in header]
+                    if missing:
+                        raise ValueError(f"Unknown CSV columns: {missing}")
+                    column_idx = [header.index(c) for c in columns]
+            yield from reader
+
+    def write(out: List[Any]) -> None:
+        if writer is not None:
+            writer.writerows(out)
+        else:
+            output.writelines(out)
+
+    def init_args() -> Tuple[Any, ...]:
+        return fmt, field_path, column_idx, language, policy or {}
+
+    batches = _batched(records(), max(1, batch_size))
+    first = next(batches, None)  # reads the CSV header, so column_idx is known
+    if first is not None and workers <= 1:
+        _init_worker(*init_args())
+        for batch in _chain_first(first, batches):
+            out, chars, entities = process_batch(batch)
+            write(out)
+            progress.add(len(batch), chars, entities)
+    elif first is not None:
+        # Without PSEUDONYM_KEY every worker would pick its own random key, and the
+        # same value would get different pseudonyms depending on the worker
+        pseudonym_key = None if PSEUDONYM_KEY else secrets.token_bytes(32)
+        initargs = init_args() + (pseudonym_key,)
+        preload_language_model()  # forked workers share it copy-on-write
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending: Deque[Tuple[int, Future]] = deque()
+            for batch in _chain_first(first, batches):
+                pending.append((len(batch), pool.submit(process_batch, batch)))
+                if len(pending) >= 2 * workers:
+                    _drain_one(pending, write, progress)
+            while pending:
+                _drain_one(pending, write, progress)
+
+    output.flush()
+    progress.report(final=True)
+    return progress.summary()
+
+
+def _chain_first(first: List[Any], rest: Iterator[List[Any]]) -> Iterator[List[Any]]:
+    yield first
+    yield from rest
+
+
+def _drain_one(pending: Deque[Tuple[int, Future]], write, progress: _Progress) -> None:
+    count, future = pending.popleft()
+    out, chars, entities = future.result()
+    write(out)
+    progress.add(count, chars, entities)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Anonymize files or stdin with the PII pipeline")
+    parser.add_argument("inputs", nargs="*", help="Input files; '-' or none for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output file; '-' for stdout")
+    parser.add_argument("--format", choices=FORMATS, default="txt")
+    parser.add_argument("--field", default="text", help="Dotted field path for JSONL records")
+    parser.add_argument("--columns", help="Comma-separated CSV columns to anonymize (default: all)")
+    parser.add_argument("--language", help="'ru' or 'en'; detected per record if omitted")
+    parser.add_argument("--policy", default="default", choices=sorted(NAMED_POLICIES))
+    parser.add_argument("--policy-file", help="JSON policy applied on top of --policy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=64, help="Records per worker task")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds; 0 disables")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    policy = get_named_policy(args.policy)
+    if args.policy_file:
+        with open(args.policy_file, "r", encoding="utf-8") as fh:
+            policy.update(json.load(fh))
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        run(
+            args.inputs,
+            output,
+            fmt=args.format,
+            field=args.field,
+            columns=args.columns.split(",") if args.columns else None,
+            language=args.language,
+            policy=policy,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            progress_interval=args.progress_interval,
+        )
+    except ValueError as exc:
+        parser.exit(2, f"error: {exc}\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Length-prefixed msgpack transport over a Unix socket.
+
+Every frame is a 4-byte big-endian length followed by a msgpack map. Requests
+look like ``{"id": 1, "method": "analyze", "params": {...}}``; responses echo the
+``id`` and carry either ``result`` or ``error``. Batch methods analyze
+``STREAM_CHUNK`` documents at a time and stream one frame per document (with
+its ``index``) as soon as it is ready, followed by ``{"id": ..., "done": true}``.
+
+Requests go through the same admission control, size/time budgets and
+profiles as the HTTP endpoints; an optional top-level ``api_key`` plays the
+role of the ``X-API-Key`` header.
+
+Run with ``python -m app.interface.framed --socket /tmp/pii.sock``.
+"""
+
+import argparse
+import asyncio
+import logging
+import socket
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import msgpack
+from fastapi import HTTPException
+from presidio_analyzer import RecognizerResult
+
+from app.application.budget import Budget, BudgetExceeded, Deadline, check_deadline, get_budget
+from app.application.lang_detect import LanguageDetection
+from app.application.service import analyze_chunked, analyze_text, analyze_texts, anonymize_results
+from app.interface.admission import get_admission, request_cost
+from app.interface.responses import LAYOUTS, serialize_results
+
+logger = logging.getLogger(__name__)
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+# Documents per nlp.pipe call in batch methods; bounds the memory held per stream
+STREAM_CHUNK = 16
+_HEADER = struct.Struct(">I")
+
+
+class FrameError(Exception):
+    """Raised when a frame is malformed or exceeds ``MAX_FRAME_BYTES``."""
+
+
+class MalformedFrame(FrameError):
+    """A complete frame whose payload is not a msgpack map; the stream stays in sync."""
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = msgpack.packb(message, use_bin_type=True)
+    if len(payload) > MAX_FRAME_BYTES:
+        raise FrameError(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME_BYTES}")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    try:
+        message = msgpack.unpackb(payload, raw=False)
+    except Exception as exc:
+        raise MalformedFrame(f"Invalid msgpack payload: {exc}") from exc
+    if not isinstance(message, dict):
+        raise MalformedFrame("Frame payload must be a map")
+    return message
+
+
+def _layout(params: Dict[str, Any]) -> str:
+    layout = params.get("layout", "items")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unsupported layout '{layout}'. Use one of {LAYOUTS}")
+    return layout
+
+
+def _oversize(text: str, budget: Budget, index: Optional[int] = None) -> HTTPException:
+    what = "Text" if index is None else f"Text {index}"
+    return HTTPException(
+        status_code=413, detail=f"{what} has {len(text)} chars, the limit is {budget.max_chars}"
+    )
+
+
+def _analyze_one(
+    text: str, params: Dict[str, Any], budget: Budget, deadline: Optional[Deadline]
+) -> Tuple[str, LanguageDetection, List[RecognizerResult], Dict[str, Any]]:
+    """Apply the size budget like the HTTP ``_analyze``, then analyze one text."""
+
+    flags: Dict[str, Any] = {}
+    language, profile = params.get("language"), params.get("profile")
+    if budget.max_chars and len(text) > budget.max_chars:
+        if budget.oversize_policy == "truncate":
+            flags.update(truncated=True, original_chars=len(text))
+            text = text[:budget.max_chars]
+        elif budget.oversize_policy == "chunk":
+            flags.update(chunked=True)
+            return (text, *analyze_chunked(text, budget.max_chars, language, deadline, profile), flags)
+        else:
+            raise _oversize(text, budget)
+    return (text, *analyze_text(text, language, deadline, profile), flags)
+
+
+def _shape(
+    text: str, results: List[RecognizerResult], layout: str, budget: Budget, flags: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Serialize results, capped at ``max_entities``; anonymization still uses all of them."""
+
+    if budget.max_entities and len(results) > budget.max_entities:
+        flags = {**flags, "entities_truncated": True, "total_entities": len(results)}
+        results = results[:budget.max_entities]
+    body = serialize_results(text, results, layout)
+    if flags:
+        body["budget"] = flags
+    return body
+
+
+def _analyze(params: Dict[str, Any]) -> Dict[str, Any]:
+    budget = get_budget("analyze")
+    layout = _layout(params)
+    text, detection, results, flags = _analyze_one(params["text"], params, budget, budget.deadline())
+    return {"language": detection.language, **_shape(text, results, layout, budget, flags)}
+
+
+def _anonymize(params: Dict[str, Any]) -> Dict[str, Any]:
+    budget = get_budget("anonymize")
+    layout = _layout(params)
+    text, detection, results, flags = _analyze_one(params["text"], params, budget, budget.deadline())
+    return {
+        "language": detection.language,
+        "text": anonymize_results(text, results, params.get("policy"), params.get("profile")),
+        **_shape(text, results, layout, budget, flags),
+    }
+
+
+def _analyze_documents(
+    params: Dict[str, Any], budget: Budget
+) -> Iterator[Tuple[str, LanguageDetection, List[RecognizerResult], Dict[str, Any]]]:
+    """Analyze ``params["texts"]`` in ``STREAM_CHUNK`` pieces under one budget.
+
+    Oversized texts are rejected before anything is analyzed, truncated, or
+    analyzed on their own in chunks, as ``oversize_policy`` says; the deadline
+    covers the whole batch and is checked before each piece.
+    """
+
+    texts = params["texts"]
+    if not isinstance(texts, list):
+        raise TypeError("'texts' must be a list")
+    limit = budget.max_chars
+    if limit and budget.oversize_policy == "reject":
+        for index, text in enumerate(texts):
+            if len(text) > limit:
+                raise _oversize(text, budget, index)
+    deadline = budget.deadline()
+    language, profile = params.get("language"), params.get("profile")
+    for start in range(0, len(texts), STREAM_CHUNK):
+        check_deadline(deadline, "batch")
+        chunk = texts[start:start + STREAM_CHUNK]
+        fits = [not limit or len(text) <= limit or budget.oversize_policy == "truncate" for text in chunk]
+        pooled = iter(analyze_texts([t[:limit] if limit else t for t, ok in zip(chunk, fits) if ok], language, profile))
+        for text, ok in zip(chunk, fits):
+            if not ok:
+                yield _analyze_one(text, params, budget, deadline)
+                continue
+            flags: Dict[str, Any] = {}
+            if limit and len(text) > limit:
+                flags.update(truncated=True, original_chars=len(text))
+                text = text[:limit]
+            yield (text, *next(pooled), flags)
+
+
+def _analyze_batch(params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    budget = get_budget("analyze")
+    layout = _layout(params)
+    for text, detection, results, flags in _analyze_documents(params, budget):
+        yield {"language": detection.language, **_shape(text, results, layout, budget, flags)}
+
+
+def _anonymize_batch(params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    budget = get_budget("anonymize")
+    layout = _layout(params)
+    policy, profile = params.get("policy"), params.get("profile")
+    for text, detection, results, flags in _analyze_documents(params, budget):
+        yield {
+            "language": detection.language,
+            "text": anonymize_results(text, results, policy, profile),
+            **_shape(text, results, layout, budget, flags),
+        }
+
+
+UNARY_METHODS = {"analyze": _analyze, "anonymize": _anonymize}
+STREAMING_METHODS = {"analyze_batch": _analyze_batch, "anonymize_batch": _anonymize_batch}
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise FrameError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return decode_payload(await reader.readexactly(length))
+
+
+def _error_frame(req_id: Any, code: int, message: str, retry_after: Optional[str] = None) -> bytes:
+    error: Dict[str, Any] = {"code": code, "message": message}
+    if retry_after is not None:
+        error["retry_after"] = int(retry_after)
+    return encode_frame({"id": req_id, "error": error})
+
+
+def _client_key(message: Dict[str, Any]) -> str:
+    api_key = message.get("api_key")
+    return f"key:{api_key}" if api_key else "framed"
+
+
+def _request_chars(params: Dict[str, Any]) -> int:
+    texts = params.get("texts")
+    if not isinstance(texts, list):
+        texts = [params.get("text")]
+    return sum(len(text) for text in texts if isinstance(text, str))
+
+
+_DONE = object()
+
+
+async def _dispatch(message: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+    req_id = message.get("id")
+    method = message.get("method")
+    params = message.get("params") or {}
+
+    if method not in UNARY_METHODS and method not in STREAMING_METHODS:
+        writer.write(_error_frame(req_id, 404, f"Unknown method '{method}'"))
+        await writer.drain()
+        return
+
+    try:
+        with get_admission().admit(_client_key(message), request_cost(_request_chars(params))):
+            if method in UNARY_METHODS:
+                result = await asyncio.to_thread(UNARY_METHODS[method], params)
+                writer.write(encode_frame({"id": req_id, "result": result}))
+            else:
+                # One thread hop per document, so each frame goes out as soon as it is ready
+                results = STREAMING_METHODS[method](params)
+                index = 0
+                while (result := await asyncio.to_thread(next, results, _DONE)) is not _DONE:
+                    writer.write(encode_frame({"id": req_id, "index": index, "result": result}))
+                    await writer.drain()
+                    index += 1
+                writer.write(encode_frame({"id": req_id, "done": True, "count": index}))
+    except HTTPException as exc:
+        retry_after = (exc.headers or {}).get("Retry-After")
+        writer.write(_error_frame(req_id, exc.status_code, exc.detail, retry_after))
+    except BudgetExceeded as exc:
+        writer.write(_error_frame(req_id, 503, str(exc)))
+    except (KeyError, TypeError, ValueError) as exc:
+        writer.write(_error_frame(req_id, 400, str(exc)))
+    except Exception as exc:
+        logger.exception("Framed method %s failed", method)
+        writer.write(_error_frame(req_id, 500, f"Internal error: {type(exc).__name__}"))
+    await writer.drain()
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Serve requests from one connection in order until the peer disconnects."""
+
+    try:
+        while True:
+            try:
+                message = await _read_frame(reader)
+            except MalformedFrame as exc:
+                # The frame was read whole, so the connection can go on
+                writer.write(_error_frame(None, 400, str(exc)))
+                await writer.drain()
+                continue
+            if message is None:
+                break
+            await _dispatch(message, writer)
+    except FrameError as exc:
+        logger.warning("Closing framed connection: %s", exc)
+        writer.write(_error_frame(None, 413, str(exc)))
+    except (ConnectionError, asyncio.IncompleteReadError) as exc:
+        logger.warning("Closing framed connection: %s", exc)
+    except Exception as exc:
+        logger.exception("Closing framed connection after an internal error")
+        writer.write(_error_frame(None, 500, f"Internal error: {type(exc).__name__}"))
+    finally:
+        writer.close()
+
+
+async def serve(path: str) -> None:
+    server = await asyncio.start_unix_server(handle_connection, path=path, limit=MAX_FRAME_BYTES)
+    logger.info("Framed msgpack transport listening on %s", path)
+    async with server:
+        await server.serve_forever()
+
+
+class FramedClient:
+    """Blocking client for the framed transport, mainly for tests and scripts."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._next_id = 0
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> "FramedClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _recv_exactly(self, size: int) -> bytes:
+        chunks, remaining = [], size
+        while remaining:
+            chunk = self._sock.recv(remaining)
+            if not chunk:
+                raise ConnectionError("Framed server closed the connection")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def _send(self, method: str, params: Dict[str, Any]) -> int:
+        self._next_id += 1
+        message = {"id": self._next_id, "method": method, "params": params}
+        if self.api_key:
+            message["api_key"] = self.api_key
+        self._sock.sendall(encode_frame(message))
+        return self._next_id
+
+    def _recv(self) -> Dict[str, Any]:
+        (length,) = _HEADER.unpack(self._recv_exactly(_HEADER.size))
+        return decode_payload(self._recv_exactly(length))
+
+    def call(self, method: str, **params: Any) -> Dict[str, Any]:
+        """Send a unary request and return its ``result``; raises ``RuntimeError`` on errors."""
+
+        self._send(method, params)
+        response = self._recv()
+        if "error" in response:
+            raise RuntimeError(response["error"]["message"])
+        return response["result"]
+
+    def stream(self, method: str, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Send a batch request and yield per-document results as they arrive."""
+
+        self._send(method, params)
+        while True:
+            response = self._recv()
+            if "error" in response:
+                raise RuntimeError(response["error"]["message"])
+            if response.get("done"):
+                return
+            yield response["result"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the PII pipeline over a framed Unix socket")
+    parser.add_argument("--socket", default="/tmp/pii.sock", help="Unix socket path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
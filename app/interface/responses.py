@@ -0,0 +1,50 @@
+"""Response serialization helpers for the HTTP API."""
+
+import importlib.util
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from presidio_analyzer import RecognizerResult
+
+# ORJSONResponse needs the optional orjson package; plain JSON otherwise.
+FastJSONResponse = ORJSONResponse if importlib.util.find_spec("orjson") else JSONResponse
+
+
+LAYOUTS = ("items", "offsets", "columnar")
+
+
+def serialize_results(text: str, results: List[RecognizerResult], layout: str = "items") -> Dict[str, Any]:
+    """Shape analyzer results for a response.
+
+    ``items`` returns one dict per entity with the matched substring, ``offsets``
+    omits the substring, and ``columnar`` returns parallel arrays under ``columns``.
+    """
+
+    if layout == "columnar":
+        return {
+            "columns": {
+                "entity_type": [r.entity_type for r in results],
+                "start": [r.start for r in results],
+                "end": [r.end for r in results],
+                "score": [float(r.score) for r in results],
+            }
+        }
+    if layout == "offsets":
+        return {
+            "items": [
+                {"entity_type": r.entity_type, "start": r.start, "end": r.end, "score": float(r.score)}
+                for r in results
+            ]
+        }
+    return {
+        "items": [
+            {
+                "entity_type": r.entity_type,
+                "start": r.start,
+                "end": r.end,
+                "text": text[r.start:r.end],
+                "score": float(r.score),
+            }
+            for r in results
+        ]
+    }
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.interface import admission as admission_module
+from app.interface.admission import AdmissionController, request_cost
+
+
+def test_request_cost_scales_with_text_size():
+    assert request_cost(0, chars_per_unit=1000) == 1.0
+    assert request_cost(5000, chars_per_unit=1000) == 6.0
+
+
+def test_token_bucket_limits_each_client_separately():
+    controller = AdmissionController(target_latency_ms=0, rate=0.001, burst=2)
+
+    for _ in range(2):
+        with controller.admit("key:a", 1.0):
+            pass
+    with pytest.raises(HTTPException) as exc:
+        with controller.admit("key:a", 1.0):
+            pass
+    with controller.admit("key:b", 1.0):
+        pass
+
+    assert exc.value.status_code == 429
+    assert "Retry-After" in exc.value.headers
+    assert controller.stats()["rate_limited"] == 1
+
+
+def test_requests_over_the_inflight_limit_are_shed():
+    controller = AdmissionController(target_latency_ms=1000, initial_limit=2, min_limit=1)
+
+    with controller.admit("a", 1.5):
+        with pytest.raises(HTTPException) as exc:
+            with controller.admit("b", 1.0):
+                pass
+    # An idle node admits even a request above the limit
+    with controller.admit("c", 10.0):
+        pass
+
+    assert exc.value.status_code == 503
+    assert controller.stats()["shed"] == 1
+
+
+def test_limit_decreases_on_slow_requests_and_recovers_on_fast_ones():
+    controller = AdmissionController(target_latency_ms=1000, initial_limit=10, min_limit=1, max_limit=20)
+
+    controller._record(cost=1.0, elapsed=5.0)
+    assert controller.limit == pytest.approx(9.0)
+
+    controller._record(cost=1.0, elapsed=0.01)
+    assert controller.limit == pytest.approx(9.0 + 1 / 9.0)
+
+
+def test_endpoint_returns_429_and_health_stays_available(client, monkeypatch):
+    monkeypatch.setattr(admission_module, "_admission", AdmissionController(target_latency_ms=0, rate=0.001, burst=1))
+
+    first = client.post("/analyze", json={"text": "hello", "language": "en"}, headers={"X-API-Key": "t"})
+    second = client.post("/analyze", json={"text": "hello", "language": "en"}, headers={"X-API-Key": "t"})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    health = client.get("/health").json()
+    assert health["admission"]["rate_limited"] == 1
+    assert client.get("/ready").status_code == 200
+
+
+def test_job_submissions_are_rate_limited(client, monkeypatch, tmp_path):
+    import app.application.jobs as jobs_module
+    from app.infrastructure.jobs import JobStore
+
+    monkeypatch.setattr(jobs_module, "_store", JobStore(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(admission_module, "_admission", AdmissionController(target_latency_ms=0, rate=0.001, burst=1))
+    headers = {"X-API-Key": "jobs"}
+
+    assert client.post("/jobs", json={"text": "hello", "language": "en"}, headers=headers).status_code == 202
+    assert client.post("/jobs", json={"text": "hello", "language": "en"}, headers=headers).status_code == 429
+    assert client.post("/jobs/raw?language=en", content=b"hello", headers=headers).status_code == 429
+    assert jobs_module._store.counts() == {"queued": 1}
+
+
+def test_health_queries_stores_off_the_event_loop(client, monkeypatch):
+    import app.interface.api as api
+
+    def off_loop(fn):
+        def wrapper():
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            return fn()
+        return wrapper
+
+    monkeypatch.setattr(api, "runtime_status", off_loop(api.runtime_status))
+    monkeypatch.setattr(api, "job_status", off_loop(api.job_status))
+    assert client.get("/health").status_code == 200
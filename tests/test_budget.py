@@ -0,0 +1,103 @@
+import pytest
+
+from app.application import budget as budget_module
+from app.application.budget import Budget, BudgetExceeded, Deadline, split_chunks
+from app.application.service import analyze_chunked, analyze_text
+
+TEXT = (
+    "Иванов Иван Иванович, паспорт 4012 345678.\n"
+    "ИНН 7736050003, телефон +7 (912) 000-00-00.\n"
+    "Письмо отправить на ivan.ivanov@example.com\n"
+)
+
+
+def _set_budget(monkeypatch, endpoint, **cfg):
+    monkeypatch.setitem(budget_module.REQUEST_BUDGETS, endpoint, cfg)
+
+
+def test_split_chunks_prefers_line_breaks_and_covers_text():
+    chunks = split_chunks(TEXT, 60)
+
+    assert "".join(chunk for _, chunk in chunks) == TEXT
+    assert all(len(chunk) <= 60 for _, chunk in chunks)
+    assert all(chunk.endswith("\n") for _, chunk in chunks)
+    for offset, chunk in chunks:
+        assert TEXT[offset:offset + len(chunk)] == chunk
+
+
+def test_unknown_oversize_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Budget(oversize_policy="drop")
+
+
+def test_deadline_raises_between_stages():
+    with pytest.raises(BudgetExceeded) as exc:
+        analyze_text(TEXT, "ru", deadline=Deadline(-1))
+    assert exc.value.stage == "language_detection"
+
+
+def _spans(results):
+    return sorted((r.entity_type, r.start, r.end) for r in results)
+
+
+def test_chunked_analysis_matches_full_analysis():
+    _, chunked = analyze_chunked(TEXT, 60, "ru")
+    _, full = analyze_text(TEXT, "ru")
+
+    assert _spans(chunked) == _spans(full)
+
+
+def test_oversize_reject_truncate_and_chunk(client, monkeypatch):
+    payload = {"text": TEXT, "language": "ru"}
+
+    _set_budget(monkeypatch, "analyze", max_chars=60, oversize_policy="reject")
+    assert client.post("/analyze", json=payload).status_code == 413
+
+    _set_budget(monkeypatch, "analyze", max_chars=60, oversize_policy="truncate")
+    truncated = client.post("/analyze", json=payload).json()
+    assert truncated["budget"] == {"truncated": True, "original_chars": len(TEXT)}
+    assert all(item["end"] <= 60 for item in truncated["items"])
+
+    _set_budget(monkeypatch, "analyze", max_chars=60, oversize_policy="chunk", max_entities=1)
+    chunked = client.post("/analyze", json=payload).json()
+    assert chunked["budget"]["chunked"] and chunked["budget"]["entities_truncated"]
+    assert len(chunked["items"]) == 1
+
+
+def test_anonymize_masks_everything_even_when_listing_is_capped(client, monkeypatch):
+    _set_budget(monkeypatch, "anonymize", max_entities=1)
+
+    body = client.post("/anonymize", json={"text": TEXT, "language": "ru"}).json()
+
+    assert len(body["items"]) == 1
+    assert "ivan.ivanov@example.com" not in body["text"]
+    assert "7736050003" not in body["text"]
+
+
+def test_time_budget_returns_503(client, monkeypatch):
+    _set_budget(monkeypatch, "analyze", max_ms=0.000001)
+
+    resp = client.post("/analyze", json={"text": TEXT, "language": "ru"})
+
+    assert resp.status_code == 503
+    assert "budget" in resp.json()["detail"]
+
+
+def test_oversized_body_is_rejected_before_parsing(client, monkeypatch):
+    _set_budget(monkeypatch, "analyze", max_chars=10, oversize_policy="reject")
+    # Not even valid JSON: the size guard answers before the body is parsed
+    body = b"{" + b"x" * 200_000
+
+    resp = client.post("/analyze", content=body, headers={"Content-Type": "application/json"})
+    assert resp.status_code == 413
+
+    chunked = client.post(
+        "/analyze", content=iter([body[:100_000], body[100_000:]]), headers={"Content-Type": "application/json"}
+    )
+    assert chunked.status_code == 413
+
+    small = client.post("/analyze", content=iter([b'{"text": "hello", ', b'"language": "en"}']))
+    assert small.status_code == 200
+
+    _set_budget(monkeypatch, "analyze", max_chars=10, oversize_policy="truncate")
+    assert client.post("/analyze", content=body, headers={"Content-Type": "application/json"}).status_code == 422
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+import spacy
+from presidio_analyzer.nlp_engine.spacy_nlp_engine import SpacyNlpEngine
+
+import app.application.cascade as cascade
+import app.application.service as service
+from app.application.cascade import cascade_stats, check_engine, plan_ner, process_texts, recall_report, sentence_signal
+
+
+def _engine_with_ruler():
+    """Blank pipeline whose "ner" component is an entity ruler, so skipping it is observable."""
+
+    nlp = spacy.blank("ru")
+    ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([{"label": "PER", "pattern": "Петров"}, {"label": "PER", "pattern": "петров"}])
+    engine = SpacyNlpEngine(models=[{"lang_code": "ru", "model_name": "blank_ru"}])
+    engine.nlp = {"ru": nlp}
+    return engine
+
+
+def test_sentence_signals():
+    # a surname counts even at the start of a sentence
+    assert sentence_signal("Петров передал документы") == "surname_suffix"
+    assert sentence_signal("Договор с ООО на поставку") == "context"
+    assert sentence_signal("Meeting with Alice tomorrow") == "capitalized"
+    # sentence-initial capitals and log-style upper case are not signals
+    assert sentence_signal("Ошибка ERROR код 500 user_id=42") is None
+
+
+def test_plan_by_document_and_sentence():
+    text = "Статус заказа 42 обновлён. Курьер Петров выехал.\nОплата получена."
+
+    assert plan_ner(text, "document") is None
+    assert plan_ner("заказ 42 обновлён. оплата получена.", "document") == []
+    assert plan_ner(text, "sentence") == [(27, 48)]
+
+
+def test_sentence_mode_runs_ner_only_on_flagged_sentences():
+    engine = _engine_with_ruler()
+    text = "задача петров закрыта. Исполнитель Петров доволен."
+
+    artifacts = process_texts(engine, [text], "ru", "sentence")[0]
+
+    # the lower-case mention is in an unflagged sentence, so the ruler never sees it
+    assert [(e.start_char, e.text) for e in artifacts.entities] == [(35, "Петров")]
+    assert [t.text for t in artifacts.tokens] == [t.text for t in spacy.blank("ru")(text)]
+
+
+def test_analyze_with_cascade_keeps_pattern_results_and_counts(monkeypatch):
+    text = "почта ivan.ivanov@example.com, код 500"
+    _, expected = service.analyze_text(text, "ru")
+
+    monkeypatch.setattr(service, "NER_CASCADE", "sentence")
+    before = cascade_stats("sentence")
+    _, results = service.analyze_text(text, "ru")
+    after = cascade_stats("sentence")
+
+    assert [(r.start, r.end, r.entity_type) for r in results] == [(r.start, r.end, r.entity_type) for r in expected]
+    assert after["skipped_documents"] == before["skipped_documents"] + 1
+    assert service.runtime_status()["cascade"]["mode"] == "sentence"
+
+
+def test_recall_report():
+    report = recall_report(["почта ivan.ivanov@example.com", "Звонил Петров вчера"], "ru", "sentence")
+
+    assert report["documents"] == 2 and report["documents_with_ner"] == 1
+    assert report["recall"] == 1.0 and report["missed"] == {}
+
+
+def test_invalid_mode_fails_startup(monkeypatch):
+    import app.interface.api as api
+
+    monkeypatch.setattr(api, "NER_CASCADE", "sentences")
+
+    async def start():
+        async with api.lifespan(api.app):
+            pass
+
+    with pytest.raises(ValueError, match="Unsupported NER_CASCADE"):
+        asyncio.run(start())
+
+
+def test_engine_conversion_is_pinned(monkeypatch):
+    engine = _engine_with_ruler()
+    check_engine(engine)
+    artifacts = engine._doc_to_nlp_artifact(engine.nlp["ru"]("Петров"), "ru")
+    assert [e.text for e in artifacts.entities] == ["Петров"]
+
+    class Renamed(SpacyNlpEngine):
+        _doc_to_nlp_artifact = None
+
+    with pytest.raises(RuntimeError, match="NER_CASCADE=off"):
+        check_engine(Renamed(models=[{"lang_code": "ru", "model_name": "blank_ru"}]))
+
+    warnings = []
+    monkeypatch.setattr(cascade, "version", lambda _name: "3.0.0")
+    monkeypatch.setattr(cascade.logger, "warning", lambda msg, *args: warnings.append(msg % args))
+    check_engine(engine)
+    assert warnings and "untested with presidio-analyzer 3.0.0" in warnings[0]
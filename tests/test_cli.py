@@ -0,0 +1,85 @@
+import io
+import json
+
+import pytest
+
+import app.infrastructure.vault as vault_module
+from app.infrastructure.policies import get_named_policy
+from app.interface.cli import main, run
+
+EMAIL = "ivan.ivanov@example.com"
+
+
+def _run(tmp_path, content: str, **kwargs) -> str:
+    src = tmp_path / "input"
+    src.write_text(content, encoding="utf-8")
+    out = io.StringIO()
+    summary = run([str(src)], out, language="ru", progress_stream=io.StringIO(), **kwargs)
+    assert summary["records"] > 0
+    return out.getvalue()
+
+
+def test_txt_lines_keep_order_across_workers(tmp_path):
+    lines = [f"строка {i} без данных\n" if i % 3 else f"строка {i}: {EMAIL}\n" for i in range(40)]
+
+    out = _run(tmp_path, "".join(lines), workers=2, batch_size=3).splitlines(keepends=True)
+
+    assert len(out) == len(lines)
+    assert all(a == b for a, b in zip(out, lines) if EMAIL not in b)
+    assert EMAIL not in "".join(out)
+
+
+def test_jsonl_field_path_and_named_policy(tmp_path):
+    records = [
+        {"id": 1, "payload": {"text": f"пишите на {EMAIL}", "other": EMAIL}},
+        {"id": 2, "payload": {}},
+    ]
+    content = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+    out = [json.loads(line) for line in _run(
+        tmp_path, content, fmt="jsonl", field="payload.text", policy=get_named_policy("redact")
+    ).splitlines()]
+
+    assert out[0]["payload"] == {"text": "пишите на ", "other": EMAIL}
+    assert out[1] == records[1]
+
+
+def test_csv_selected_columns(tmp_path):
+    content = f"name,email,note\nИванов,{EMAIL},{EMAIL}\n"
+
+    out = _run(tmp_path, content, fmt="csv", columns=["email"]).splitlines()
+
+    assert out[0] == "name,email,note"
+    name, email, note = out[1].split(",")
+    assert EMAIL not in email and note == EMAIL
+
+    with pytest.raises(ValueError):
+        _run(tmp_path, content, fmt="csv", columns=["missing"])
+
+
+def test_main_writes_output_file(tmp_path, capsys):
+    src = tmp_path / "in.txt"
+    src.write_text(f"{EMAIL}\n", encoding="utf-8")
+    dst = tmp_path / "out.txt"
+
+    main([str(src), "-o", str(dst), "--workers", "1", "--language", "ru", "--policy", "mask"])
+
+    assert dst.read_text(encoding="utf-8") == "*" * len(EMAIL) + "\n"
+    assert '"records": 1' in capsys.readouterr().err
+
+    with pytest.raises(ValueError):
+        get_named_policy("nope")
+
+
+def test_pseudonyms_match_across_workers(tmp_path, monkeypatch):
+    # Forked workers must not inherit a vault: each creates its own from the shared key
+    monkeypatch.setattr(vault_module, "_vault", None)
+    monkeypatch.setattr(vault_module, "PSEUDONYM_KEY", "")
+    lines = [f"строка {i}: {EMAIL}\n" for i in range(12)]
+
+    out = _run(
+        tmp_path, "".join(lines), workers=3, batch_size=1, policy=get_named_policy("pseudonymize")
+    ).splitlines()
+
+    tokens = {line.split(": ", 1)[1] for line in out}
+    assert len(tokens) == 1 and EMAIL not in tokens.pop()
@@ -0,0 +1,128 @@
+import copy
+import random
+import time
+
+from presidio_analyzer import RecognizerResult
+from presidio_anonymizer import AnonymizerEngine
+
+from app.application.fast_anonymizer import compile_policy, fast_anonymize
+from app.application.service import analyze_text
+from app.infrastructure.policies import NAMED_POLICIES, get_default_policy, to_operator_config
+
+TYPES = ["PERSON", "EMAIL_ADDRESS", "PHONE_NUMBER", "UNKNOWN_TYPE"]
+
+POLICIES = {
+    "default": get_default_policy(),
+    "mask": {**get_default_policy(), **NAMED_POLICIES["mask"]},
+    "redact": {**get_default_policy(), **NAMED_POLICIES["redact"]},
+    "mixed": {
+        "PERSON": {"type": "mask", "masking_char": "#", "chars_to_mask": 3, "from_end": True},
+        "EMAIL_ADDRESS": {"type": "replace", "new_value": ""},
+        "PHONE_NUMBER": {"type": "keep"},
+        "DEFAULT": {"type": "replace", "new_value": "<X>"},
+    },
+}
+
+CORPUS = [
+    "Пишите на ivan.ivanov@example.com или звоните +7 912 345-67-89, ИНН 500100732259",
+    "Contact John Smith at john.smith@example.com, card 4111 1111 1111 1111",
+    "СНИЛС 112-233-445 95, паспорт 4510 123456, счёт 40817810099910004312",
+]
+
+
+def _presidio(text, results, policy):
+    out = AnonymizerEngine().anonymize(text=text, analyzer_results=results, operators=to_operator_config(policy))
+    return out.text
+
+
+def _assert_same(text, results, policy):
+    fast_results, slow_results = copy.deepcopy(results), copy.deepcopy(results)
+    fast = fast_anonymize(text, fast_results, compile_policy(policy))
+    expected = _presidio(text, slow_results, policy)
+    if fast is None:
+        return False
+    assert fast[0] == expected
+    # Presidio moves the start of whitespace-merged results; so must we
+    assert [(r.start, r.end) for r in fast_results] == [(r.start, r.end) for r in slow_results]
+    return True
+
+
+def test_matches_presidio_on_corpus():
+    for text in CORPUS:
+        _, results = analyze_text(text)
+        for policy in POLICIES.values():
+            assert _assert_same(text, results, policy) or not results
+
+
+def test_matches_presidio_on_random_spans():
+    rng = random.Random(7)
+    fast_paths = 0
+    for _ in range(2000):
+        text = "".join(rng.choice("ab  \n") for _ in range(rng.randint(1, 40)))
+        results = []
+        for _ in range(rng.randint(0, 6)):
+            start = rng.randrange(len(text))
+            end = rng.randint(start + 1, min(len(text), start + 8))
+            results.append(RecognizerResult(rng.choice(TYPES), start, end, rng.choice([0.3, 0.5, 0.85])))
+        for policy in POLICIES.values():
+            fast_paths += _assert_same(text, results, policy)
+    assert fast_paths > 3000
+
+
+def test_whitespace_neighbours_and_equal_spans():
+    text = "Иван  Петров и ещё"
+    results = [
+        RecognizerResult("PERSON", 0, 4, 0.85),
+        RecognizerResult("PERSON", 6, 12, 0.85),
+        RecognizerResult("LOCATION", 6, 12, 0.85),
+        RecognizerResult("EMAIL_ADDRESS", 1, 3, 0.9),
+    ]
+    for policy in POLICIES.values():
+        assert _assert_same(text, results, policy)
+
+
+def test_falls_back_without_touching_results():
+    text = "Иван Петров"
+    overlapping = [RecognizerResult("PERSON", 0, 6, 0.8), RecognizerResult("PERSON", 3, 11, 0.8)]
+    assert fast_anonymize(text, overlapping, compile_policy(get_default_policy())) is None
+    assert (overlapping[1].start, overlapping[1].end) == (3, 11)
+
+    hashed = {**get_default_policy(), "PERSON": {"type": "hash"}}
+    assert fast_anonymize(text, [RecognizerResult("PERSON", 0, 4, 0.8)], compile_policy(hashed)) is None
+
+    pseudo = compile_policy({**get_default_policy(), **NAMED_POLICIES["pseudonymize"]})
+    assert fast_anonymize(text, [RecognizerResult("PERSON", 0, 4, 0.8)], pseudo) is None
+
+    bad_mask = {"PERSON": {"type": "mask", "masking_char": "**", "chars_to_mask": 2, "from_end": False}}
+    assert fast_anonymize(text, [RecognizerResult("PERSON", 0, 4, 0.8)], compile_policy(bad_mask)) is None
+
+
+# Measured 40-75x on this text (500 adjacent emails, best of 5, one core); the
+# asserted floor leaves close to an order of magnitude for noisy CI runners
+MIN_SPEEDUP = 5.0
+
+
+def test_faster_than_presidio_on_dense_text():
+    words = [f"user{i}@example.com" for i in range(500)]
+    text = " , ".join(words)
+    results, pos = [], 0
+    for word in words:
+        results.append(RecognizerResult("EMAIL_ADDRESS", pos, pos + len(word), 1.0))
+        pos += len(word) + 3
+    policy = get_default_policy()
+
+    def best_of(run, repeats=5):
+        # The fastest of several runs is the least sensitive to a busy machine
+        timings = []
+        for _ in range(repeats):
+            spans = copy.deepcopy(results)
+            started = time.perf_counter()
+            output = run(spans)
+            timings.append(time.perf_counter() - started)
+        return output, min(timings)
+
+    fast, fast_s = best_of(lambda spans: fast_anonymize(text, spans, compile_policy(policy)))
+    expected, slow_s = best_of(lambda spans: _presidio(text, spans, policy))
+
+    assert fast is not None and fast[0] == expected
+    assert slow_s / fast_s >= MIN_SPEEDUP, f"fast path is only {slow_s / fast_s:.1f}x faster than Presidio"
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import app.interface.admission as admission_module
+import app.interface.framed as framed
+from app.application.budget import Budget
+from app.interface.admission import AdmissionController
+from app.interface.framed import _HEADER, FramedClient, serve
+
+
+@pytest.fixture(scope="module")
+def socket_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("framed") / "pii.sock")
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(serve(path))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            FramedClient(path).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield path
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(timeout=5)
+
+
+def test_analyze_and_anonymize_over_socket(socket_path):
+    text = "Contact me at +7 (912) 000-00-00 for details"
+
+    with FramedClient(socket_path, timeout=30) as client:
+        analyzed = client.call("analyze", text=text, language="en")
+        anonymized = client.call("anonymize", text=text, language="en", layout="offsets")
+
+    assert analyzed["language"] == "en"
+    assert any(item["entity_type"] in {"PHONE_NUMBER_RU", "PHONE_NUMBER"} for item in analyzed["items"])
+    assert "+7 (912) 000-00-00" not in anonymized["text"]
+    assert all("text" not in item for item in anonymized["items"])
+
+
+def test_batch_streams_one_frame_per_document(socket_path):
+    texts = ["email john.doe@example.com", "Иван Иванов, телефон +7 (912) 000-00-00", "nothing here"]
+
+    with FramedClient(socket_path, timeout=30) as client:
+        results = list(client.stream("anonymize_batch", texts=texts))
+
+    assert len(results) == 3
+    assert [r["language"] for r in results] == ["en", "ru", "en"]
+    assert "john.doe@example.com" not in results[0]["text"]
+    assert results[2]["text"] == "nothing here"
+
+
+def test_errors_are_returned_as_frames(socket_path):
+    with FramedClient(socket_path, timeout=30) as client:
+        with pytest.raises(RuntimeError, match="Unsupported language"):
+            client.call("analyze", text="hello", language="de")
+        with pytest.raises(RuntimeError, match="Unknown method"):
+            client.call("translate", text="hello")
+        # The connection stays usable after an error
+        assert client.call("analyze", text="hello", language="en")["items"] == []
+
+
+def test_batch_frames_are_sent_as_documents_finish(socket_path, monkeypatch):
+    monkeypatch.setattr(framed, "STREAM_CHUNK", 1)
+    texts = ["email john.doe@example.com", "nothing here"]
+
+    with FramedClient(socket_path, timeout=30) as client:
+        stream = client.stream("analyze_batch", texts=texts, language="en")
+        first = next(stream)
+        assert first["items"]
+        assert len(list(stream)) == 1
+
+
+def test_malformed_and_failing_requests_get_error_frames(socket_path, monkeypatch):
+    def explode(params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(framed.UNARY_METHODS, "analyze", explode)
+    with FramedClient(socket_path, timeout=30) as client:
+        payload = b"\xc1not msgpack"
+        client._sock.sendall(_HEADER.pack(len(payload)) + payload)
+        assert client._recv()["error"]["code"] == 400
+
+        with pytest.raises(RuntimeError, match="Internal error"):
+            client.call("analyze", text="hello", language="en")
+        # Neither error closes the connection
+        assert client.call("anonymize", text="hello", language="en")["text"] == "hello"
+
+
+def test_layout_and_profile_are_validated(socket_path):
+    with FramedClient(socket_path, timeout=30) as client:
+        with pytest.raises(RuntimeError, match="Unsupported layout 'colums'"):
+            client.call("analyze", text="hello", language="en", layout="colums")
+        with pytest.raises(RuntimeError, match="Unsupported layout"):
+            list(client.stream("analyze_batch", texts=["hello"], layout="colums"))
+        with pytest.raises(RuntimeError, match="missing"):
+            client.call("analyze", text="hello", language="en", profile="missing")
+
+
+def test_budgets_apply_like_http(socket_path, monkeypatch):
+    text = "email john.doe@example.com and jane.doe@example.com"
+    monkeypatch.setattr(framed, "get_budget", lambda _endpoint: Budget(max_chars=30))
+    with FramedClient(socket_path, timeout=30) as client:
+        client._send("analyze", {"text": text, "language": "en"})
+        assert client._recv()["error"]["code"] == 413
+        # an oversized document rejects the batch before any frame is streamed
+        client._send("analyze_batch", {"texts": ["short", text], "language": "en"})
+        assert client._recv()["error"] == {"code": 413, "message": "Text 1 has 51 chars, the limit is 30"}
+
+        monkeypatch.setattr(
+            framed, "get_budget", lambda _endpoint: Budget(max_chars=30, max_entities=1, oversize_policy="truncate")
+        )
+        truncated = client.call("analyze", text=text, language="en")
+        assert truncated["budget"] == {"truncated": True, "original_chars": 51}
+        batch = list(client.stream("anonymize_batch", texts=["short", text], language="en"))
+        assert "budget" not in batch[0] and batch[1]["budget"]["truncated"]
+        assert "john.doe@example.com" not in batch[1]["text"]
+
+        monkeypatch.setattr(
+            framed, "get_budget", lambda _endpoint: Budget(max_entities=1, oversize_policy="chunk", max_chars=30)
+        )
+        chunked = client.call("anonymize", text=text, language="en")
+        assert chunked["budget"] == {"chunked": True, "entities_truncated": True, "total_entities": 2}
+        assert "example.com" not in chunked["text"]
+
+        monkeypatch.setattr(framed, "get_budget", lambda _endpoint: Budget(max_ms=0.001))
+        client._send("analyze", {"text": text, "language": "en"})
+        assert client._recv()["error"]["code"] == 503
+
+
+def test_requests_go_through_admission(socket_path, monkeypatch):
+    monkeypatch.setattr(admission_module, "_admission", AdmissionController(target_latency_ms=0, rate=0.001, burst=1))
+    with FramedClient(socket_path, timeout=30, api_key="a") as client:
+        assert client.call("analyze", text="hello", language="en")["items"] == []
+        client._send("analyze_batch", {"texts": ["hello"], "language": "en"})
+        error = client._recv()["error"]
+        assert error["code"] == 429 and error["retry_after"] >= 1
+    # buckets are per api_key, like X-API-Key over HTTP
+    with FramedClient(socket_path, timeout=30, api_key="b") as client:
+        assert client.call("analyze", text="hello", language="en")["items"] == []
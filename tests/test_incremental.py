@@ -0,0 +1,123 @@
+import threading
+import time
+
+import app.application.incremental as incremental_module
+from app.application.incremental import IncrementalAnalyzer, _changed_region, split_paragraphs
+from app.application.service import analyze_text
+
+PARAGRAPHS = [
+    "Иванов Иван Иванович, паспорт 4012 345678.\n",
+    "Погода сегодня хорошая, ничего личного.\n",
+    "ИНН 7736050003, телефон +7 (912) 000-00-00.\n",
+    "Письмо отправить на ivan.ivanov@example.com\n",
+]
+
+
+def _spans(results):
+    return sorted((r.entity_type, r.start, r.end) for r in results)
+
+
+def test_split_paragraphs_covers_text():
+    text = "a\n\nb\nc"
+    paragraphs = split_paragraphs(text)
+
+    assert [text[s:e] for s, e, _ in paragraphs] == ["a\n\n", "b\n", "c"]
+
+
+def test_hash_collision_is_not_mistaken_for_an_unchanged_paragraph():
+    old_text, new_text = "same\nИНН 7736050003\n", "same\nИНН 5001007322\n"
+    # Forge a collision: equal hashes and lengths, different content
+    old = [(0, 5, 1), (5, 20, 2)]
+    new = [(0, 5, 1), (5, 20, 2)]
+
+    assert _changed_region(old_text, old, new_text, new) == (5, 20, 5, 20)
+    assert _changed_region(old_text, old, old_text, old) == (20, 20, 20, 20)
+
+
+def test_edit_reanalyzes_only_changed_window_and_matches_full_analysis():
+    session = IncrementalAnalyzer(context_chars=0)
+    original = "".join(PARAGRAPHS)
+    first = session.analyze("doc", original, "ru")
+    assert first.full
+
+    edited_paragraphs = list(PARAGRAPHS)
+    edited_paragraphs[1] = "Погода сегодня хорошая, звоните +7 (999) 111-22-33 после обеда.\n"
+    edited = "".join(edited_paragraphs)
+
+    second = session.analyze("doc", edited, "ru")
+
+    assert not second.full
+    start = len(PARAGRAPHS[0])
+    assert second.window == (start, start + len(edited_paragraphs[1]))
+    assert _spans(second.results) == _spans(analyze_text(edited, "ru")[1])
+    assert session.stats()["partial"] == 1
+
+
+def test_unchanged_text_skips_analysis_and_lru_is_bounded():
+    session = IncrementalAnalyzer(max_documents=2)
+    text = "".join(PARAGRAPHS)
+    session.analyze("a", text, "ru")
+
+    again = session.analyze("a", text, "ru")
+    assert again.window is None
+    assert session.stats()["unchanged"] == 1
+
+    session.analyze("b", text, "ru")
+    session.analyze("c", text, "ru")
+    assert session.stats()["documents"] == 2
+    assert session.analyze("a", text, "ru").full
+
+
+def test_incremental_endpoint(client):
+    text = "".join(PARAGRAPHS)
+    first = client.post("/analyze/incremental", json={"document_id": "x", "text": text, "language": "ru"})
+    second = client.post(
+        "/analyze/incremental",
+        json={"document_id": "x", "text": text + "Новый абзац без данных.\n", "language": "ru"},
+    )
+
+    assert first.status_code == 200 and first.json()["full"]
+    assert second.status_code == 200 and not second.json()["full"]
+    assert {i["entity_type"] for i in first.json()["items"]} == {i["entity_type"] for i in second.json()["items"]}
+    assert client.delete("/analyze/incremental/x").json()["forgotten"]
+
+
+def test_lru_is_bounded_by_total_chars():
+    text = "".join(PARAGRAPHS)
+    session = IncrementalAnalyzer(max_chars=2 * len(text))
+    session.analyze("a", text, "ru")
+    session.analyze("b", text, "ru")
+    assert session.stats()["chars"] == 2 * len(text)
+
+    session.analyze("c", text, "ru")
+    assert session.stats()["documents"] == 2 and session.stats()["chars"] == 2 * len(text)
+    assert session.analyze("a", text, "ru").full  # evicted first
+
+    session.analyze("big", text * 3, "ru")  # larger than the whole budget: not kept
+    assert session.stats()["documents"] == 2
+    assert session.forget("big") is False
+
+
+def test_updates_of_one_document_are_serialized(monkeypatch):
+    active, peak = [0], [0]
+    real = incremental_module.recognize
+
+    def slow_recognize(text, language):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        active[0] -= 1
+        return real(text, language)
+
+    monkeypatch.setattr(incremental_module, "recognize", slow_recognize)
+    session = IncrementalAnalyzer()
+    texts = ["".join(PARAGRAPHS[:i]) for i in range(1, 5)]
+    threads = [threading.Thread(target=session.analyze, args=("doc", t, "ru")) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 1
+    assert session._document_locks == {}
+    assert session.stats()["documents"] == 1
@@ -0,0 +1,234 @@
+import io
+import json
+import zipfile
+from email import message_from_bytes, policy as email_policy
+from email.message import EmailMessage
+
+import pytest
+
+from app.application.ingest import UnitAnonymizer, anonymize_file, detect_format
+
+EMAIL = "ivan.ivanov@example.com"
+INN = "ИНН 7736050003"
+
+
+def _run(fmt, data: bytes, **kwargs) -> bytes:
+    dst = io.BytesIO()
+    anonymize_file(fmt, io.BytesIO(data), dst, language="ru", **kwargs)
+    return dst.getvalue()
+
+
+def test_unit_anonymizer_batches_in_order():
+    units = UnitAnonymizer(language="ru", batch_units=2)
+    texts = ["без данных", f"пишите на {EMAIL}", "", "ещё строка", INN]
+
+    out = list(units.map(texts))
+
+    assert len(out) == len(texts)
+    assert out[0] == texts[0] and out[2] == "" and out[3] == texts[3]
+    assert EMAIL not in out[1] and "7736050003" not in out[4]
+    assert units.stats()["units"] == 5
+
+
+def test_txt_and_csv_round_trip():
+    txt = f"строка без данных\r\nпишите на {EMAIL}\n".encode("utf-8")
+    out = _run("txt", txt).decode("utf-8")
+    assert out.startswith("строка без данных\r\n") and EMAIL not in out
+
+    csv_data = f'name,contact\nИванов,"{EMAIL}, доб. 1"\n\nПетров,{INN}\n'.encode("utf-8")
+    rows = _run("csv", csv_data).decode("utf-8").split("\n")
+    assert rows[0] == "name,contact" and rows[2] == ""
+    assert EMAIL not in rows[1] and "7736050003" not in rows[3]
+
+
+def test_jsonl_keeps_structure():
+    records = [{"id": 1, "note": f"mail {EMAIL}", "tags": ["x", INN]}, {"id": 2}]
+    data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+
+    out = [json.loads(line) for line in _run("jsonl", data).decode("utf-8").splitlines()]
+
+    assert [r["id"] for r in out] == [1, 2]
+    assert EMAIL not in out[0]["note"] and out[0]["tags"][0] == "x"
+    assert "7736050003" not in out[0]["tags"][1]
+
+    with pytest.raises(ValueError):
+        _run("jsonl", b"{broken\n")
+
+
+def test_eml_parts_are_anonymized():
+    msg = EmailMessage()
+    msg["Subject"] = f"Заявка {INN}"
+    msg.set_content(f"Ответьте на {EMAIL}")
+    msg.add_attachment("вложение без данных", filename="note.txt")
+
+    out = message_from_bytes(_run("eml", msg.as_bytes()), policy=email_policy.default)
+
+    assert "7736050003" not in out["Subject"]
+    body, attachment = [p for p in out.walk() if not p.is_multipart()]
+    assert EMAIL not in body.get_content()
+    assert attachment.get_filename() == "note.txt"
+
+
+def test_eml_unknown_charset_is_decoded_leniently():
+    raw = (
+        "Subject: test\nMIME-Version: 1.0\nContent-Type: text/plain; charset=x-no-such-charset\n"
+        f"Content-Transfer-Encoding: 8bit\n\nОтветьте на {EMAIL}\n"
+    ).encode("utf-8")
+
+    out = message_from_bytes(_run("eml", raw), policy=email_policy.default)
+
+    assert EMAIL not in out.get_content()
+    assert "Ответьте" in out.get_content()
+
+
+def test_eml_address_headers_are_anonymized(monkeypatch):
+    msg = EmailMessage()
+    msg["From"] = f"Иван Иванов <{EMAIL}>"
+    msg["To"] = "petr.petrov@example.com, Maria <maria@example.ru>"
+    msg["Received"] = f"from mx.example.com by relay for <{EMAIL}>; Mon, 1 Jan 2024 00:00:00 +0000"
+    msg["Received"] = "from client by mx.example.com; Mon, 1 Jan 2024 00:00:00 +0000"
+    msg["Message-ID"] = "<abc@example.com>"
+    msg.set_content("без данных")
+
+    raw = _run("eml", msg.as_bytes())
+    out = message_from_bytes(raw, policy=email_policy.default)
+
+    for address in (EMAIL, "petr.petrov@example.com", "maria@example.ru"):
+        assert address.encode() not in raw
+    assert len(out.get_all("Received")) == 2
+    assert out["Message-ID"] == "<abc@example.com>"
+    assert list(out.keys())[:3] == ["From", "To", "Received"]
+
+    monkeypatch.setattr("app.application.ingest.INGEST_EML_MAX_BYTES", 100)
+    with pytest.raises(ValueError, match="INGEST_EML_MAX_BYTES"):
+        _run("eml", msg.as_bytes())
+
+
+def test_docx_paragraphs_are_rewritten():
+    document = (
+        '<?xml version="1.0"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        "<w:body><w:p><w:r><w:t>Пишите на ivan.ivanov@</w:t></w:r><w:r><w:t>example.com</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>Без данных &amp; спокойно</w:t></w:r></w:p></w:body></w:document>"
+    )
+    src = io.BytesIO()
+    with zipfile.ZipFile(src, "w") as z:
+        z.writestr("[Content_Types].xml", "<Types/>")
+        z.writestr("word/document.xml", document)
+
+    with zipfile.ZipFile(io.BytesIO(_run("docx", src.getvalue()))) as z:
+        assert z.read("[Content_Types].xml") == b"<Types/>"
+        xml = z.read("word/document.xml").decode("utf-8")
+
+    assert "example.com" not in xml and "ivan.ivanov" not in xml
+    assert "<w:t>Без данных &amp; спокойно</w:t>" in xml
+
+
+def test_docx_text_boxes_tabs_and_namespaces():
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+        'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+        'xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml" mc:Ignorable="w14">'
+        "<w:body><w:p><w:r><w:t>Телефон:</w:t><w:tab/><w:t>нет</w:t></w:r>"
+        "<w:r><w:pict><w:txbxContent><w:p><w:r><w:t>Пишите на ivan.ivanov@example.com</w:t></w:r></w:p>"
+        "</w:txbxContent></w:pict></w:r><w:r><w:br/><w:t>ИНН 7736050003</w:t></w:r></w:p></w:body></w:document>"
+    )
+    src = io.BytesIO()
+    with zipfile.ZipFile(src, "w") as z:
+        z.writestr("word/document.xml", document)
+
+    with zipfile.ZipFile(io.BytesIO(_run("docx", src.getvalue()))) as z:
+        xml = z.read("word/document.xml").decode("utf-8")
+
+    assert "ivan.ivanov" not in xml and "7736050003" not in xml
+    assert xml.startswith('<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document ')
+    assert 'xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml"' in xml
+    # the text box keeps its own paragraph, the outer one its tab and break
+    assert xml.count("<w:p>") == 2 and "<w:tab />" in xml and "<w:br />" in xml
+    assert ">Телефон:</w:t>" in xml
+
+
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def test_docx_tracked_changes_comments_and_metadata():
+    document = (
+        f'<?xml version="1.0"?><w:document {_W_NS}><w:body><w:p>'
+        '<w:ins w:id="1" w:author="Иван Иванов" w:date="2024-01-01T00:00:00Z"><w:r><w:t>Новый текст</w:t></w:r></w:ins>'
+        f'<w:del w:id="2" w:author="Пётр Петров"><w:r><w:delText>Старый адрес {EMAIL}</w:delText></w:r></w:del>'
+        f'<w:r><w:instrText xml:space="preserve"> HYPERLINK "mailto:{EMAIL}" </w:instrText></w:r>'
+        '<w:commentRangeStart w:id="0"/><w:r><w:t>без данных</w:t></w:r></w:p></w:body></w:document>'
+    )
+    comments = (
+        f'<?xml version="1.0"?><w:comments {_W_NS}>'
+        '<w:comment w:id="0" w:author="Иван Иванов" w:initials="ИИ"><w:p><w:r>'
+        f"<w:t>Уточнить {INN}</w:t></w:r></w:p></w:comment></w:comments>"
+    )
+    core = (
+        '<?xml version="1.0"?><cp:coreProperties '
+        'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/">'
+        f"<dc:title>Письмо для {EMAIL}</dc:title><dc:creator>Иван Иванов</dc:creator>"
+        "<cp:lastModifiedBy>Пётр Петров</cp:lastModifiedBy>"
+        "<dcterms:created>2024-01-01T00:00:00Z</dcterms:created></cp:coreProperties>"
+    )
+    app = (
+        '<?xml version="1.0"?><Properties '
+        'xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        "<Company>ООО Ромашка</Company><Pages>1</Pages></Properties>"
+    )
+    src = io.BytesIO()
+    with zipfile.ZipFile(src, "w") as z:
+        for name, xml in (("word/document.xml", document), ("word/comments.xml", comments),
+                          ("docProps/core.xml", core), ("docProps/app.xml", app)):
+            z.writestr(name, xml)
+
+    with zipfile.ZipFile(io.BytesIO(_run("docx", src.getvalue()))) as z:
+        parts = {name: z.read(name).decode("utf-8") for name in z.namelist()}
+
+    everything = "".join(parts.values())
+    for secret in (EMAIL, "7736050003", "Иван", "Пётр", "ИИ", "Ромашка"):
+        assert secret not in everything
+    # the same reviewer gets the same pseudonym in every part
+    assert 'w:author="Author 1"' in parts["word/document.xml"]
+    assert 'w:author="Author 1"' in parts["word/comments.xml"]
+    assert 'w:author="Author 2"' in parts["word/document.xml"]
+    assert "HYPERLINK" in parts["word/document.xml"] and "Новый текст" in parts["word/document.xml"]
+    assert "<dcterms:created>2024-01-01T00:00:00Z</dcterms:created>" in parts["docProps/core.xml"]
+    assert "<Pages>1</Pages>" in parts["docProps/app.xml"]
+
+
+def test_docx_zip_bomb_is_rejected(monkeypatch):
+    src = io.BytesIO()
+    with zipfile.ZipFile(src, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("word/document.xml", f"<w:document {_W_NS}>" + " " * 2_000_000 + "</w:document>")
+        z.writestr("media/padding.bin", b"\0" * 2_000_000)
+    assert len(src.getvalue()) < 50_000
+
+    monkeypatch.setattr("app.application.ingest.INGEST_DOCX_MAX_BYTES", 3_000_000)
+    with pytest.raises(ValueError, match="INGEST_DOCX_MAX_BYTES"):
+        _run("docx", src.getvalue())
+
+
+def test_detect_format():
+    assert detect_format("data.NDJSON") == "jsonl"
+    assert detect_format("x.bin", "csv") == "csv"
+    with pytest.raises(ValueError):
+        detect_format("archive.zip")
+
+
+def test_anonymize_file_endpoint(client):
+    data = f"Иванов\nпишите на {EMAIL}\n".encode("utf-8")
+    resp = client.post(
+        "/anonymize/file",
+        files={"file": ("письмо.txt", data, "text/plain")},
+        data={"language": "ru"},
+    )
+
+    assert resp.status_code == 200
+    assert EMAIL not in resp.text and resp.text.count("\n") == 2
+    assert "anonymized-" in resp.headers["content-disposition"]
+    assert int(resp.headers["x-units"]) == 2
+
+    bad = client.post("/anonymize/file", files={"file": ("a.zip", b"PK", "application/zip")})
+    assert bad.status_code == 400
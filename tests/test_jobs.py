@@ -0,0 +1,187 @@
+import io
+import json
+
+import pytest
+
+import app.application.jobs as jobs_module
+from app.application.jobs import iter_file_chunks, run_worker_once, submit_file, submit_text
+from app.application.service import analyze_text, anonymize_results
+from app.infrastructure.jobs import JobStore
+
+TEXT = (
+    "Иванов Иван Иванович, паспорт 4012 345678.\n"
+    "Погода сегодня хорошая, ничего личного.\n"
+    "Письмо отправить на ivan.ivanov@example.com, ИНН 7736050003.\n"
+) * 3
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), result_ttl=60)
+    monkeypatch.setattr(jobs_module, "_store", store)
+    monkeypatch.setattr(jobs_module, "JOB_CHUNK_CHARS", 120)
+    return store
+
+
+def _drain(store):
+    while run_worker_once(store):
+        pass
+
+
+def test_iter_file_chunks_cuts_at_newlines_and_keeps_offsets():
+    chunks = list(iter_file_chunks(io.StringIO(TEXT), 100))
+
+    assert "".join(c for _, c in chunks) == TEXT
+    assert all(TEXT[o:o + len(c)] == c for o, c in chunks)
+    assert all(c.endswith("\n") for _, c in chunks)
+
+
+def test_job_processes_chunks_and_expires(store):
+    job_id = submit_text("analyze", TEXT, "ru")
+    job = store.get(job_id)
+    assert job["status"] == "queued" and job["total_chunks"] > 1
+
+    assert run_worker_once(store)
+    assert store.get(job_id)["done_chunks"] == 1
+    _drain(store)
+
+    job = store.get(job_id)
+    assert job["status"] == "done" and job["done_chunks"] == job["total_chunks"]
+    items = [i for row in store.iter_results(job_id) for i in json.loads(row["items"])]
+    assert all(TEXT[i["start"]:i["end"]] == i["text"] for i in items)
+    assert {"EMAIL_ADDRESS", "RU_INN"} <= {i["entity_type"] for i in items}
+
+    store.result_ttl = -1
+    store.complete_chunk(job_id, 0, [], None)  # no-op on a finished chunk
+    store.fail(job_id, "expire")
+    assert store.purge_expired() == 1
+    assert store.get(job_id) is None
+
+
+def test_stale_claim_is_resumed(store):
+    job_id = submit_text("anonymize", TEXT, "ru")
+    store.claim_chunk()  # worker died holding chunk 0
+    store.claim_timeout = 0
+
+    _drain(store)
+
+    assert store.get(job_id)["status"] == "done"
+
+
+def test_linked_entities_across_chunk_boundary(store):
+    text = (
+        "Реквизиты: БИК 044525225.\n" + "Погода сегодня хорошая.\n" * 4
+        + "к/с 30101810400000000225, ИНН 7736050003.\n"
+    )
+    chunks = jobs_module.split_chunks(text, 120)
+    assert len(chunks) > 1 and "044525225" in chunks[0][1] and "30101810400000000225" in chunks[-1][1]
+
+    job_id = submit_text("anonymize", text, "ru")
+    _drain(store)
+
+    items = [i for row in store.iter_results(job_id) for i in json.loads(row["items"])]
+    expected = analyze_text(text, "ru")[1]
+    assert sorted((i["entity_type"], i["start"], i["end"]) for i in items) == sorted(
+        (r.entity_type, r.start, r.end) for r in expected
+    )
+    assert "RU_KS" in {i["entity_type"] for i in items}
+    output = "".join(row["output"] for row in store.iter_results(job_id))
+    assert output == anonymize_results(text, expected, None)
+
+
+def test_entity_cut_by_chunk_boundary_is_masked_whole(store):
+    text = "x" * 100 + " ivan.ivanov@example.com " + "y" * 100
+    chunks = [(0, text[:110]), (110, text[110:])]
+    job_id = store.create("anonymize", "ru", None)
+    store.seal(job_id, store.add_chunks(job_id, chunks))
+    _drain(store)
+
+    rows = list(store.iter_results(job_id))
+    items = [i for row in rows for i in json.loads(row["items"])]
+    assert [(i["entity_type"], i["text"]) for i in items] == [("EMAIL_ADDRESS", "ivan.ivanov@example.com")]
+    assert "".join(row["output"] for row in rows) == anonymize_results(text, analyze_text(text, "ru")[1], None)
+
+
+def test_job_endpoints(client, store):
+    resp = client.post("/jobs", json={"text": TEXT, "language": "ru"})
+    assert resp.status_code == 202
+    job_id = resp.json()["id"]
+    assert client.get(f"/jobs/{job_id}/result").status_code == 409
+
+    _drain(store)
+
+    status = client.get(f"/jobs/{job_id}").json()
+    assert status["status"] == "done" and status["progress"] == 1.0
+
+    body = client.get(f"/jobs/{job_id}/result").json()
+    expected = "".join(
+        anonymize_results(chunk, analyze_text(chunk, "ru")[1], None)
+        for _, chunk in jobs_module.split_chunks(TEXT, 120)
+    )
+    assert body["text"] == expected
+    assert client.get(f"/jobs/{job_id}/result/text").text == expected
+    assert "ivan.ivanov@example.com" not in body["text"]
+
+
+def test_raw_job_upload(client, store):
+    resp = client.post("/jobs/raw?kind=analyze&language=ru", content=TEXT.encode("utf-8"))
+    assert resp.status_code == 202
+    _drain(store)
+
+    body = client.get(f"/jobs/{resp.json()['id']}/result").json()
+    assert "text" not in body
+    assert all(TEXT[i["start"]:i["end"]] == i["text"] for i in body["items"])
+
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.post("/jobs/raw?kind=nope", content=b"x").status_code == 422
+
+
+def test_failed_file_submission_marks_job_failed(store, tmp_path):
+    path = tmp_path / "upload.txt"
+    # Valid UTF-8 first chunk, then an invalid byte further in the file
+    path.write_bytes((TEXT * 100).encode("utf-8") + b"\xff tail")
+
+    with pytest.raises(UnicodeDecodeError):
+        submit_file("analyze", str(path), language="ru", store=store)
+
+    assert store.counts().get("submitting", 0) == 0
+    (row,) = store._db().execute("SELECT status, error, expires_at FROM jobs").fetchall()
+    assert row["status"] == "failed" and row["error"].startswith("Submission failed")
+    assert row["expires_at"] is not None
+    assert run_worker_once(store) is False
+
+
+def test_abandoned_submission_is_purged(store):
+    store.submit_ttl = -1
+    job_id = store.create("analyze", "ru", None)  # submitter died before sealing
+    store.add_chunks(job_id, [(0, TEXT)])
+
+    assert store.purge_expired() == 1
+    assert store.get(job_id) is None
+    assert store._db().execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 0
+
+    sealed = submit_text("analyze", TEXT, "ru")
+    assert store.get(sealed)["expires_at"] is None
+    assert store.purge_expired() == 0
+
+
+def test_invalid_policy_is_rejected_on_submit(client, store):
+    bad = {"EMAIL_ADDRESS": {"type": "mask"}}
+    resp = client.post("/jobs", json={"text": TEXT, "kind": "anonymize", "policy": bad})
+    assert resp.status_code == 400 and "masking_char" in resp.json()["detail"]
+
+    resp = client.post("/jobs/raw?policy=" + json.dumps({"EMAIL_ADDRESS": {"type": "nope"}}), content=b"x")
+    assert resp.status_code == 400
+    assert store.counts() == {}
+
+
+def test_single_supervisor_holds_the_lock(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3.supervisor.lock")
+    first = jobs_module._acquire_supervisor_lock(path)
+    assert first is not None
+    assert jobs_module._acquire_supervisor_lock(path) is None
+
+    jobs_module.os.close(first)
+    second = jobs_module._acquire_supervisor_lock(path)
+    assert second is not None
+    jobs_module.os.close(second)
@@ -0,0 +1,73 @@
+import os
+import struct
+
+import pytest
+
+from app.application import lang_detect
+
+
+class _FakeModel:
+    """Stands in for a loaded fastText model; records calls to ``predict``."""
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.calls = []
+
+    def predict(self, text):
+        self.calls.append(text)
+        if isinstance(text, list):
+            return [[self.labels[t]] for t in text], [[0.9] for _ in text]
+        return [self.labels[text]], [0.9]
+
+
+@pytest.fixture
+def fake_fasttext(monkeypatch):
+    model = _FakeModel({"привет мир": "__label__ru", "hello world": "__label__en", "hola": "__label__es"})
+    monkeypatch.setattr(lang_detect, "_get_fasttext_model", lambda: model)
+    return model
+
+
+def test_detect_languages_uses_one_batched_predict(fake_fasttext):
+    detections = lang_detect.detect_languages(["привет мир", "hello world", "hola"])
+
+    assert [d.language for d in detections] == ["ru", "en", "en"]
+    assert [d.method for d in detections[:2]] == ["fasttext", "fasttext"]
+    assert detections[2].method != "fasttext"
+    assert len(fake_fasttext.calls) == 1
+
+
+def test_detect_languages_honors_explicit_language(fake_fasttext):
+    detections = lang_detect.detect_languages(["hello world"], explicit_language="ru")
+
+    assert detections[0].language == "ru"
+    assert fake_fasttext.calls == []
+
+
+@pytest.mark.parametrize(
+    "name, payload, message",
+    [
+        ("lid.176.txt", struct.pack("<i", 793712314), ".bin or .ftz"),
+        ("lid.176.ftz", b"not a model", "bad magic"),
+    ],
+)
+def test_invalid_fasttext_files_are_rejected(tmp_path, name, payload, message):
+    path = tmp_path / name
+    path.write_bytes(payload)
+
+    assert message in lang_detect._validate_fasttext_file(str(path))
+
+
+def test_valid_fasttext_header_is_accepted(tmp_path):
+    path = tmp_path / "lid.176.ftz"
+    path.write_bytes(struct.pack("<ii", 793712314, 12))
+
+    assert lang_detect._validate_fasttext_file(str(path)) is None
+
+
+def test_status_reports_a_model_inherited_from_the_parent(monkeypatch):
+    monkeypatch.setattr(lang_detect, "_FASTTEXT_MODEL", object())
+    monkeypatch.setattr(lang_detect, "_FASTTEXT_INFO", {"path": "lid.176.ftz", "loaded_by_pid": os.getpid()})
+    assert lang_detect.language_model_status()["shared"] is False
+
+    monkeypatch.setattr(lang_detect, "_FASTTEXT_INFO", {"path": "lid.176.ftz", "loaded_by_pid": os.getpid() + 1})
+    assert lang_detect.language_model_status()["shared"] is True
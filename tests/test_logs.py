@@ -0,0 +1,103 @@
+import logging
+import queue
+
+import pytest
+
+import app.infrastructure.logs as logs
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _record(name="app.application.lang_detect", level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, "message %s", ("x",), None)
+
+
+def test_sampling_and_rate_limit():
+    muted = logs.SamplingFilter({"app.application.lang_detect": 0.0})
+    assert not muted.filter(_record())
+    assert muted.filter(_record(level=logging.WARNING))
+    assert muted.filter(_record(name="app.interface.api"))
+    assert muted.sampled_out == {"app.application.lang_detect": 1}
+
+    limited = logs.SamplingFilter({}, rate_limit=2)
+    assert [limited.filter(_record()) for _ in range(5)] == [True, True, False, False, False]
+    assert limited.rate_limited == {"app.application.lang_detect": 3}
+
+    # Below one record per second the first record still passes
+    slow = logs.SamplingFilter({}, rate_limit=0.5)
+    assert [slow.filter(_record()) for _ in range(3)] == [True, False, False]
+
+
+def test_full_queue_writes_warnings_directly():
+    capture = _Capture()
+    handler = logs._DeferredQueueHandler(queue.Queue(1), fallback=[capture])
+
+    for level in (logging.INFO, logging.INFO, logging.WARNING, logging.ERROR):
+        handler.handle(_record(level=level))
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1 and handler.written_directly == 2
+    assert [r.levelno for r in capture.records] == [logging.WARNING, logging.ERROR]
+
+
+def test_parse_sample_rates():
+    assert logs.parse_sample_rates(" request_summary=0.1, app.interface.api=1 ") == {
+        "request_summary": 0.1,
+        "app.interface.api": 1.0,
+    }
+    with pytest.raises(ValueError):
+        logs.parse_sample_rates("request_summary=2")
+
+
+def test_one_summary_per_request_without_text(client, monkeypatch):
+    capture = _Capture()
+    assert logs.logging_status()["queue"]
+    text = "почта ivan.ivanov@example.com"
+    # Warm up first, so one-off initialization messages are not captured
+    client.post("/anonymize", json={"text": text, "language": "ru"})
+    logs.flush_logs()
+    monkeypatch.setattr(logs._listener, "handlers", (capture,))
+
+    resp = client.post("/anonymize", json={"text": text, "language": "ru"})
+    assert resp.status_code == 200
+    logs.flush_logs()
+
+    summaries = [r for r in capture.records if getattr(r, "log_type", None) == logs.SUMMARY_TYPE]
+    assert len(summaries) == 1
+    summary = summaries[0].summary
+    assert summary["endpoint"] == "anonymize" and summary["language_method"] == "explicit"
+    assert summary["entities"] == {"EMAIL_ADDRESS": 1} and summary["chars"] == len(text)
+    assert {"analyze", "anonymize", "total"} <= set(summary["timings_ms"])
+    assert "ivan" not in summaries[0].getMessage()
+    # detection details are folded into the summary instead of separate lines
+    assert all(r.levelno < logging.INFO or r.name == "app.requests" for r in capture.records)
+
+
+def test_file_upload_is_summarized_like_other_requests(client, monkeypatch):
+    capture = _Capture()
+    content = "почта ivan.ivanov@example.com\nИНН 7736050003\n".encode("utf-8")
+    upload = {"file": ("notes.txt", content, "text/plain")}
+    client.post("/anonymize/file", files=upload)
+    logs.flush_logs()
+    monkeypatch.setattr(logs._listener, "handlers", (capture,))
+
+    resp = client.post("/anonymize/file", files=upload, data={"language": "ru"})
+    assert resp.status_code == 200
+    logs.flush_logs()
+
+    (record,) = capture.records
+    summary = record.summary
+    assert record.log_type == logs.SUMMARY_TYPE
+    assert summary["endpoint"] == "anonymize_file" and summary["format"] == "txt"
+    assert summary["language"] == "ru" and summary["language_method"] == "explicit"
+    assert summary["entities"] == {"EMAIL_ADDRESS": 1, "RU_INN": 1} and summary["entity_total"] == 2
+    assert summary["units"] == 2 and summary["bytes"] == len(content)
+    assert {"admission", "anonymize", "total"} <= set(summary["timings_ms"])
+    assert "ivan" not in record.getMessage()
@@ -0,0 +1,137 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+import pytest
+
+from app.application import service
+from app.application.service import MicroBatcher, analyze_text
+
+TEXTS = [
+    "Call me at +1 (415) 555-2671 tomorrow.",
+    "Иван Иванов, телефон +7 (912) 000-00-00",
+    "email john.doe@example.com",
+    "паспорт 4012 345678",
+    "nothing to see here",
+]
+
+
+def _spans(results):
+    return sorted((r.entity_type, r.start, r.end) for r in results)
+
+
+def test_concurrent_submissions_are_coalesced_and_match_direct_analysis():
+    batcher = MicroBatcher(max_wait_ms=200, max_batch_size=len(TEXTS))
+
+    with ThreadPoolExecutor(max_workers=len(TEXTS)) as pool:
+        futures = list(pool.map(batcher.submit, TEXTS))
+    outcomes = [f.result(timeout=30) for f in futures]
+
+    for text, (detection, results) in zip(TEXTS, outcomes):
+        expected_detection, expected = analyze_text(text)
+        assert detection.language == expected_detection.language
+        assert _spans(results) == _spans(expected)
+
+    stats = batcher.stats()
+    assert stats["documents"] == len(TEXTS)
+    assert stats["batches"] < len(TEXTS)
+
+
+def test_invalid_language_fails_only_its_own_future():
+    batcher = MicroBatcher(max_wait_ms=100, max_batch_size=2)
+
+    bad = batcher.submit("hello", "de")
+    good = batcher.submit("email john.doe@example.com", "en")
+
+    with pytest.raises(ValueError):
+        bad.result(timeout=30)
+    _, results = good.result(timeout=30)
+    assert any(r.entity_type == "EMAIL_ADDRESS" for r in results)
+
+
+def test_endpoints_route_through_enabled_batcher(client, monkeypatch):
+    batcher = MicroBatcher(max_wait_ms=5, max_batch_size=8)
+    monkeypatch.setattr(service, "_batcher", batcher)
+
+    analyzed = client.post("/analyze", json={"text": TEXTS[2], "language": "en"})
+    rejected = client.post("/analyze", json={"text": TEXTS[2], "language": "de"})
+
+    assert analyzed.status_code == 200
+    assert any(i["entity_type"] == "EMAIL_ADDRESS" for i in analyzed.json()["items"])
+    assert rejected.status_code == 400
+    assert batcher.stats()["documents"] == 2
+
+
+def test_unexpected_failure_resolves_every_future(monkeypatch):
+    def broken(text, explicit_language=None):
+        raise RuntimeError("detector crashed")
+
+    monkeypatch.setattr(service, "detect_language", broken)
+    batcher = MicroBatcher(max_wait_ms=100, max_batch_size=2)
+
+    futures = [batcher.submit("hello", "en"), batcher.submit("world", "en")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="detector crashed"):
+            future.result(timeout=30)
+
+
+def test_cancelled_future_does_not_fail_the_batch():
+    batcher = MicroBatcher(max_wait_ms=200, max_batch_size=2)
+
+    cancelled = batcher.submit("hello", "en")
+    cancelled.cancel()
+    good = batcher.submit("email john.doe@example.com", "en")
+
+    _, results = good.result(timeout=30)
+    assert any(r.entity_type == "EMAIL_ADDRESS" for r in results)
+
+
+def test_batched_detection_failure_falls_back_per_text(monkeypatch):
+    real_detect = service.detect_language
+
+    def batch_broken(texts):
+        raise RuntimeError("batch detector crashed")
+
+    def single(text, explicit_language=None):
+        if text == "poison":
+            raise RuntimeError("cannot detect")
+        return real_detect(text, explicit_language=explicit_language)
+
+    monkeypatch.setattr(service, "detect_languages", batch_broken)
+    monkeypatch.setattr(service, "detect_language", single)
+    batcher = MicroBatcher(max_wait_ms=200, max_batch_size=2)
+
+    bad = batcher.submit("poison")
+    good = batcher.submit(TEXTS[2])
+
+    with pytest.raises(RuntimeError, match="cannot detect"):
+        bad.result(timeout=30)
+    detection, results = good.result(timeout=30)
+    assert detection.language == "en"
+    assert any(r.entity_type == "EMAIL_ADDRESS" for r in results)
+
+
+def test_texts_are_analyzed_in_the_submitters_context(monkeypatch):
+    request_id: ContextVar[str] = ContextVar("request_id", default="none")
+    seen = {}
+    validate = service._post_validate_traced
+
+    def recording(text, raw, profile):
+        seen[text] = request_id.get()
+        return validate(text, raw, profile)
+
+    monkeypatch.setattr(service, "_post_validate_traced", recording)
+    batcher = MicroBatcher(max_wait_ms=200, max_batch_size=2)
+    texts = {name: f"request {name} {uuid.uuid4().hex}" for name in ("a", "b")}
+
+    def submit(name):
+        request_id.set(name)
+        return batcher.submit(texts[name], "en")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = list(pool.map(submit, texts))
+    for future in futures:
+        future.result(timeout=30)
+
+    assert batcher.stats()["batches"] == 1
+    assert seen == {texts["a"]: "a", texts["b"]: "b"}
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+import app.application.service as service
+import app.infrastructure.profiles as profiles
+
+PROFILES = {
+    "profiles": {
+        "mail": {"entities": ["EMAIL_ADDRESS"]},
+        "lenient": {"disabled_rules": ["inn_checksum"]},
+        "masked": {"policy": {"EMAIL_ADDRESS": {"type": "replace", "new_value": "<MAIL>"}}},
+    }
+}
+TEXT = "ИНН 500100732250, почта ivan.ivanov@example.com, тел. +7 (912) 000-00-00"
+
+
+@pytest.fixture
+def loaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiles, "_profiles", None)
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps(PROFILES))
+    profiles.reload_profiles(str(path))
+    return path
+
+
+def _types(results):
+    return {r.entity_type for r in results}
+
+
+def test_entities_filter_limits_recognizers(loaded):
+    _, full = service.analyze_text(TEXT, "ru")
+    _, mail = service.analyze_text(TEXT, "ru", profile="mail")
+
+    assert "PHONE_NUMBER_RU" in _types(full)
+    assert _types(mail) == {"EMAIL_ADDRESS"}
+    assert service.get_profile_analyzer(profiles.get_profile("default")) is service.get_analyzer()
+
+
+def test_disabled_rule_keeps_rejected_candidates(loaded):
+    _, strict = service.analyze_text(TEXT, "ru")
+    _, lenient = service.analyze_text(TEXT, "ru", profile="lenient")
+
+    assert "RU_INN" not in _types(strict)
+    assert "RU_INN" in _types(lenient)
+
+
+def test_profile_policy_and_unknown_profile(loaded, client):
+    resp = client.post("/anonymize", json={"text": TEXT, "language": "ru", "profile": "masked"})
+    assert resp.status_code == 200
+    assert "<MAIL>" in resp.json()["text"]
+
+    # the request policy still wins over the profile's
+    resp = client.post(
+        "/anonymize",
+        json={"text": TEXT, "language": "ru", "profile": "masked", "policy": {"EMAIL_ADDRESS": {"type": "redact"}}},
+    )
+    assert "<MAIL>" not in resp.json()["text"]
+
+    resp = client.post("/analyze", json={"text": TEXT, "language": "ru", "profile": "missing"})
+    assert resp.status_code == 400
+    assert "missing" in resp.json()["detail"]
+
+
+def test_profile_analyzers_are_bounded(loaded, tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "PROFILE_ANALYZER_CACHE", 1)
+    data = {"profiles": {"a": {"entities": ["EMAIL_ADDRESS"]}, "b": {"entities": ["PHONE_NUMBER_RU"]}}}
+    loaded.write_text(json.dumps(data))
+    profiles.reload_profiles(str(loaded))
+
+    service.analyze_text(TEXT, "ru", profile="a")
+    service.analyze_text(TEXT, "ru", profile="b")
+
+    assert service.runtime_status()["profiles"]["cached_analyzers"] == ["b"]
+
+
+def test_invalid_profiles_are_rejected(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"profiles": {"x": {"disabled_rules": ["no_such_rule"]}}}))
+    with pytest.raises(ValueError, match="no_such_rule"):
+        profiles.load_profiles(str(path))
+
+    path.write_text(json.dumps({"profiles": {"x": {"policy": {"PERSON": {"new_value": "x"}}}}}))
+    with pytest.raises(ValueError):
+        profiles.load_profiles(str(path))
+
+
+def test_broken_profiles_file_fails_startup(tmp_path, monkeypatch):
+    from app.interface.api import app, lifespan
+
+    path = tmp_path / "profiles.yaml"
+    path.write_text("profiles: {mail: [unclosed\n")
+    with pytest.raises(ValueError, match="not valid YAML"):
+        profiles.load_profiles(str(path))
+
+    async def start():
+        async with lifespan(app):
+            pass
+
+    monkeypatch.setattr(profiles, "PROFILES_FILE", str(path))
+    with pytest.raises(ValueError, match="not valid YAML"):
+        asyncio.run(start())
@@ -0,0 +1,79 @@
+import pytest
+
+import app.infrastructure.vault as vault_module
+from app.infrastructure.policies import to_operator_config
+from app.infrastructure.vault import TOKEN_RE, TokenVault
+from app.interface import api
+
+
+def test_pseudonyms_are_deterministic_per_key_and_prefix():
+    vault = TokenVault(b"k1")
+
+    token = vault.pseudonymize("ivan@example.com", "EMAIL_ADDRESS")
+
+    assert token == vault.pseudonymize("ivan@example.com", "EMAIL_ADDRESS")
+    assert token.startswith("EMAIL_ADDRESS_")
+    assert TOKEN_RE.fullmatch(token)
+    assert token != TokenVault(b"k2").pseudonymize("ivan@example.com", "EMAIL_ADDRESS")
+    assert token != vault.pseudonymize("ivan@example.com", "PERSON")
+
+
+def test_sqlite_vault_survives_lru_eviction_and_restart(tmp_path):
+    path = str(tmp_path / "vault.db")
+    vault = TokenVault(b"key", cache_size=2, path=path)
+    tokens = [vault.pseudonymize(f"value-{i}", "PII") for i in range(5)]
+
+    assert vault.stats()["cached"] == 2
+    assert vault.lookup_many(tokens) == {t: f"value-{i}" for i, t in enumerate(tokens)}
+
+    reopened = TokenVault(b"key", path=path)
+    restored, mapping = reopened.reveal(f"a {tokens[0]} b {tokens[4]} c PII_0000000000000000")
+    assert restored == "a value-0 b value-4 c PII_0000000000000000"
+    assert set(mapping) == {tokens[0], tokens[4]}
+
+
+def test_pseudonymize_policy_becomes_custom_operator():
+    operators = to_operator_config({"PERSON": {"type": "pseudonymize"}})
+
+    assert operators["PERSON"].operator_name == "custom"
+    assert operators["PERSON"].params["lambda"]("Иван").startswith("PERSON_")
+
+
+def test_anonymize_and_deanonymize_round_trip(client, monkeypatch):
+    monkeypatch.setattr(api, "DEANONYMIZE_TOKEN", "secret")
+    text = "email john.doe@example.com"
+    policy = {"EMAIL_ADDRESS": {"type": "pseudonymize"}}
+
+    first = client.post("/anonymize", json={"text": text, "language": "en", "policy": policy}).json()
+    second = client.post("/anonymize", json={"text": text, "language": "en", "policy": policy}).json()
+    assert first["text"] == second["text"]
+    assert "john.doe@example.com" not in first["text"]
+
+    denied = client.post("/deanonymize", json={"text": first["text"]})
+    assert denied.status_code == 401
+
+    resp = client.post(
+        "/deanonymize", json={"text": first["text"]}, headers={"X-Deanonymize-Token": "secret"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["text"] == text
+
+
+def test_deanonymize_is_disabled_without_token(client):
+    resp = client.post("/deanonymize", json={"tokens": ["PII_0000000000000000"]})
+    assert resp.status_code == 403
+
+
+@pytest.mark.parametrize("prefix", ["email", "1PII", "PII-X", ""])
+def test_invalid_pseudonym_prefix_is_rejected(prefix):
+    name = "EMAIL_ADDRESS" if prefix else "my-entity"
+    with pytest.raises(ValueError, match="prefix"):
+        to_operator_config({name: {"type": "pseudonymize", "prefix": prefix}})
+
+
+def test_ephemeral_vault_key_degrades_health(client, monkeypatch):
+    monkeypatch.setattr(vault_module, "_vault", TokenVault(b"random", ephemeral_key=True))
+
+    body = client.get("/health").json()
+    assert body["status"] == "degraded"
+    assert body["vault"]["ephemeral_key"] is True
@@ -0,0 +1,52 @@
+import pytest
+
+from presidio_analyzer import Pattern
+
+from app.infrastructure.recognizers import (
+    GuardedPatternRecognizer,
+    build_generic_recognizers,
+    regex_stats,
+)
+
+
+def _spans(results):
+    return sorted((r.start, r.end, r.entity_type) for r in results)
+
+
+def test_engines_agree_on_generic_phone_pattern():
+    text = "Call me at +1 (415) 555-2671 or +44 20 7946 0958 tomorrow."
+    reference = build_generic_recognizers()[0]
+
+    for engine in ("re", "regex", "re2"):
+        rec = GuardedPatternRecognizer(
+            supported_entity=reference.supported_entities[0],
+            patterns=reference.patterns,
+            supported_language="en",
+            engine=engine,
+        )
+        assert _spans(rec.analyze(text, entities=[])) == _spans(reference.analyze(text, entities=[]))
+
+
+def test_catastrophic_pattern_times_out_and_is_counted():
+    rec = GuardedPatternRecognizer(
+        supported_entity="PHONE_NUMBER",
+        patterns=build_generic_recognizers()[0].patterns,
+        supported_language="en",
+        engine="regex",
+        timeout_ms=20,
+    )
+    name = rec.patterns[0].name
+    before = regex_stats()["timeouts"].get(name, 0)
+
+    rec.analyze("+1" * 20000, entities=[])
+
+    assert regex_stats()["timeouts"][name] == before + 1
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        GuardedPatternRecognizer(
+            supported_entity="X",
+            patterns=[Pattern("x", r"x", 0.5)],
+            engine="pcre",
+        )
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from app.application import service
+
+
+@pytest.fixture
+def restore_registry():
+    yield
+    service.reload_registry(path="")
+
+
+def _write(path, recognizers):
+    path.write_text(json.dumps({"recognizers": recognizers}), encoding="utf-8")
+    return str(path)
+
+
+def test_reload_adds_file_recognizer_and_bumps_version(tmp_path, restore_registry):
+    before = service.registry_version()
+    path = _write(tmp_path / "recognizers.json", [{
+        "entity": "EMPLOYEE_ID",
+        "languages": ["en"],
+        "patterns": [{"name": "employee_id", "regex": r"\bEMP-\d{6}\b", "score": 0.9}],
+    }])
+
+    version = service.reload_registry(path=path)
+
+    assert version != before
+    results = service.get_analyzer().analyze(text="badge EMP-123456 issued", language="en")
+    assert any(r.entity_type == "EMPLOYEE_ID" for r in results)
+
+
+def test_replace_drops_builtin_recognizers_and_applies_validator(tmp_path, restore_registry):
+    path = _write(tmp_path / "recognizers.json", [{
+        "entity": "RU_SNILS",
+        "languages": ["ru"],
+        "patterns": [{"name": "snils_compact_only", "regex": r"(?<!\d)\d{11}(?!\d)", "score": 0.3}],
+        "validator": "snils",
+        "replace": True,
+    }])
+    service.reload_registry(path=path)
+
+    analyzer = service.get_analyzer()
+    hyphenated = analyzer.analyze(text="СНИЛС 112-233-445 95", language="ru")
+    valid = analyzer.analyze(text="СНИЛС 11223344595", language="ru")
+    invalid = analyzer.analyze(text="СНИЛС 11223344596", language="ru")
+
+    assert not any(r.entity_type == "RU_SNILS" for r in hyphenated)
+    assert any(r.entity_type == "RU_SNILS" and r.score == 1.0 for r in valid)
+    assert not any(r.entity_type == "RU_SNILS" for r in invalid)
+
+
+def test_invalid_definition_keeps_current_analyzer(tmp_path, restore_registry):
+    analyzer = service.get_analyzer()
+    version = service.registry_version()
+    path = _write(tmp_path / "recognizers.json", [{"entity": "X", "patterns": [], "validator": "nope"}])
+
+    with pytest.raises(ValueError):
+        service.reload_registry(path=path)
+
+    assert service.get_analyzer() is analyzer
+    assert service.registry_version() == version
+
+
+@pytest.mark.parametrize("name, content", [
+    ("recognizers.json", json.dumps({"recognizers": [
+        {"entity": "X", "patterns": [{"name": "broken", "regex": "(unclosed", "score": 0.5}]},
+    ]})),
+    ("recognizers.json", "{not json"),
+    ("recognizers.yaml", "recognizers: [unclosed"),
+])
+def test_unparsable_definitions_keep_current_analyzer(tmp_path, restore_registry, name, content):
+    if name.endswith(".yaml"):
+        pytest.importorskip("yaml")
+    analyzer = service.get_analyzer()
+    version = service.registry_version()
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+
+    with pytest.raises(ValueError, match="broken|not valid"):
+        service.reload_registry(path=str(path))
+
+    assert service.get_analyzer() is analyzer
+    assert service.registry_version() == version
+    service.get_analyzer().analyze(text="Smoke test", language="en")
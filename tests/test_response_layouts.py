@@ -0,0 +1,36 @@
+TEXT = "Call me at +1 (415) 555-2671, email john.doe@example.com"
+
+
+def test_offsets_layout_omits_substrings(client):
+    full = client.post("/analyze", json={"text": TEXT, "language": "en"}).json()["items"]
+    resp = client.post("/analyze", json={"text": TEXT, "language": "en", "layout": "offsets"})
+
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert items
+    assert all("text" not in item for item in items)
+    assert [(i["start"], i["end"]) for i in items] == [(i["start"], i["end"]) for i in full]
+
+
+def test_columnar_layout_returns_parallel_arrays(client):
+    resp = client.post("/analyze", json={"text": TEXT, "language": "en", "layout": "columnar"})
+
+    assert resp.status_code == 200
+    columns = resp.json()["columns"]
+    assert set(columns) == {"entity_type", "start", "end", "score"}
+    assert len({len(values) for values in columns.values()}) == 1
+    assert "EMAIL_ADDRESS" in columns["entity_type"]
+
+
+def test_anonymize_supports_layouts(client):
+    resp = client.post("/anonymize", json={"text": TEXT, "language": "en", "layout": "columnar"})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert "john.doe@example.com" not in body["text"]
+    assert "EMAIL_ADDRESS" in body["columns"]["entity_type"]
+
+
+def test_unknown_layout_is_rejected(client):
+    resp = client.post("/analyze", json={"text": TEXT, "layout": "xml"})
+    assert resp.status_code == 422
@@ -0,0 +1,152 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import app.application.lang_detect as lang_detect
+import app.application.service as service
+import app.infrastructure.shared_cache as shared_cache
+from app.infrastructure.shared_cache import SharedCache
+
+TEXT = "почта ivan.ivanov@example.com, ИНН 500100732259"
+SECRET = b"test-deployment-secret"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SharedCache(str(tmp_path / "cache.db"), max_bytes=1024 ** 2, secret=SECRET)
+    monkeypatch.setattr(shared_cache, "_cache", cache)
+    return cache
+
+
+def test_entries_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SharedCache(path, max_bytes=1024 ** 2, secret=SECRET)
+    key = cache.key("test", "value")
+    script = (
+        "from app.infrastructure.shared_cache import SharedCache as C;"
+        f"c = C({path!r}, 1024, {SECRET!r}); c.put(c.key('test', 'value'), b'payload')"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=pathlib.Path(__file__).resolve().parents[1])
+
+    assert cache.get(key) == b"payload"
+    assert cache.get(cache.key("test", "other")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"), max_bytes=64 * 1024, secret=SECRET)
+    for i in range(2000):
+        cache.put(cache.key("test", str(i)), b"x" * 100)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 64 * 1024 and stats["evicted"] > 0
+    assert cache.get(cache.key("test", "0")) is None
+    assert cache.get(cache.key("test", "1999")) == b"x" * 100
+
+
+def test_analysis_hit_skips_the_pipeline(cache, monkeypatch):
+    _, expected = service.analyze_text(TEXT, "ru")
+    writes = cache.stats()["writes"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("pipeline ran on a cached text")
+
+    monkeypatch.setattr(service, "_recognize_traced", fail)
+    _, cached = service.analyze_text(TEXT, "ru")
+    # batched paths read the same entries
+    [(_, batched)] = service.analyze_texts([TEXT], "ru")
+
+    assert [(r.entity_type, r.start, r.end, r.score) for r in cached] == [
+        (r.entity_type, r.start, r.end, r.score) for r in expected
+    ]
+    assert [(r.entity_type, r.start) for r in batched] == [(r.entity_type, r.start) for r in expected]
+    assert cache.stats()["writes"] == writes
+    with pytest.raises(AssertionError):
+        service.analyze_text(TEXT + " ", "ru")
+
+
+def test_profile_is_part_of_the_key(cache, monkeypatch):
+    from app.infrastructure.profiles import DEFAULT_PROFILE, Profile
+
+    strict = service._analysis_scope(DEFAULT_PROFILE)
+    lenient = service._analysis_scope(Profile("default", disabled_rules=frozenset({"inn_checksum"})))
+    assert strict != lenient
+
+
+def test_language_detection_is_cached(cache, monkeypatch):
+    calls = []
+
+    def predict(text):
+        calls.append(text)
+        return lang_detect._heuristic_predict(text)
+
+    monkeypatch.setattr(lang_detect, "_predict_language", predict)
+    first = lang_detect.detect_language("Hello there, this is a test")
+    second = lang_detect.detect_language("Hello there, this is a test")
+
+    assert first == second and len(calls) == 1
+
+
+def test_results_with_a_regex_timeout_are_not_cached(cache, monkeypatch):
+    from app.infrastructure.recognizers import GuardedPatternRecognizer, build_generic_recognizers
+
+    slow = GuardedPatternRecognizer(
+        supported_entity="PHONE_NUMBER",
+        patterns=build_generic_recognizers()[0].patterns,
+        supported_language="en",
+        engine="regex",
+        timeout_ms=20,
+    )
+    recognize = service._recognize_traced
+
+    def recognize_with_timeout(analyzer, text, *args, **kwargs):
+        slow.analyze("+1" * 20000, entities=[])
+        return recognize(analyzer, text, *args, **kwargs)
+
+    monkeypatch.setattr(service, "_recognize_traced", recognize_with_timeout)
+    service.analyze_text(TEXT, "ru")
+    service.analyze_texts([TEXT + " "], "ru")
+    assert cache.stats()["writes"] == 0
+
+    monkeypatch.setattr(service, "_recognize_traced", recognize)
+    service.analyze_text(TEXT, "ru")
+    assert cache.stats()["writes"] == 1
+
+
+def test_keys_depend_on_the_deployment_secret(tmp_path, monkeypatch):
+    first = SharedCache(str(tmp_path / "a.db"), 1024, secret=SECRET)
+    second = SharedCache(str(tmp_path / "b.db"), 1024, secret=b"another-secret")
+    assert first.key("analysis", TEXT) != second.key("analysis", TEXT)
+
+    monkeypatch.setattr(shared_cache, "_cache", None)
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_PATH", str(tmp_path / "c.db"))
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_KEY", "")
+    assert shared_cache.get_shared_cache() is None
+
+
+def test_regex_settings_are_part_of_the_scope(monkeypatch):
+    from app.infrastructure.profiles import DEFAULT_PROFILE
+
+    before = service._analysis_scope(DEFAULT_PROFILE)
+    monkeypatch.setattr(service, "_cache_scopes", {})
+    monkeypatch.setattr(service, "REGEX_TIMEOUT_MS", service.REGEX_TIMEOUT_MS + 1)
+    assert service._analysis_scope(DEFAULT_PROFILE) != before
+
+
+def test_batched_language_detection_uses_the_cache(cache, monkeypatch):
+    calls = []
+
+    class Model:
+        def predict(self, texts):
+            calls.append(list(texts))
+            return [["__label__en"] for _ in texts], [[0.9] for _ in texts]
+
+    monkeypatch.setattr(lang_detect, "_get_fasttext_model", lambda: Model())
+    lang_detect.detect_languages(["hello world"])
+    detections = lang_detect.detect_languages(["hello world", "good morning"])
+
+    assert [d.language for d in detections] == ["en", "en"]
+    assert calls == [["hello world"], ["good morning"]]
+    assert lang_detect.detect_language("good morning").method == "fasttext"
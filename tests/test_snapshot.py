@@ -0,0 +1,77 @@
+import json
+
+import spacy
+from presidio_analyzer import RecognizerRegistry
+
+import app.infrastructure.nlp as nlp_module
+import app.infrastructure.snapshot as snapshot
+from app.infrastructure.nlp import _blank_spacy_engine
+from app.infrastructure.startup import startup_report, timed
+
+
+def _names(registry):
+    return sorted((type(r).__name__, r.supported_language) for r in registry.recognizers)
+
+
+def _engine():
+    engine = _blank_spacy_engine({"ru", "en"})
+    engine.nlp["ru"].add_pipe("sentencizer", name="senter")
+    return engine
+
+
+def test_build_and_load_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "_manifest", None)
+    monkeypatch.setattr(snapshot, "_snapshot_dir", None)
+    for name in ("INITIALIZED", "FALLBACK_USED", "FALLBACK_REASON"):
+        monkeypatch.setattr(nlp_module, name, getattr(nlp_module, name))
+    path = str(tmp_path / "snapshot")
+
+    manifest = snapshot.build_snapshot(path, _engine(), skip_recognizers=["UsBankRecognizer"])
+    assert manifest["models"]["ru"]["removed"] == ["senter"]
+
+    engine = snapshot.load_snapshot_engine(path)
+    assert engine is not None and set(engine.nlp) == {"ru", "en"}
+    assert "senter" not in engine.nlp["ru"].pipe_names
+    assert [t.text for t in engine.nlp["ru"]("Иван Петров")] == ["Иван", "Петров"]
+
+    expected = RecognizerRegistry()
+    expected.load_predefined_recognizers(nlp_engine=engine)
+    registry = RecognizerRegistry()
+    assert snapshot.load_predefined_from_snapshot(registry, engine)
+    assert _names(registry) == [n for n in _names(expected) if n[0] != "UsBankRecognizer"]
+    assert snapshot.snapshot_status()["languages"] == ["en", "ru"]
+    # built from blank pipelines, so the service reports itself as degraded
+    assert nlp_module.nlp_status()["fallback_used"]
+
+
+def test_rebuild_replaces_directory(tmp_path):
+    path = tmp_path / "snapshot"
+    snapshot.build_snapshot(str(path), _engine())
+    (path / "stale").write_text("x")
+
+    snapshot.build_snapshot(str(path), _engine())
+
+    assert not (path / "stale").exists()
+    assert [p.name for p in tmp_path.iterdir()] == ["snapshot"]
+
+
+def test_snapshot_from_other_versions_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "_manifest", None)
+    path = tmp_path / "snapshot"
+    snapshot.build_snapshot(str(path), _engine())
+    manifest = json.loads((path / "manifest.json").read_text())
+    manifest["versions"]["spacy"] = "0.0.1"
+    (path / "manifest.json").write_text(json.dumps(manifest))
+
+    assert snapshot.load_snapshot_engine(str(path)) is None
+    assert snapshot.load_snapshot_engine(str(tmp_path / "missing")) is None
+    assert not snapshot.load_predefined_from_snapshot(RecognizerRegistry(), _engine())
+
+
+def test_startup_report(client):
+    with timed("test_stage"):
+        spacy.blank("en")
+
+    assert startup_report()["stages"]["test_stage"] >= 0
+    body = client.get("/health").json()
+    assert "test_stage" in body["startup"]["stages"]
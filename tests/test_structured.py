@@ -0,0 +1,67 @@
+import pytest
+
+import app.application.structured as structured_module
+from app.application.structured import FieldRules, anonymize_structure
+
+EMAIL = "ivan.ivanov@example.com"
+
+
+def test_structure_is_preserved_and_rules_apply():
+    payload = {
+        "user": {"email": EMAIL, "token": "secret-value", "age": 42},
+        "events": [
+            {"note": f"пишите на {EMAIL}", "id": "evt-1"},
+            {"note": f"пишите на {EMAIL}", "id": "evt-2"},
+        ],
+        "meta": {"source": EMAIL},
+        "flags": [True, None],
+    }
+    rules = FieldRules(skip=["meta.**", "events.*.id"], mask=["user.token"])
+
+    data, stats = anonymize_structure(payload, "ru", rules=rules)
+
+    assert data["user"]["age"] == 42 and data["flags"] == [True, None]
+    assert data["user"]["token"] == "*" * len("secret-value")
+    assert data["meta"]["source"] == EMAIL
+    assert [e["id"] for e in data["events"]] == ["evt-1", "evt-2"]
+    assert EMAIL not in data["user"]["email"] and EMAIL not in data["events"][0]["note"]
+    assert payload["user"]["email"] == EMAIL  # input is not mutated
+    assert stats["leaves"] == 7 and stats["skipped"] == 3 and stats["masked"] == 1
+    # both event notes are one unique value
+    assert stats["unique"] == 2
+
+
+def test_duplicate_leaves_are_analyzed_once(monkeypatch):
+    calls = []
+    original = structured_module.analyze_texts
+
+    def spy(texts, language=None, profile=None):
+        calls.append(list(texts))
+        return original(texts, language, profile)
+
+    monkeypatch.setattr(structured_module, "analyze_texts", spy)
+
+    anonymize_structure([EMAIL] * 50 + ["hello"], rules=FieldRules(languages={"1": "en"}))
+
+    assert sorted(len(batch) for batch in calls) == [2]
+
+
+def test_invalid_rule_language_is_rejected():
+    with pytest.raises(ValueError):
+        anonymize_structure({"a": "text"}, rules=FieldRules(languages={"a": "de"}))
+
+
+def test_anonymize_json_endpoint(client):
+    resp = client.post(
+        "/anonymize/json",
+        json={"data": {"contact": EMAIL, "list": [EMAIL, 1]}, "language": "ru", "rules": {"mask": ["list.*"]}},
+    )
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert EMAIL not in body["data"]["contact"]
+    assert body["data"]["list"] == ["*" * len(EMAIL), 1]
+    assert body["stats"]["masked"] == 1
+
+    bad = client.post("/anonymize/json", json={"data": {"a": "x"}, "language": "de"})
+    assert bad.status_code == 400
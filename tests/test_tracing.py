@@ -0,0 +1,81 @@
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+import app.infrastructure.tracing as tracing  # noqa: E402
+from app.application.service import MicroBatcher, analyze_text, anonymize_results  # noqa: E402
+
+EMAIL = "ivan.ivanov@example.com"
+TEXT = f"Пишите на {EMAIL}, ИНН 1234567890"
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    for name in ("_tracer", "_provider", "_exporter_kind", "_memory_exporter"):
+        monkeypatch.setattr(tracing, name, None)
+    assert tracing.init_tracing("memory")
+    exporter = tracing.memory_exporter()
+    yield exporter
+    exporter.clear()
+
+
+def _by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+def test_pipeline_stages_are_traced_without_pii(spans):
+    _, results = analyze_text(TEXT, "ru")
+    anonymize_results(TEXT, results)
+
+    by_name = _by_name(spans)
+    assert {"detect_language", "nlp", "recognizers", "post_validate", "anonymize"} <= set(by_name)
+    assert by_name["detect_language"].attributes["pii.detection_method"] == "explicit"
+    assert "EMAIL_ADDRESS" in by_name["recognizers"].attributes["pii.entity_types"]
+    # the INN above has a bad checksum
+    assert by_name["post_validate"].attributes["pii.rejected.inn_checksum"] == 1
+
+    for span in spans.get_finished_spans():
+        for value in span.attributes.values():
+            values = value if isinstance(value, tuple) else (value,)
+            assert not any(isinstance(v, str) and ("@" in v or "1234567890" in v) for v in values)
+
+
+def test_set_attributes_drops_free_text(spans):
+    with tracing.stage_span("custom") as span:
+        tracing.set_attributes(span, text=EMAIL, chars=3)
+
+    attributes = _by_name(spans)["custom"].attributes
+    assert "pii.text" not in attributes and attributes["pii.chars"] == 3
+
+
+def test_incoming_trace_context_is_continued(client, spans):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    resp = client.post(
+        "/analyze",
+        json={"text": TEXT, "language": "ru"},
+        headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+    )
+    assert resp.status_code == 200
+
+    by_name = _by_name(spans)
+    server = by_name["POST /analyze"]
+    assert format(server.context.trace_id, "032x") == trace_id
+    assert server.attributes["http.route"] == "/analyze"
+    assert by_name["nlp"].context.trace_id == server.context.trace_id
+
+
+def test_micro_batched_spans_join_the_submitters_trace(spans):
+    batcher = MicroBatcher(max_wait_ms=50, max_batch_size=8)
+    with tracing.stage_span("http.request") as parent:
+        batcher.submit(TEXT, "ru").result(timeout=30)
+
+    for name in ("recognizers", "post_validate"):
+        assert _by_name(spans)[name].context.trace_id == parent.context.trace_id
+
+
+def test_tracing_is_noop_when_disabled(monkeypatch):
+    monkeypatch.setattr(tracing, "_tracer", None)
+
+    with tracing.stage_span("anything") as span:
+        assert span is None
+    assert tracing.init_tracing("") is False
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+from presidio_analyzer import RecognizerResult
+
+import app.infrastructure.validation_rules as rules
+from app.application.service import post_validate
+from app.infrastructure.profiles import DEFAULT_PROFILE, Profile
+
+
+@pytest.fixture
+def fresh_rules(monkeypatch):
+    monkeypatch.setattr(rules, "_specs", None)
+    monkeypatch.setattr(rules, "_tables", {})
+    monkeypatch.setattr(rules, "KINDS", dict(rules.KINDS))
+
+
+def _names(table, entity):
+    return [name for name, _ in table.get(entity, ())]
+
+
+def test_table_dispatches_by_entity_type(fresh_rules):
+    table = rules.get_rule_table(DEFAULT_PROFILE)
+
+    assert _names(table, "RU_INN") == ["inn_checksum"]
+    assert _names(table, "RU_RS") == ["account_without_bik", "account_checksum"]
+    assert _names(table, "US_DRIVER_LICENSE") == ["dropped_entity"]
+    assert "EMAIL_ADDRESS" not in table
+
+    lenient = Profile("lenient", drop_entities=frozenset(), disabled_rules=frozenset({"account_without_bik"}))
+    table = rules.get_rule_table(lenient)
+    assert _names(table, "RU_RS") == ["account_checksum"]
+    assert "US_DRIVER_LICENSE" not in table
+
+
+def test_rules_file_adds_validators(fresh_rules, tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [
+        {"name": "employee_id_luhn", "kind": "checksum", "entities": ["EMPLOYEE_ID"], "algorithm": "luhn"},
+        {"name": "inn_checksum", "kind": "context", "entities": ["RU_INN"], "keywords": ["инн"]},
+    ]}))
+    assert "employee_id_luhn" in rules.reload_validation_rules(str(path))
+
+    text = "EMP 4111111111111111 EMP 4111111111111112, ИНН 500100732250"
+    results = [
+        RecognizerResult("EMPLOYEE_ID", 4, 20, 0.9),
+        RecognizerResult("EMPLOYEE_ID", 25, 41, 0.9),
+        RecognizerResult("RU_INN", 47, 59, 0.9),
+    ]
+    rejections = {}
+    kept = post_validate(text, results, rejections)
+
+    # the file's inn_checksum replaced the built-in checksum with a context rule
+    assert [(r.entity_type, r.start) for r in kept] == [("EMPLOYEE_ID", 4), ("RU_INN", 47)]
+    assert rejections == {"employee_id_luhn": 1}
+    stats = rules.rule_stats()
+    assert stats["hits"]["employee_id_luhn"] >= 2 and stats["rejects"]["employee_id_luhn"] >= 1
+
+
+def test_register_kind(fresh_rules, tmp_path):
+    rules.register_kind("max_length", lambda spec, profile: lambda ctx, r, span: len(span) <= spec["chars"])
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [
+        {"name": "short_person", "kind": "max_length", "entities": ["PERSON"], "chars": 5},
+    ]}))
+    rules.reload_validation_rules(str(path))
+
+    kept = post_validate("Ivan Petrovich", [RecognizerResult("PERSON", 0, 14, 0.9)])
+    assert kept == []
+
+
+def test_invalid_rules_are_rejected(fresh_rules, tmp_path):
+    path = tmp_path / "rules.json"
+    for rule in (
+        {"name": "x", "kind": "no_such_kind", "entities": ["PERSON"]},
+        {"name": "x", "kind": "checksum", "entities": ["PERSON"], "algorithm": "md5"},
+        {"name": "x", "kind": "context", "entities": []},
+    ):
+        path.write_text(json.dumps({"rules": [rule]}))
+        with pytest.raises(ValueError):
+            rules.load_rule_specs(str(path))
+
+
+def test_broken_rules_file_fails_startup(fresh_rules, tmp_path, monkeypatch):
+    from app.interface.api import app, lifespan
+
+    path = tmp_path / "rules.yaml"
+    path.write_text("rules:\n  - name: [unclosed\n")
+    with pytest.raises(ValueError, match="not valid YAML"):
+        rules.load_rule_specs(str(path))
+
+    async def start():
+        async with lifespan(app):
+            pass
+
+    monkeypatch.setattr(rules, "VALIDATION_RULES_FILE", str(path))
+    with pytest.raises(ValueError, match="not valid YAML"):
+        asyncio.run(start())
+    assert rules._specs is None